@@ -0,0 +1,231 @@
+"""
+Simulate probe bursts after a correlated failure, per jitter strategy and probe pacing.
+
+Runs the ping scheduler in virtual time: machines start spread over the
+check interval, except a rack registered together, whose machines get their
+first check in the same instant (as machines added through the API do).
+The whole rack then goes down at once (losing its switch) and comes back
+after the outage. Sweeps containing a dead host take the full ping timeout,
+so workers saturate while the rack is confirmed and overdue machines are
+swept together, which phase-locks them further.
+Detection policies and probe pacing are the monitor's own
+(``DetectionPolicy``, ``ProbeRateLimiter``); the dispatcher and workers are
+modelled after ``PingScheduler``.
+
+Reports, per configuration, the peak and 99th percentile of probes started
+per second against the average once the failure is confirmed (the backoff
+phase and the recovery), the time until the failed machines are declared
+unreachable, and the time until their recovery is seen.
+
+Usage:
+    python -m benchmarks.bench_backoff_sim --machines 10000 --failed 2000 --rate 200
+"""
+import argparse
+import heapq
+import random
+import statistics
+from itertools import count
+
+from src.services.backoff import JITTER_STRATEGIES, DetectionPolicy, probe_offset
+from src.services.monitor_service import ProbeRateLimiter
+
+# Sweep duration when every host in the batch answers
+ANSWERED_SWEEP_SECONDS = 0.01
+
+
+def simulate(
+    machines: int,
+    failed: int,
+    policy: DetectionPolicy,
+    rate: float,
+    fail_at: float,
+    outage: float,
+    settle: float,
+    duration: float,
+    workers: int,
+    batch_size: int,
+    timeout: float,
+    spread_rack: bool = False,
+) -> dict:
+    """
+    Simulate the scheduler in virtual time.
+
+    Args:
+        machines: Monitored machines
+        failed: Machines 0..failed-1 are down during the outage
+        policy: Detection policy of every machine
+        rate: Maximum probes started per second (0: unlimited)
+        fail_at: Start of the outage
+        outage: Length of the outage
+        settle: Seconds after the outage start not counted in the probe rate
+        duration: Simulated seconds
+        workers: Scheduler workers
+        batch_size: Maximum machines per sweep
+        timeout: Ping timeout (sweep duration when a host does not answer)
+        spread_rack: Spread the first checks of the failed machines like the others
+
+    Returns:
+        Probes started per second, detection and recovery delays of the failed machines
+    """
+    recover_at = fail_at + outage
+    due = []
+    for machine_id in range(machines):
+        # The rack's machines share the first-check time of machine 0 unless spread
+        phase_id = machine_id if spread_rack or machine_id >= failed else 0
+        due.append((probe_offset(phase_id, policy.check_interval), machine_id))
+    heapq.heapify(due)
+    failures = [0] * machines
+    intervals = [policy.check_interval] * machines
+    detected: dict[int, float] = {}
+    recovered: dict[int, float] = {}
+
+    starts = [0] * (int(duration) + 1)
+    sweeps: list[tuple[float, int, list[tuple[int, bool]]]] = []
+    sequence = count()
+    idle_workers = workers
+    limiter = ProbeRateLimiter(rate) if rate > 0 else None
+    paced_until = 0.0
+
+    while True:
+        # Next event: a finished sweep, or a dispatch when a worker and a due machine are ready
+        dispatch_at = float("inf")
+        if idle_workers and due:
+            dispatch_at = max(due[0][0], paced_until)
+        finish_at = sweeps[0][0] if sweeps else float("inf")
+        now = min(dispatch_at, finish_at)
+        if now > duration:
+            break
+
+        if finish_at <= dispatch_at:
+            _, _, batch = heapq.heappop(sweeps)
+            idle_workers += 1
+            for machine_id, alive in batch:
+                failures[machine_id] = 0 if alive else failures[machine_id] + 1
+                intervals[machine_id] = policy.next_interval(
+                    failures[machine_id], intervals[machine_id]
+                )
+                if policy.is_down(failures[machine_id]):
+                    detected.setdefault(machine_id, now)
+                elif alive and machine_id < failed and now >= recover_at:
+                    recovered.setdefault(machine_id, now)
+                heapq.heappush(due, (now + intervals[machine_id], machine_id))
+            continue
+
+        limit = batch_size
+        if limiter:
+            limit = min(limit, limiter.available(now))
+            if not limit:
+                paced_until = now + limiter.delay()
+                continue
+
+        batch = []
+        while due and due[0][0] <= now and len(batch) < limit:
+            _, machine_id = heapq.heappop(due)
+            down = machine_id < failed and fail_at <= now < recover_at
+            batch.append((machine_id, not down))
+        if limiter:
+            limiter.take(len(batch))
+
+        starts[int(now)] += len(batch)
+        idle_workers -= 1
+        sweep = timeout if any(not alive for _, alive in batch) else ANSWERED_SWEEP_SECONDS
+        heapq.heappush(sweeps, (now + sweep, next(sequence), batch))
+
+    return {
+        "starts": starts[int(fail_at + settle):],
+        "detection": [detected[machine_id] - fail_at for machine_id in detected],
+        "recovery": [recovered[machine_id] - recover_at for machine_id in recovered],
+    }
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Value below which ``fraction`` of the values lie."""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def report(label: str, result: dict, failed: int) -> None:
+    """Print one configuration's results."""
+    starts = result["starts"]
+    average = statistics.fmean(starts)
+    peak = max(starts)
+    detection, recovery = result["detection"], result["recovery"]
+    print(
+        f"{label:<26} {average:7.1f} {peak:6d} {percentile(starts, 0.99):6.0f} "
+        f"{peak / average:6.1f}x   "
+        f"{percentile(detection, 0.5):6.1f} {percentile(detection, 0.99):7.1f} "
+        f"{len(detection):>5}/{failed}   "
+        f"{percentile(recovery, 0.5):7.1f} {percentile(recovery, 0.99):7.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--machines", type=int, default=10000)
+    parser.add_argument("--failed", type=int, default=2000, help="machines down together")
+    parser.add_argument("--interval", type=float, default=60, help="check interval in seconds")
+    parser.add_argument("--max-interval", type=float, default=3600)
+    parser.add_argument("--threshold", type=int, default=3, help="failures until unreachable")
+    parser.add_argument("--confirm", type=float, default=1.0, help="confirmation interval")
+    parser.add_argument("--jitter", type=float, default=0.1, help="uniform jitter fraction")
+    parser.add_argument("--rate", type=float, default=200, help="probe pacing rate (probes/s)")
+    parser.add_argument("--fail-at", type=float, default=120, help="outage start in seconds")
+    parser.add_argument("--outage", type=float, default=3600, help="outage length in seconds")
+    parser.add_argument(
+        "--settle", type=float, default=300, help="seconds of confirmation not counted in rates"
+    )
+    parser.add_argument("--duration", type=float, default=7200, help="simulated seconds")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=2.0, help="ping timeout in seconds")
+    parser.add_argument(
+        "--spread-rack", action="store_true", help="do not register the failed machines together"
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    configurations = [("none", 0.0)]
+    configurations += [(strategy, 0.0) for strategy in JITTER_STRATEGIES]
+    configurations += [(strategy, args.rate) for strategy in ("none", "full")]
+
+    print(
+        f"{args.machines} machines every {args.interval:.0f} s, {args.failed} down from "
+        f"{args.fail_at:.0f} s for {args.outage:.0f} s; "
+        f"probes/s from {args.fail_at + args.settle:.0f} s on\n"
+    )
+    print(
+        f"{'configuration':<26} {'avg/s':>7} {'peak':>6} {'p99':>6} {'peak':>7}   "
+        f"{'detect p50/p99 (s)':>14} {'found':>11}   {'recover p50/p99 (s)':>15}"
+    )
+    for strategy, rate in configurations:
+        random.seed(args.seed)
+        policy = DetectionPolicy(
+            failure_threshold=args.threshold,
+            confirm_interval=args.confirm,
+            check_interval=args.interval,
+            max_interval=args.max_interval,
+            jitter=0.0 if strategy == "none" else args.jitter,
+            jitter_strategy="uniform" if strategy == "none" else strategy,
+        )
+        result = simulate(
+            args.machines,
+            args.failed,
+            policy,
+            rate,
+            args.fail_at,
+            args.outage,
+            args.settle,
+            args.duration,
+            args.workers,
+            args.batch_size,
+            args.timeout,
+            args.spread_rack,
+        )
+        label = strategy + (f", paced {rate:.0f}/s" if rate else "")
+        report(label, result, args.failed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Compare per-request CPU of the machine list serialization paths.
+
+The model path is what list_machines used to do: build a MachineResponse per
+row, model_dump(mode="json") each, then let FastAPI encode the dict again.
+The direct path serializes the row dicts with orjson (dumps_json), as the
+endpoint does now. Both outputs are checked to decode to the same JSON.
+
+Usage:
+    python -m benchmarks.bench_list_serialization --rows 1000 10000 --repeat 20
+"""
+import argparse
+import json
+import time
+from datetime import UTC, datetime, timedelta
+from ipaddress import IPv4Address
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from src.api.caching import dumps_json
+from src.models import MachineResponse
+from src.services.machine_service import _machine_row
+from src.services.status_cache import status_cache
+
+
+def make_rows(count: int, text_addresses: bool, now: datetime) -> list[dict]:
+    """Build rows shaped like the machine list query results."""
+    rows = []
+    for i in range(count):
+        address = IPv4Address(0x0A000000 + i)
+        rows.append(
+            {
+                "id": i + 1,
+                "hostname": f"host-{i:05d}",
+                "ip_address": str(address) if text_addresses else address,
+                "mac_address": f"02:00:{i >> 24 & 0xFF:02x}:{i >> 16 & 0xFF:02x}:"
+                f"{i >> 8 & 0xFF:02x}:{i & 0xFF:02x}",
+                "status": "active" if i % 10 else "unreachable",
+                "last_seen": now - timedelta(seconds=i),
+                "registered_at": now - timedelta(minutes=i),
+                "updated_at": now,
+                "extra_data": {"rack": i // 40} if i % 3 == 0 else None,
+                "is_alive": bool(i % 10),
+                "response_time": (i % 50) / 10 if i % 10 else None,
+            }
+        )
+    return rows
+
+
+def model_path(rows: list[dict]) -> bytes:
+    """Pydantic models, model_dump, then FastAPI's encoding of the dict."""
+    machines = [MachineResponse(**status_cache.apply(dict(row))) for row in rows]
+    content = {
+        "machines": [m.model_dump(mode="json") for m in machines],
+        "total": len(rows),
+        "limit": len(rows),
+        "offset": 0,
+        "next_cursor": None,
+    }
+    return JSONResponse(content=jsonable_encoder(content)).body
+
+
+def direct_path(rows: list[dict]) -> bytes:
+    """Row dicts serialized straight to JSON bytes."""
+    content = {
+        "machines": [_machine_row(row) for row in rows],
+        "total": len(rows),
+        "limit": len(rows),
+        "offset": 0,
+        "next_cursor": None,
+    }
+    return dumps_json(content)
+
+
+def measure(func, rows: list[dict], repeat: int) -> float:
+    """Return CPU milliseconds per call."""
+    func(rows)  # Warm up
+    start = time.process_time()
+    for _ in range(repeat):
+        func(rows)
+    return (time.process_time() - start) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    now = datetime.now(UTC)
+    for count in args.rows:
+        model_rows = make_rows(count, text_addresses=False, now=now)
+        direct_rows = make_rows(count, text_addresses=True, now=now)
+
+        if json.loads(model_path(model_rows)) != json.loads(direct_path(direct_rows)):
+            raise SystemExit(f"Outputs differ at {count} rows")
+
+        model_ms = measure(model_path, model_rows, args.repeat)
+        direct_ms = measure(direct_path, direct_rows, args.repeat)
+        print(
+            f"{count:>6} rows: model {model_ms:8.2f} ms  direct {direct_ms:8.2f} ms  "
+            f"speedup {model_ms / direct_ms:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
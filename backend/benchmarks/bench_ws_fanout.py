@@ -0,0 +1,109 @@
+"""
+Load test WebSocketManager fan-out with many simulated clients and one stalled client.
+
+Every simulated client takes a small, fixed time per send; one client never
+completes a send. The benchmark reports how long broadcast() takes for the
+caller and how each slow-client policy treats the stalled client.
+
+Usage:
+    python -m benchmarks.bench_ws_fanout --clients 500 --messages 2000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from src.services.websocket_service import WebSocketManager
+
+
+class FakeWebSocket:
+    """WebSocket stand-in that takes ``send_delay`` seconds per frame."""
+
+    def __init__(self, send_delay: float = 0.0):
+        self.send_delay = send_delay
+        self.received = 0
+        self.snapshots = 0
+        self.closed = False
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, data: str) -> None:
+        if self.send_delay:
+            await asyncio.sleep(self.send_delay)
+        if data.startswith('{"type": "snapshot"'):
+            self.snapshots += 1
+        self.received += 1
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed = True
+
+
+class StalledWebSocket(FakeWebSocket):
+    """WebSocket stand-in whose sends never complete (e.g. a frozen browser tab)."""
+
+    async def send_text(self, data: str) -> None:
+        await asyncio.Event().wait()
+
+
+async def run(clients: int, messages: int, rate: float, policy: str, queue_size: int) -> None:
+    manager = WebSocketManager(queue_size=queue_size, slow_client_policy=policy)
+    sockets = [FakeWebSocket(send_delay=0.0005) for _ in range(clients)]
+    stalled = StalledWebSocket()
+
+    for websocket in [*sockets, stalled]:
+        await manager.connect(websocket)
+
+    durations = []
+    interval = 1 / rate
+    for sequence in range(messages):
+        message = {
+            "type": "status_update",
+            "machine_id": sequence % 1000,
+            "status": "active",
+            "is_alive": True,
+            "response_time": 1.5,
+            "last_seen": "2024-01-01T00:00:00+00:00",
+        }
+        started = time.perf_counter()
+        await manager.broadcast(message)
+        durations.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+
+    # Let writers drain
+    await asyncio.sleep(0.5)
+
+    received = [websocket.received for websocket in sockets]
+    print(f"policy={policy} clients={clients} messages={messages} queue_size={queue_size}")
+    print(
+        f"  broadcast(): mean {statistics.mean(durations) * 1e6:.0f} us, "
+        f"p99 {sorted(durations)[int(len(durations) * 0.99)] * 1e6:.0f} us, "
+        f"max {max(durations) * 1e6:.0f} us"
+    )
+    print(
+        f"  healthy clients: min {min(received)}, max {max(received)} frames received "
+        f"(expected {messages})"
+    )
+    print(
+        f"  stalled client: connected={stalled in manager.clients}, closed={stalled.closed}, "
+        f"resyncs={manager.resyncs}, dropped={manager.dropped_clients}"
+    )
+
+    for websocket in list(manager.clients):
+        manager.disconnect(websocket)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=1000, help="broadcasts per second")
+    parser.add_argument("--queue-size", type=int, default=256)
+    args = parser.parse_args()
+
+    for policy in ("resync", "drop"):
+        asyncio.run(run(args.clients, args.messages, args.rate, policy, args.queue_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 """API package."""
+from .caching import cached_json_response
 from .dependencies import get_db
 from .middleware import (
     RateLimitMiddleware,
@@ -9,6 +10,7 @@ from .middleware import (
 
 __all__ = [
     "get_db",
+    "cached_json_response",
     "setup_cors",
     "RateLimitMiddleware",
     "http_exception_handler",
@@ -0,0 +1,156 @@
+"""Conditional GET support: ETags from the state version and a shared response cache."""
+import asyncio
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from ipaddress import IPv4Address, IPv6Address
+from typing import Any
+
+import orjson
+from fastapi import Request, Response, status
+
+from ..config import settings
+from ..services.state_version import state_version
+
+CacheKey = tuple[str, tuple[tuple[str, str], ...]]
+
+
+def _json_default(obj: Any) -> Any:
+    """Serialize types orjson does not handle natively."""
+    if isinstance(obj, (IPv4Address, IPv6Address)):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps_json(content: Any) -> bytes:
+    """
+    Serialize content to JSON bytes in one pass.
+
+    Datetimes are written like Pydantic writes them in JSON mode (UTC as 'Z'),
+    so plain DB rows serialize the same as the corresponding response models.
+
+    Args:
+        content: JSON-compatible content (dicts, lists, datetimes, ...)
+
+    Returns:
+        Serialized JSON
+    """
+    return orjson.dumps(content, default=_json_default, option=orjson.OPT_UTC_Z)
+
+
+class ResponseCache:
+    """
+    Serialized response bodies keyed by request and state version.
+
+    Entries of older versions are never served; they are replaced on the
+    next request for the same key or evicted least recently used first.
+    Concurrent misses for the same key and version share a single build.
+    """
+
+    def __init__(self, max_entries: int | None = None):
+        """
+        Initialize cache.
+
+        Args:
+            max_entries: Maximum cached responses (default: from settings)
+        """
+        self.max_entries = max_entries or settings.response_cache_size
+        self._entries: OrderedDict[CacheKey, tuple[int, bytes]] = OrderedDict()
+        self._building: dict[tuple[CacheKey, int], asyncio.Future] = {}
+
+    async def get_or_build(
+        self, key: CacheKey, version: int, build: Callable[[], Awaitable[Any]]
+    ) -> bytes:
+        """
+        Get the body for a key at a version, building it on a miss.
+
+        Args:
+            key: Cache key of the request
+            version: State version read before building
+            build: Coroutine function returning content for ``dumps_json``
+
+        Returns:
+            Serialized JSON body
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        building = self._building.get((key, version))
+        if building is not None:
+            return await asyncio.shield(building)
+
+        future = asyncio.get_running_loop().create_future()
+        self._building[(key, version)] = future
+        try:
+            body = dumps_json(await build())
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else is waiting
+            raise
+        finally:
+            del self._building[(key, version)]
+
+        future.set_result(body)
+        self._store(key, version, body)
+        return body
+
+    def _store(self, key: CacheKey, version: int, body: bytes) -> None:
+        """Cache a body unless a newer version is already cached."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > version:
+            return
+
+        self._entries[key] = (version, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
+
+
+async def cached_json_response(
+    request: Request, build: Callable[[], Awaitable[Any]]
+) -> Response:
+    """
+    Serve a JSON GET response through the state version.
+
+    Returns 304 without calling ``build`` if the client's If-None-Match
+    matches the current version. Otherwise reuses the body cached for this
+    path and query at the current version, building and caching it on a
+    miss.
+
+    Args:
+        request: Incoming request (path and query form the cache key)
+        build: Coroutine function returning content for ``dumps_json``
+
+    Returns:
+        Response carrying the ETag of the version it was built at
+    """
+    # Read before building, so the body is at least as new as its ETag
+    version = state_version.value
+    etag = state_version.etag(version)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+    body = await response_cache.get_or_build(key, version, build)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Global response cache shared by all clients
+response_cache = ResponseCache()
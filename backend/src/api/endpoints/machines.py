@@ -1,14 +1,97 @@
 """Machine management API endpoints."""
-from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
+from datetime import UTC, datetime, timedelta
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, Request, status
 from asyncpg import Pool
 
-from ...api import get_db
-from ...models import MachineCreate, MachineResponse
+from ...api import cached_json_response, get_db
+from ...config import settings
+from ...models import (
+    HistoryResponse,
+    MachineCreate,
+    MachineInDB,
+    MachineListResponse,
+    MachineResponse,
+    UptimeResponse,
+)
+from ...services import export_service, history_service
+from ...services.history_service import HistoryService
 from ...services.machine_service import MachineService
+from ..streaming import streaming_export
 
 router = APIRouter()
 
 
+def _parse_cursor(after: str) -> tuple[datetime, int]:
+    """
+    Parse a '<registered_at>,<id>' pagination cursor.
+
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        registered_at, machine_id = after.rsplit(",", 1)
+        # A '+' of the UTC offset arrives as a space if the client did not encode it
+        registered_at = datetime.fromisoformat(registered_at.strip().replace(" ", "+"))
+        if registered_at.tzinfo is None:
+            raise ValueError("timezone required")
+        return registered_at, int(machine_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor must be '<registered_at>,<id>' as returned in next_cursor",
+        )
+
+
+def _validate_status_filter(status_filter: str | None) -> None:
+    """Reject unknown status filter values."""
+    if status_filter and status_filter not in ["active", "unreachable"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Status must be 'active' or 'unreachable'",
+        )
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes from query parameters as UTC."""
+    return value if value.tzinfo else value.replace(tzinfo=UTC)
+
+
+def _validate_machine_ids(machine_ids: list[int] | None) -> list[int] | None:
+    """Deduplicate a machine ID filter and cap its size."""
+    if machine_ids is None:
+        return None
+    if len(machine_ids) > settings.max_machines:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.max_machines} machine_ids are allowed",
+        )
+    return sorted(set(machine_ids))
+
+
+def _encode_cursor(machine: dict) -> str:
+    """Build the pagination cursor pointing after a machine row."""
+    return f"{machine['registered_at'].isoformat()},{machine['id']}"
+
+
+async def _track_machines(results: list[tuple[MachineInDB, bool]]) -> None:
+    """
+    Update in-process state after machines were registered or updated.
+
+    Keeps WebSocket CIDR/hostname filters current (the hostname may have
+    changed) and starts monitoring the new machines, here or, through
+    LISTEN/NOTIFY, in monitor workers and other cluster instances.
+
+    Args:
+        results: (machine, is_new) pairs from the upsert
+    """
+    from ...services import cluster_service
+
+    await cluster_service.machines_changed(
+        [(machine.id, str(machine.ip_address), machine.hostname) for machine, _ in results]
+    )
+
+
 @router.put(
     "/machines/{ip_address}",
     response_model=MachineResponse,
@@ -48,13 +131,7 @@ async def upsert_machine(
         machine, is_new = await service.upsert_machine(ip_address, machine_data)
 
         # Start monitoring for new machines
-        if is_new:
-            from ...services import monitor_service
-
-            if monitor_service.monitor_manager:
-                await monitor_service.monitor_manager.start_monitoring(
-                    machine.id, machine.ip_address
-                )
+        await _track_machines([(machine, is_new)])
 
         # Return appropriate status code
         response_status = status.HTTP_201_CREATED if is_new else status.HTTP_200_OK
@@ -79,20 +156,88 @@ async def upsert_machine(
         )
 
 
+@router.post(
+    "/machines:bulk",
+    response_model=dict,
+    status_code=status.HTTP_200_OK,
+    responses={
+        200: {"description": "Machines registered/updated successfully"},
+        400: {"description": "Invalid request data"},
+        503: {"description": "Machine limit reached"},
+    },
+)
+async def bulk_upsert_machines(
+    machines: list[MachineCreate] = Body(..., description="Machines to register or update"),
+    db: Pool = Depends(get_db),
+):
+    """
+    Register or update many machines in one request.
+
+    Each entry has the same fields as the single upsert, including
+    **ip_address**. Machines are matched by IP address; if an IP address
+    appears more than once, the last entry wins.
+
+    All machines are written in a single statement. If the new machines
+    would exceed the machine limit, nothing is written and 503 is returned.
+
+    Returns the resulting machines with the number created and updated.
+    """
+    if not machines:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one machine is required",
+        )
+
+    if len(machines) > settings.max_machines:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.max_machines} machines can be registered per request",
+        )
+
+    service = MachineService(db)
+
+    try:
+        results = await service.upsert_machines(machines)
+    except ValueError as e:
+        # Machine limit reached
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+        )
+
+    await _track_machines(results)
+
+    created = sum(1 for _, is_new in results if is_new)
+
+    return {
+        "machines": [
+            MachineResponse(**machine.model_dump()).model_dump(mode="json")
+            for machine, _ in results
+        ],
+        "created": created,
+        "updated": len(results) - created,
+    }
+
+
 @router.get(
     "/machines",
-    response_model=dict,
+    response_model=MachineListResponse,
     responses={
         200: {"description": "Machine list retrieved successfully"},
+        304: {"description": "Machine list unchanged since the ETag in If-None-Match"},
         400: {"description": "Invalid query parameters"},
     },
 )
 async def list_machines(
+    request: Request,
     status_filter: str | None = Query(
         None, alias="status", description="Filter by status (active/unreachable)"
     ),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of results"),
     offset: int = Query(0, ge=0, description="Number of results to skip"),
+    after: str | None = Query(
+        None, description="Cursor '<registered_at>,<id>' from next_cursor of the previous page"
+    ),
     db: Pool = Depends(get_db),
 ):
     """
@@ -101,25 +246,292 @@ async def list_machines(
     - **status**: Optional filter by status ('active' or 'unreachable')
     - **limit**: Maximum number of results (default: 100, max: 1000)
     - **offset**: Number of results to skip for pagination (default: 0)
+    - **after**: Cursor for the next page; prefer it over offset, whose cost
+      grows with the page number
 
-    Returns paginated list of machines with total count.
+    Returns paginated list of machines with total count, ordered by
+    registration time (newest first). next_cursor is null on the last page.
+
+    The response carries an ETag of the global machine state version. Send
+    it back in If-None-Match to get 304 while nothing has changed; responses
+    are cached and shared across clients until the version moves.
     """
     # Validate status filter
-    if status_filter and status_filter not in ["active", "unreachable"]:
+    _validate_status_filter(status_filter)
+
+    if after is not None and offset:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Status must be 'active' or 'unreachable'",
+            detail="Use either after or offset, not both",
+        )
+
+    cursor = _parse_cursor(after) if after is not None else None
+
+    async def build() -> dict:
+        service = MachineService(db)
+        machines, total = await service.get_all_machines(status_filter, limit, offset, cursor)
+
+        return {
+            "machines": machines,
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+            "next_cursor": _encode_cursor(machines[-1]) if len(machines) == limit else None,
+        }
+
+    return await cached_json_response(request, build)
+
+
+@router.get(
+    "/machines/history",
+    response_model=HistoryResponse,
+    responses={
+        200: {"description": "Ping history of the machines"},
+        304: {"description": "Not modified since the ETag in If-None-Match"},
+        400: {"description": "Invalid query parameters"},
+    },
+)
+async def get_machines_history(
+    request: Request,
+    machine_ids: list[int] | None = Query(
+        None, description="Machines to include (repeat the parameter; default: all)"
+    ),
+    start: datetime | None = Query(
+        None, alias="from", description="Start of the range (default: to - 24h)"
+    ),
+    end: datetime | None = Query(None, alias="to", description="End of the range (default: now)"),
+    resolution: str | None = Query(
+        None, pattern="^(5m|1h|1d)$", description="5m, 1h or 1d (default: automatic)"
+    ),
+    db: Pool = Depends(get_db),
+):
+    """
+    Get bucketed ping history (probe count, uptime, RTT avg/min/max) of many machines.
+
+    - **machine_ids**: Optional machine filter, e.g. ?machine_ids=1&machine_ids=2
+    - **from** / **to**: ISO 8601 time range (naive times are UTC)
+    - **resolution**: Bucket size; by default the finest one that keeps each
+      series within HISTORY_MAX_POINTS points (5m for the last day, 1h for a
+      week or month, 1d beyond)
+
+    Series are read from aggregates maintained as ping results are written,
+    so the cost depends on the number of buckets, not on the number of
+    pings. Each series is columnar: one list per field, aligned with
+    ``buckets``. Responses carry an ETag like the machine list.
+    """
+    machine_ids = _validate_machine_ids(machine_ids)
+    end = _as_utc(end) if end else datetime.now(UTC)
+    start = _as_utc(start) if start else end - timedelta(days=1)
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must be before 'to'",
+        )
+
+    resolution = resolution or history_service.select_resolution(start, end)
+
+    async def build() -> dict:
+        service = HistoryService(db)
+        machines = await service.get_series(machine_ids, start, end, resolution)
+
+        return {
+            "from": start,
+            "to": end,
+            "resolution": resolution,
+            "interval": history_service.RESOLUTIONS[resolution],
+            "machines": machines,
+        }
+
+    return await cached_json_response(request, build)
+
+
+@router.get(
+    "/machines/uptime",
+    response_model=UptimeResponse,
+    responses={
+        200: {"description": "Uptime percentages of the machines"},
+        304: {"description": "Not modified since the ETag in If-None-Match"},
+        400: {"description": "Invalid query parameters"},
+    },
+)
+async def get_machines_uptime(
+    request: Request,
+    machine_ids: list[int] | None = Query(
+        None, description="Machines to include (repeat the parameter; default: all)"
+    ),
+    windows: str = Query(
+        ",".join(history_service.DEFAULT_UPTIME_WINDOWS),
+        description="Comma-separated windows ending now, e.g. 24h,7d,30d",
+    ),
+    db: Pool = Depends(get_db),
+):
+    """
+    Get uptime percentages of many machines over several windows in one call.
+
+    - **machine_ids**: Optional machine filter, e.g. ?machine_ids=1&machine_ids=2
+    - **windows**: Windows such as 24h, 7d or 30d (default: 24h,7d,30d)
+
+    Computed from the hourly aggregates, so each window starts at the
+    beginning of its first hour. uptime_pct is null for windows without
+    probes. Responses carry an ETag like the machine list.
+    """
+    machine_ids = _validate_machine_ids(machine_ids)
+
+    labels = [window.strip() for window in windows.split(",") if window.strip()]
+    if not labels or len(labels) > history_service.MAX_UPTIME_WINDOWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Specify 1 to {history_service.MAX_UPTIME_WINDOWS} windows",
+        )
+    try:
+        parsed = {label: history_service.parse_window(label) for label in labels}
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    async def build() -> dict:
+        service = HistoryService(db)
+        machines = await service.get_uptime(machine_ids, parsed)
+
+        return {"windows": list(parsed), "machines": machines}
+
+    return await cached_json_response(request, build)
+
+
+@router.get(
+    "/machines/export",
+    responses={
+        200: {"description": "Machines streamed as NDJSON or CSV"},
+        400: {"description": "Invalid query parameters"},
+        503: {"description": "Too many exports in progress"},
+    },
+)
+async def export_machines(
+    export_format: str = Query(
+        "ndjson", alias="format", pattern="^(ndjson|csv)$", description="ndjson or csv"
+    ),
+    status_filter: str | None = Query(
+        None, alias="status", description="Filter by status (active/unreachable)"
+    ),
+):
+    """
+    Stream all machines as NDJSON (one object per line) or CSV.
+
+    - **format**: 'ndjson' (default) or 'csv'
+    - **status**: Optional filter by status ('active' or 'unreachable')
+
+    Rows are read through a server-side cursor on a dedicated connection and
+    streamed in batches, so memory use does not grow with the number of
+    machines.
+    """
+    _validate_status_filter(status_filter)
+
+    try:
+        export = await export_service.open_machines_export(status_filter)
+    except export_service.ExportBusyError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+    return streaming_export(
+        export,
+        export_format,
+        "machines",
+        export_service.MACHINE_EXPORT_COLUMNS,
+        json_columns=("extra_data",),
+    )
+
+
+@router.get(
+    "/machines/{machine_id}/pings",
+    responses={
+        200: {"description": "Ping history streamed as NDJSON or CSV"},
+        400: {"description": "Invalid query parameters"},
+        404: {"description": "Machine not found"},
+        503: {"description": "Too many exports in progress"},
+    },
+)
+async def export_machine_pings(
+    machine_id: int = Path(..., description="Machine ID"),
+    start: datetime | None = Query(
+        None, alias="from", description="Start of the range (inclusive, default: to - 24h)"
+    ),
+    end: datetime | None = Query(
+        None, alias="to", description="End of the range (exclusive, default: now)"
+    ),
+    export_format: str = Query(
+        "ndjson", alias="format", pattern="^(ndjson|csv)$", description="ndjson or csv"
+    ),
+    db: Pool = Depends(get_db),
+):
+    """
+    Stream the ping history of a machine as NDJSON or CSV, oldest first.
+
+    - **machine_id**: ID of the machine
+    - **from** / **to**: ISO 8601 time range (naive times are UTC)
+    - **format**: 'ndjson' (default) or 'csv'
+
+    Rows are read through a server-side cursor on a dedicated connection and
+    streamed in batches, so months of history can be exported with
+    constant memory.
+    """
+    end = _as_utc(end) if end else datetime.now(UTC)
+    start = _as_utc(start) if start else end - timedelta(days=1)
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must be before 'to'",
         )
 
     service = MachineService(db)
-    machines, total = await service.get_all_machines(status_filter, limit, offset)
+    if await service.get_machine_by_id(machine_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Machine with ID {machine_id} not found",
+        )
 
-    return {
-        "machines": [m.model_dump(mode="json") for m in machines],
-        "total": total,
-        "limit": limit,
-        "offset": offset,
-    }
+    try:
+        export = await export_service.open_pings_export(machine_id, start, end)
+    except export_service.ExportBusyError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+    return streaming_export(
+        export, export_format, f"machine-{machine_id}-pings", export_service.PING_EXPORT_COLUMNS
+    )
+
+
+@router.get(
+    "/machines/{machine_id}",
+    response_model=MachineResponse,
+    responses={
+        200: {"description": "Machine retrieved successfully"},
+        304: {"description": "Machine unchanged since the ETag in If-None-Match"},
+        404: {"description": "Machine not found"},
+    },
+)
+async def get_machine(
+    request: Request,
+    machine_id: int = Path(..., description="Machine ID"),
+    db: Pool = Depends(get_db),
+):
+    """
+    Get a machine by ID with its latest ping status.
+
+    - **machine_id**: ID of the machine
+
+    Supports If-None-Match like the machine list.
+    """
+
+    async def build() -> dict:
+        service = MachineService(db)
+        machine = await service.get_machine_by_id(machine_id)
+
+        if machine is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Machine with ID {machine_id} not found",
+            )
+
+        return machine
+
+    return await cached_json_response(request, build)
 
 
 @router.delete(
@@ -151,10 +563,9 @@ async def delete_machine(
             detail=f"Machine with ID {machine_id} not found",
         )
 
-    # Stop monitoring for deleted machine
-    from ...services import monitor_service
+    # Stop monitoring for deleted machine (here, in monitor workers and other instances)
+    from ...services import cluster_service
 
-    if monitor_service.monitor_manager:
-        await monitor_service.monitor_manager.stop_monitoring(machine_id)
+    await cluster_service.machine_deleted(machine_id)
 
     return None
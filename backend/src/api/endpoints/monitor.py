@@ -0,0 +1,48 @@
+"""Monitoring scheduler API endpoints."""
+from fastapi import APIRouter, HTTPException, status
+
+from ...db import pool_stats
+from ...services import cluster_service, monitor_service
+
+router = APIRouter()
+
+
+@router.get(
+    "/monitor/stats",
+    response_model=dict,
+    responses={
+        200: {"description": "Scheduler metrics retrieved successfully"},
+        503: {"description": "Monitoring is not running"},
+    },
+)
+async def get_monitor_stats():
+    """
+    Get ping scheduler metrics.
+
+    - **machines**: Number of monitored machines
+    - **overdue**: Machines past their due time that are not yet dispatched
+    - **queue_depth**: Machines dispatched but waiting for a free worker
+    - **lag_seconds** / **max_lag_seconds**: Delay between due time and actual check start
+
+    Growing lag or queue depth means the scheduler is falling behind.
+    In cluster mode, **cluster** lists the live instances; **machines** counts
+    only this instance's shard. An API instance without embedded monitoring
+    (MONITOR_EMBEDDED=false) returns only **cluster**, listing the monitor workers.
+    **db_pool** shows connection pool usage per call site (connections held,
+    acquires and acquires slower than DB_ACQUIRE_WARN_SECONDS).
+    """
+    if monitor_service.monitor_manager is None and cluster_service.cluster is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Monitoring is not running",
+        )
+
+    stats = {}
+    if monitor_service.monitor_manager:
+        stats = monitor_service.monitor_manager.get_scheduler_stats()
+    if cluster_service.cluster:
+        stats["cluster"] = await cluster_service.cluster.stats()
+    db_pool = pool_stats()
+    if db_pool is not None:
+        stats["db_pool"] = db_pool
+    return stats
@@ -1,8 +1,10 @@
 """WebSocket API endpoint for real-time status updates."""
+import json
 import logging
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
 
+from ...services.subscriptions import ALL, Subscription
 from ...services.websocket_service import ws_manager
 
 logger = logging.getLogger(__name__)
@@ -11,35 +13,91 @@ router = APIRouter()
 
 
 @router.websocket("/ws/status")
-async def websocket_status_endpoint(websocket: WebSocket):
+async def websocket_status_endpoint(
+    websocket: WebSocket,
+    batch_ms: int | None = Query(None, description="Status batch window in milliseconds"),
+    since: int | None = Query(None, description="Last sequence number received (resume)"),
+    epoch: str | None = Query(None, description="Epoch of the 'since' sequence number"),
+):
     """
     WebSocket endpoint for real-time machine status updates.
 
     Clients connect to this endpoint to receive real-time notifications
     when machine status changes (active ⇔ unreachable).
 
+    Updates are coalesced into one status_batch frame per batch window. Only
+    machines whose status or liveness changed, or whose response time moved
+    past WS_RTT_DELTA_THRESHOLD_MS, are included. The window defaults to
+    WS_BATCH_WINDOW_MS and can be negotiated per client, either with the
+    ``batch_ms`` query parameter or by sending:
+    {"type": "configure", "batch_ms": 1000}
+    The server answers with {"type": "configured", "batch_ms": <effective window>}.
+
+    By default a client receives updates of every machine. To watch a subset,
+    send a filter (each field optional, a single value or a list):
+    {"type": "subscribe", "status": "unreachable", "machine_ids": [1, 2],
+     "cidr": "10.0.0.0/24", "hostname_prefix": "web-"}
+    Machine selectors (machine_ids, cidr, hostname_prefix) are OR'ed, the
+    status filter is AND'ed with them. The server answers with
+    {"type": "subscribed", "filter": {...}} followed by a snapshot of the
+    matching machines (or the missed updates, see below).
+    {"type": "unsubscribe"} restores the default.
+
+    Every status_batch carries the sequence number ("seq") of the newest
+    update sent so far, and the connection message and snapshots carry the
+    server "epoch". A reconnecting client passes the last values it received
+    as ``?since=<seq>&epoch=<epoch>`` (or as "since"/"epoch" fields of its
+    subscribe message) and gets one status_batch with the newest state of
+    every machine changed in between. If the gap is older than the replay
+    buffer (WS_REPLAY_BUFFER_SIZE updates) or the server restarted, it gets a
+    snapshot instead.
+
+    Slow clients whose send queue overflows are either dropped or switched to
+    snapshot resync, depending on WS_SLOW_CLIENT_POLICY. A resynced client
+    receives one {"type": "snapshot", "machines": [...]} message with the
+    latest status of every machine instead of the updates it missed.
+
     Message format:
     {
-        "type": "status_update",
-        "machine_id": 1,
-        "status": "unreachable",
-        "is_alive": false,
-        "response_time": null,
-        "last_seen": "2024-01-01T00:05:00Z"
+        "type": "status_batch",
+        "seq": 42,
+        "updates": [
+            {
+                "type": "status_update",
+                "machine_id": 1,
+                "status": "unreachable",
+                "is_alive": false,
+                "response_time": null,
+                "last_seen": "2024-01-01T00:05:00Z"
+            }
+        ]
     }
     """
     await ws_manager.connect(websocket)
 
     try:
-        # Send connection confirmation
-        await websocket.send_json({"type": "connection", "message": "Connected to status updates"})
+        # Send connection confirmation (all sends go through the client's send queue)
+        ws_manager.send(
+            websocket,
+            {
+                "type": "connection",
+                "message": "Connected to status updates",
+                "epoch": ws_manager.replay.epoch,
+                "seq": ws_manager.replay.seq,
+            },
+        )
+
+        if since is not None:
+            ws_manager.resume(websocket, since, epoch)
 
-        # Keep connection alive and listen for client messages
+        if batch_ms is not None:
+            effective = ws_manager.set_batch_window(websocket, batch_ms)
+            ws_manager.send(websocket, {"type": "configured", "batch_ms": effective})
+
+        # Keep connection alive and handle client control messages
         while True:
-            # Receive messages from client (if any)
             data = await websocket.receive_text()
-            # For now, we don't process client messages
-            # Status updates are server-initiated (broadcast from monitor_service)
+            _handle_client_message(websocket, data)
 
     except WebSocketDisconnect:
         ws_manager.disconnect(websocket)
@@ -47,3 +105,56 @@ async def websocket_status_endpoint(websocket: WebSocket):
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
         ws_manager.disconnect(websocket)
+
+
+def _handle_client_message(websocket: WebSocket, data: str) -> None:
+    """
+    Handle a control message sent by a client.
+
+    Args:
+        websocket: Client WebSocket connection
+        data: Raw message text
+    """
+    try:
+        message = json.loads(data)
+    except ValueError:
+        ws_manager.send(websocket, {"type": "error", "message": "Invalid JSON"})
+        return
+
+    if not isinstance(message, dict):
+        ws_manager.send(websocket, {"type": "error", "message": "Message must be an object"})
+        return
+
+    if message.get("type") == "configure":
+        batch_ms = message.get("batch_ms")
+        if not isinstance(batch_ms, int):
+            ws_manager.send(websocket, {"type": "error", "message": "batch_ms must be an integer"})
+            return
+
+        effective = ws_manager.set_batch_window(websocket, batch_ms)
+        ws_manager.send(websocket, {"type": "configured", "batch_ms": effective})
+
+    elif message.get("type") in ("subscribe", "unsubscribe"):
+        if message["type"] == "unsubscribe":
+            subscription = ALL
+        else:
+            try:
+                subscription = Subscription.from_message(message)
+            except ValueError as e:
+                ws_manager.send(websocket, {"type": "error", "message": str(e)})
+                return
+
+        since = message.get("since")
+        if since is not None and not isinstance(since, int):
+            ws_manager.send(websocket, {"type": "error", "message": "since must be an integer"})
+            return
+
+        ws_manager.subscribe(
+            websocket,
+            subscription,
+            since,
+            message.get("epoch"),
+            reply={"type": "subscribed", "filter": subscription.to_message()},
+        )
+
+    # Other messages (e.g. keepalive pings) are ignored
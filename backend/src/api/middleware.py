@@ -1,14 +1,13 @@
 """API middleware for CORS, rate limiting, and error handling."""
-import time
-from collections import defaultdict
-from typing import Callable
+import math
 
-from fastapi import HTTPException, Request, Response, status
+from fastapi import HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from ..config import settings
+from .rate_limit import MemoryRateLimitStore, PostgresRateLimitStore, create_store, route_budget
 
 
 def setup_cors(app) -> None:
@@ -19,44 +18,55 @@ def setup_cors(app) -> None:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["ETag"],
     )
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Rate limiting middleware (per-IP and global limits)."""
-
-    def __init__(self, app, requests_per_minute: int = 60):
-        super().__init__(app)
-        self.requests_per_minute = requests_per_minute
-        self.requests: dict[str, list[float]] = defaultdict(list)
-
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """Process request with rate limiting."""
-        client_ip = request.client.host if request.client else "unknown"
-        current_time = time.time()
-
-        # Clean old requests (older than 1 minute)
-        self.requests[client_ip] = [
-            req_time
-            for req_time in self.requests[client_ip]
-            if current_time - req_time < 60
-        ]
-
-        # Check rate limit
-        if len(self.requests[client_ip]) >= self.requests_per_minute:
-            return JSONResponse(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                content={
-                    "error": "RATE_LIMIT_EXCEEDED",
-                    "message": "Too many requests. Please try again later.",
-                },
-            )
-
-        # Record this request
-        self.requests[client_ip].append(current_time)
-
-        response = await call_next(request)
-        return response
+class RateLimitMiddleware:
+    """
+    Rate limiting middleware (per client IP and route budget).
+
+    A plain ASGI middleware: it only looks at the request line, so it adds
+    no per-request task or body wrapping and leaves streaming responses and
+    WebSockets untouched. Each check is constant time (GCRA).
+    """
+
+    def __init__(
+        self, app: ASGIApp, store: MemoryRateLimitStore | PostgresRateLimitStore | None = None
+    ):
+        """
+        Initialize middleware.
+
+        Args:
+            app: Wrapped ASGI application
+            store: Rate limit state (default: selected by RATE_LIMIT_BACKEND)
+        """
+        self.app = app
+        self.store = store or create_store()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Reject the request with 429 if its budget is exhausted."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        client_ip = scope["client"][0] if scope.get("client") else "unknown"
+        limit = route_budget(scope["method"], scope["path"])
+
+        retry_after = await self.store.check(f"{limit.name}:{client_ip}", limit)
+        if retry_after is None:
+            await self.app(scope, receive, send)
+            return
+
+        response = JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={
+                "error": "RATE_LIMIT_EXCEEDED",
+                "message": "Too many requests. Please try again later.",
+            },
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+        await response(scope, receive, send)
 
 
 async def http_exception_handler(request: Request, exc: HTTPException) -> JSONResponse:
@@ -0,0 +1,196 @@
+"""GCRA rate limiting with an in-process or shared (PostgreSQL) store."""
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from ..config import settings
+from ..db import get_pool
+
+logger = logging.getLogger(__name__)
+
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """
+    Request budget of one route class.
+
+    Allows bursts of up to ``requests_per_minute`` requests, refilled at one
+    request every ``60 / requests_per_minute`` seconds (GCRA, equivalent to
+    a token bucket of that size).
+    """
+
+    name: str
+    requests_per_minute: int
+
+    @property
+    def emission_interval(self) -> float:
+        """Seconds between requests at the sustained rate."""
+        return 60.0 / self.requests_per_minute
+
+    @property
+    def burst_window(self) -> float:
+        """How far ahead of now the theoretical arrival time may run, in seconds."""
+        return 60.0  # A full minute of requests may arrive back to back
+
+
+def route_budget(method: str, path: str) -> RateLimit:
+    """
+    Pick the budget of a request.
+
+    Registrations, bulk upserts and deletions share the write budget; all
+    other requests (listing, history, exports, docs) use the read budget.
+
+    Args:
+        method: HTTP method
+        path: Request path
+
+    Returns:
+        Budget to charge
+    """
+    if method in WRITE_METHODS and path.startswith("/api/"):
+        return WRITE_LIMIT
+    return READ_LIMIT
+
+
+class MemoryRateLimitStore:
+    """
+    Per-process GCRA state: one theoretical arrival time (TAT) per key.
+
+    A check is a dict lookup and an update. Keys are kept in least recently
+    used order; keys whose TAT has passed carry no state and are dropped as
+    they reach the front, and the least recently used keys are evicted
+    beyond ``max_keys``, so memory stays bounded however many clients show up.
+    """
+
+    def __init__(self, max_keys: int | None = None):
+        """
+        Initialize store.
+
+        Args:
+            max_keys: Maximum tracked keys (default: from settings)
+        """
+        self.max_keys = max_keys or settings.rate_limit_max_keys
+        self._tats: OrderedDict[str, float] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Number of tracked keys."""
+        return len(self._tats)
+
+    async def check(self, key: str, limit: RateLimit) -> float | None:
+        """Charge one request to a key (see ``check_at``)."""
+        return self.check_at(key, limit, time.monotonic())
+
+    def check_at(self, key: str, limit: RateLimit, now: float) -> float | None:
+        """
+        Charge one request to a key at a given time.
+
+        Args:
+            key: Client key
+            limit: Budget to charge
+            now: Monotonic time in seconds
+
+        Returns:
+            None if allowed, otherwise seconds until the next request is allowed
+        """
+        tat = max(self._tats.get(key, now), now)
+        new_tat = tat + limit.emission_interval
+        retry_after = new_tat - now - limit.burst_window
+        if retry_after > 0:
+            return retry_after
+
+        self._tats[key] = new_tat
+        self._tats.move_to_end(key)
+        self._evict(now)
+        return None
+
+    def _evict(self, now: float) -> None:
+        """Drop expired keys at the LRU end and keys beyond ``max_keys``."""
+        while self._tats:
+            key, tat = next(iter(self._tats.items()))
+            if tat > now and len(self._tats) <= self.max_keys:
+                break
+            del self._tats[key]
+
+
+class PostgresRateLimitStore:
+    """
+    GCRA state in the unlogged rate_limits table, shared by all API workers.
+
+    Each check is a single upsert that only advances the TAT if the request
+    is allowed, using the database clock so workers on different hosts
+    agree. Expired rows are purged every ``purge_interval`` seconds. If the
+    database is unavailable, checks fall back to a per-process store.
+    """
+
+    def __init__(self, purge_interval: float = 60.0):
+        """
+        Initialize store.
+
+        Args:
+            purge_interval: Seconds between deletions of expired rows
+        """
+        self.purge_interval = purge_interval
+        self.fallback = MemoryRateLimitStore()
+        self._next_purge = 0.0
+        self._degraded = False
+
+    async def check(self, key: str, limit: RateLimit) -> float | None:
+        """
+        Charge one request to a key.
+
+        Args:
+            key: Client key
+            limit: Budget to charge
+
+        Returns:
+            None if allowed, otherwise seconds until the next request is allowed
+            (the sustained interval; the exact wait is not queried)
+        """
+        try:
+            pool = await get_pool()
+            async with pool.acquire() as conn:
+                allowed = await conn.fetchval(
+                    """
+                    WITH clock AS (SELECT extract(epoch FROM clock_timestamp()) AS now)
+                    INSERT INTO rate_limits AS r (key, tat)
+                    SELECT $1, now + $2 FROM clock
+                    ON CONFLICT (key) DO UPDATE
+                    SET tat = GREATEST(r.tat, EXCLUDED.tat - $2) + $2
+                    WHERE GREATEST(r.tat, EXCLUDED.tat - $2) + $2 - (EXCLUDED.tat - $2) <= $3
+                    RETURNING true
+                    """,
+                    key,
+                    limit.emission_interval,
+                    limit.burst_window,
+                )
+
+                if time.monotonic() >= self._next_purge:
+                    self._next_purge = time.monotonic() + self.purge_interval
+                    await conn.execute(
+                        "DELETE FROM rate_limits WHERE tat < extract(epoch FROM clock_timestamp())"
+                    )
+        except Exception as e:
+            if not self._degraded:
+                logger.warning(f"Shared rate limit store unavailable, limiting per process: {e}")
+                self._degraded = True
+            return await self.fallback.check(key, limit)
+
+        if self._degraded:
+            logger.info("Shared rate limit store available again")
+            self._degraded = False
+
+        return None if allowed else limit.emission_interval
+
+
+def create_store() -> MemoryRateLimitStore | PostgresRateLimitStore:
+    """Create the store selected by RATE_LIMIT_BACKEND ('memory' or 'postgres')."""
+    if settings.rate_limit_backend == "postgres":
+        return PostgresRateLimitStore()
+    return MemoryRateLimitStore()
+
+
+READ_LIMIT = RateLimit("read", settings.rate_limit_read_per_minute)
+WRITE_LIMIT = RateLimit("write", settings.rate_limit_write_per_minute)
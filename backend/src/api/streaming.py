@@ -0,0 +1,105 @@
+"""Streaming NDJSON/CSV responses for exports."""
+import csv
+import io
+from collections.abc import AsyncIterator, Sequence
+from datetime import datetime
+
+import orjson
+from asyncpg import Record
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from ..services.export_service import ExportCursor
+from .caching import dumps_json
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _decode_json_columns(row: dict, json_columns: Sequence[str]) -> dict:
+    """Decode columns holding JSON text so they are embedded as JSON values."""
+    for column in json_columns:
+        if isinstance(row[column], str):
+            row[column] = orjson.loads(row[column])
+    return row
+
+
+async def _ndjson(
+    batches: AsyncIterator[list[Record]], json_columns: Sequence[str]
+) -> AsyncIterator[bytes]:
+    """Encode each row as one JSON line, one chunk per batch."""
+    async for rows in batches:
+        yield b"".join(
+            dumps_json(_decode_json_columns(dict(row), json_columns)) + b"\n" for row in rows
+        )
+
+
+def _csv_value(value) -> str:
+    """Format a value for CSV output."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, datetime):
+        return value.isoformat().replace("+00:00", "Z")
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value).decode()
+    return str(value)
+
+
+async def _csv(
+    batches: AsyncIterator[list[Record]], columns: Sequence[str]
+) -> AsyncIterator[bytes]:
+    """Encode rows as CSV with a header line, one chunk per batch."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(columns)
+    yield buffer.getvalue().encode()
+
+    async for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(row[column]) for column in columns] for row in rows)
+        yield buffer.getvalue().encode()
+
+
+def streaming_export(
+    export: ExportCursor,
+    export_format: str,
+    filename: str,
+    columns: Sequence[str],
+    json_columns: Sequence[str] = (),
+) -> StreamingResponse:
+    """
+    Stream an export cursor as NDJSON or CSV.
+
+    Each batch fetched from the cursor is encoded and sent before the next is
+    fetched, so a slow client applies backpressure all the way to the
+    database. The export is closed when the response ends, including when
+    the client disconnects.
+
+    Args:
+        export: Open export cursor
+        export_format: 'ndjson' or 'csv'
+        filename: Download file name without extension
+        columns: Columns in output order (CSV header)
+        json_columns: Columns holding JSON text
+
+    Returns:
+        Streaming response
+    """
+    batches = export.batches()
+    if export_format == "csv":
+        body = _csv(batches, columns)
+    else:
+        body = _ndjson(batches, json_columns)
+
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+        background=BackgroundTask(export.close),
+    )
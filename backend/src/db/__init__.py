@@ -1,4 +1,4 @@
 """Database package."""
-from .database import close_pool, get_pool
+from .database import close_pool, connect_dedicated, get_pool, pool_stats
 
-__all__ = ["get_pool", "close_pool"]
+__all__ = ["get_pool", "close_pool", "connect_dedicated", "pool_stats"]
@@ -0,0 +1,77 @@
+"""Hot SQL statements prepared once per pooled connection."""
+import logging
+
+import asyncpg
+from asyncpg.prepared_stmt import PreparedStatement
+
+logger = logging.getLogger(__name__)
+
+# Registered statements by name (see ``register_statement``)
+_statements: dict[str, str] = {}
+
+
+def register_statement(name: str, query: str) -> str:
+    """
+    Register a statement to prepare on every pooled connection.
+
+    Call at import time of the module that runs the statement.
+
+    Args:
+        name: Unique statement name
+        query: SQL text
+
+    Returns:
+        The name, to pass to ``PreparedConnection.prepared``
+    """
+    if _statements.get(name, query) != query:
+        raise ValueError(f"Statement {name} is already registered with another query")
+    _statements[name] = query
+    return name
+
+
+class PreparedConnection(asyncpg.Connection):
+    """
+    Connection holding the registered statements, prepared once.
+
+    asyncpg's own statement cache is an LRU keyed on the SQL text, which
+    ad-hoc queries (exports, history, filters) can evict. Statements held
+    here stay prepared for the connection's lifetime, so the hot queries of
+    the monitor and API are parsed and planned by the server only once per
+    connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._prepared: dict[str, PreparedStatement] = {}
+
+    async def prepared(self, name: str) -> PreparedStatement:
+        """
+        Get a registered statement, preparing it if it was registered after connecting.
+
+        Args:
+            name: Statement name
+
+        Returns:
+            Prepared statement
+        """
+        statement = self._prepared.get(name)
+        if statement is None:
+            statement = self._prepared[name] = await self.prepare(_statements[name])
+        return statement
+
+
+async def prepare_statements(conn: PreparedConnection) -> None:
+    """
+    Prepare all registered statements (pool ``init`` hook).
+
+    Statements that fail to prepare are logged and prepared again on first use.
+
+    Args:
+        conn: New pooled connection
+    """
+    for name in _statements:
+        try:
+            await conn.prepared(name)
+        except asyncpg.PostgresError as e:
+            # Prepared again on first use; a broken statement must not break the pool
+            logger.warning(f"Error preparing statement {name}: {e}")
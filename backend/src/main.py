@@ -2,7 +2,7 @@
 import logging
 
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from .api import (
     RateLimitMiddleware,
@@ -12,6 +12,7 @@ from .api import (
 )
 from .config import settings
 from .db import close_pool, get_pool
+from .runtime import render_metrics, start_services, stop_services
 
 # Configure logging
 logging.basicConfig(
@@ -31,8 +32,8 @@ app = FastAPI(
 # Setup CORS
 setup_cors(app)
 
-# Add rate limiting middleware
-app.add_middleware(RateLimitMiddleware, requests_per_minute=120)
+# Add rate limiting middleware (budgets and backend from settings)
+app.add_middleware(RateLimitMiddleware)
 
 # Add exception handlers
 app.add_exception_handler(HTTPException, http_exception_handler)
@@ -48,21 +49,12 @@ async def startup_event():
     pool = await get_pool()
     logger.info("Database connection pool initialized")
 
-    # Initialize machine monitoring manager
-    from .services import monitor_service
-
-    monitor_service.monitor_manager = monitor_service.MachineMonitorManager(pool)
-    logger.info("Machine monitor manager initialized")
-
-    # Load all machines from database and start monitoring
-    async with pool.acquire() as conn:
-        rows = await conn.fetch("SELECT id, ip_address FROM machines")
-        for row in rows:
-            await monitor_service.monitor_manager.start_monitoring(
-                row["id"], str(row["ip_address"])  # Convert IPv4Address to string
-            )
-
-    logger.info(f"Started monitoring {len(rows)} machines")
+    # Start status relaying, and monitoring unless a monitor worker does it
+    await start_services(
+        pool,
+        run_monitor=settings.monitor_embedded,
+        clustered=settings.cluster_mode or not settings.monitor_embedded,
+    )
     logger.info("Application startup complete")
 
 
@@ -71,12 +63,8 @@ async def shutdown_event():
     """Clean up resources on shutdown."""
     logger.info("Shutting down VXLAN Machine Manager API...")
 
-    # Stop all monitoring tasks
-    from .services import monitor_service
-
-    if monitor_service.monitor_manager:
-        await monitor_service.monitor_manager.shutdown()
-        logger.info("All monitoring tasks stopped")
+    # Stop monitoring and status relaying
+    await stop_services()
 
     # Close database connection pool
     await close_pool()
@@ -117,8 +105,20 @@ async def health_check():
         )
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """
+    Prometheus metrics endpoint.
+
+    Returns:
+        Metrics in the Prometheus text format
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 # Include API routers
-from .api.endpoints import machines, websocket
+from .api.endpoints import machines, monitor, websocket
 
 app.include_router(machines.router, prefix="/api", tags=["machines"])
+app.include_router(monitor.router, prefix="/api", tags=["monitor"])
 app.include_router(websocket.router, tags=["websocket"])
@@ -0,0 +1,342 @@
+"""
+Lightweight Prometheus metrics.
+
+Counters, histograms and gauges rendered in the Prometheus text exposition
+format (version 0.0.4). Metrics are only updated from the event loop, so
+updates are plain attribute increments without locks: a histogram
+observation is one bisect and three additions. Label values are resolved
+to a child once with ``labels()``; hot paths should keep the child.
+"""
+import functools
+import inspect
+import time
+from bisect import bisect_left
+from collections.abc import Callable
+from typing import Any
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value."""
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        """Initialize empty registry."""
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: "_Metric") -> None:
+        """Add a metric."""
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        """
+        Render all metrics.
+
+        Returns:
+            Metrics in the Prometheus text format
+        """
+        lines: list[str] = []
+        for metric in self._metrics:
+            metric.collect(lines)
+        return "\n".join(lines) + "\n"
+
+
+class _Metric:
+    """Base class of a metric family with optional labels."""
+
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        registry: Registry | None = None,
+    ):
+        """
+        Initialize metric and register it.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Label names (values are passed to ``labels()`` in this order)
+            registry: Registry to add the metric to (default: the global registry)
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], Any] = {}
+        if not labelnames:
+            self.labels()  # Exposed as zero until first updated
+        (registry or REGISTRY).register(self)
+
+    def labels(self, *values: str) -> Any:
+        """
+        Get the child of a label value combination, creating it on first use.
+
+        Args:
+            values: One value per label name
+
+        Returns:
+            Child metric to update
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self) -> Any:
+        """Create the child of one label value combination."""
+        raise NotImplementedError
+
+    def _label_pairs(self, values: tuple[str, ...]) -> list[str]:
+        """Format labels as name="value" pairs."""
+        return [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values)]
+
+    def collect(self, lines: list[str]) -> None:
+        """Append the metric's exposition lines."""
+        lines.append(f"# HELP {self.name} {self.documentation}")
+        lines.append(f"# TYPE {self.name} {self.type}")
+        for values, child in self._children.items():
+            self._collect_child(lines, self._label_pairs(values), child)
+
+    def _collect_child(self, lines: list[str], labels: list[str], child: Any) -> None:
+        """Append the sample lines of one child."""
+        raise NotImplementedError
+
+
+class _CounterChild:
+    """Counter value of one label combination."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        """Increase the counter."""
+        self.value += amount
+
+
+class Counter(_Metric):
+    """Monotonically increasing count (name it with a _total suffix)."""
+
+    type = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        """Increase the counter (metrics without labels)."""
+        self.labels().inc(amount)
+
+    def _collect_child(self, lines: list[str], labels: list[str], child: _CounterChild) -> None:
+        label_str = "{" + ",".join(labels) + "}" if labels else ""
+        lines.append(f"{self.name}{label_str} {_format_value(child.value)}")
+
+
+class _GaugeChild:
+    """Gauge value of one label combination."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value: float) -> None:
+        """Set the gauge."""
+        self.value = value
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, usually set right before rendering."""
+
+    type = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        """Set the gauge (metrics without labels)."""
+        self.labels().set(value)
+
+    def _collect_child(self, lines: list[str], labels: list[str], child: _GaugeChild) -> None:
+        label_str = "{" + ",".join(labels) + "}" if labels else ""
+        lines.append(f"{self.name}{label_str} {_format_value(child.value)}")
+
+
+class _HistogramChild:
+    """Bucket counts of one label combination (not cumulative until rendered)."""
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed buckets."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        registry: Registry | None = None,
+    ):
+        """
+        Initialize histogram and register it.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Label names
+            buckets: Upper bounds of the buckets, ascending (+Inf is implied)
+            registry: Registry to add the metric to (default: the global registry)
+        """
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Record one observation (metrics without labels)."""
+        self.labels().observe(value)
+
+    def _collect_child(self, lines: list[str], labels: list[str], child: _HistogramChild) -> None:
+        cumulative = 0
+        for bound, count in zip((*self.buckets, float("inf")), child.counts):
+            cumulative += count
+            label_str = ",".join([*labels, f'le="{_format_value(bound)}"'])
+            lines.append(f"{self.name}_bucket{{{label_str}}} {cumulative}")
+
+        label_str = "{" + ",".join(labels) + "}" if labels else ""
+        lines.append(f"{self.name}_sum{label_str} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{label_str} {cumulative}")
+
+
+def timed_methods(histogram: Histogram) -> Callable[[type], type]:
+    """
+    Class decorator recording the duration of every public coroutine method.
+
+    Each method is observed under the label ``<Class>.<method>``.
+
+    Args:
+        histogram: Histogram with a single label
+
+    Returns:
+        Class decorator
+    """
+
+    def decorate(cls: type) -> type:
+        for name, method in list(vars(cls).items()):
+            if name.startswith("_") or not inspect.iscoroutinefunction(method):
+                continue
+            setattr(cls, name, _timed(method, histogram.labels(f"{cls.__name__}.{name}")))
+        return cls
+
+    return decorate
+
+
+def _timed(method: Callable, child: _HistogramChild) -> Callable:
+    """Wrap a coroutine method to observe its duration."""
+
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            child.observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+# Global registry (rendered by /metrics)
+REGISTRY = Registry()
+
+# Monitor hot path
+PING_RTT_SECONDS = Histogram(
+    "vxlan_ping_rtt_seconds",
+    "Round-trip time of answered pings.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+PINGS = Counter("vxlan_pings_total", "Pings sent, by result (alive or timeout).", ("result",))
+PING_SWEEP_SECONDS = Histogram(
+    "vxlan_ping_sweep_seconds",
+    "Duration of one multi-host ping sweep, including the reply timeout.",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 30.0),
+)
+SCHEDULE_LAG_SECONDS = Histogram(
+    "vxlan_schedule_lag_seconds",
+    "Delay between the time a check was due and the time it started.",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+SCHEDULER_QUEUE_DEPTH = Gauge(
+    "vxlan_scheduler_queue_depth", "Machines dispatched but waiting for a worker."
+)
+SCHEDULER_OVERDUE = Gauge(
+    "vxlan_scheduler_overdue", "Machines past their due time that are not yet dispatched."
+)
+MONITORED_MACHINES = Gauge("vxlan_monitored_machines", "Machines monitored by this process.")
+WRITE_BEHIND_PENDING = Gauge(
+    "vxlan_write_behind_pending", "Results buffered for the next database flush.", ("buffer",)
+)
+
+# Database
+DB_CALL_SECONDS = Histogram(
+    "vxlan_db_call_seconds", "Duration of service database calls.", ("method",)
+)
+DB_POOL_ACQUIRE_SECONDS = Histogram(
+    "vxlan_db_pool_acquire_seconds",
+    "Wait for a pooled database connection, by call site.",
+    ("site",),
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+DB_POOL_HOLD_SECONDS = Histogram(
+    "vxlan_db_pool_hold_seconds",
+    "Time a pooled database connection was held, by call site.",
+    ("site",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+DB_POOL_IN_USE = Gauge(
+    "vxlan_db_pool_in_use", "Pooled database connections currently held, by call site.", ("site",)
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "vxlan_db_pool_connections", "Pooled database connections, by state.", ("state",)
+)
+
+# WebSocket
+WS_BROADCAST_SECONDS = Histogram(
+    "vxlan_ws_broadcast_seconds",
+    "Duration of fanning out one status batch to WebSocket client queues.",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0),
+)
+WS_CLIENTS = Gauge("vxlan_ws_clients", "Connected WebSocket clients.")
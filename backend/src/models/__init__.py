@@ -1,7 +1,20 @@
 """Pydantic models package."""
 from .failure_log import FailureLogCreate, FailureLogInDB
-from .machine import MachineCreate, MachineInDB, MachineResponse, MachineUpdate
-from .ping_status import PingStatusCreate, PingStatusInDB
+from .machine import (
+    MachineCreate,
+    MachineInDB,
+    MachineListResponse,
+    MachineResponse,
+    MachineUpdate,
+)
+from .ping_status import (
+    HistoryResponse,
+    MachineHistory,
+    MachineUptime,
+    PingStatusCreate,
+    PingStatusInDB,
+    UptimeResponse,
+)
 from .websocket import WebSocketStatusUpdate
 
 __all__ = [
@@ -9,8 +22,13 @@ __all__ = [
     "MachineUpdate",
     "MachineInDB",
     "MachineResponse",
+    "MachineListResponse",
     "PingStatusCreate",
     "PingStatusInDB",
+    "MachineHistory",
+    "HistoryResponse",
+    "MachineUptime",
+    "UptimeResponse",
     "FailureLogCreate",
     "FailureLogInDB",
     "WebSocketStatusUpdate",
@@ -83,3 +83,13 @@ class MachineResponse(MachineInDB):
 
     is_alive: bool | None = None
     response_time: float | None = None
+
+
+class MachineListResponse(BaseModel):
+    """Machine list response (documents the schema; rows are serialized directly)."""
+
+    machines: list[MachineResponse]
+    total: int
+    limit: int
+    offset: int
+    next_cursor: str | None = None
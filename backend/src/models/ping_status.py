@@ -11,7 +11,7 @@ class PingStatusCreate(BaseModel):
     is_alive: bool
     response_time: float | None = Field(None, ge=0)
     consecutive_failures: int = Field(0, ge=0)
-    next_check_interval: int = Field(60, ge=60, le=3600)
+    next_check_interval: int = Field(60, ge=1)
 
 
 class PingStatusInDB(PingStatusCreate):
@@ -24,3 +24,40 @@ class PingStatusInDB(PingStatusCreate):
         """Pydantic config."""
 
         from_attributes = True
+
+
+class MachineHistory(BaseModel):
+    """Bucketed ping history of one machine (lists aligned with ``buckets``)."""
+
+    machine_id: int
+    buckets: list[datetime]
+    probe_count: list[int]
+    uptime_pct: list[float | None]
+    rtt_avg: list[float | None]
+    rtt_min: list[float | None]
+    rtt_max: list[float | None]
+
+
+class HistoryResponse(BaseModel):
+    """Ping history response (documents the schema; rows are serialized directly)."""
+
+    start: datetime = Field(..., serialization_alias="from")
+    end: datetime = Field(..., serialization_alias="to")
+    resolution: str
+    interval: int
+    machines: list[MachineHistory]
+
+
+class MachineUptime(BaseModel):
+    """Uptime of one machine by window label."""
+
+    machine_id: int
+    uptime_pct: dict[str, float | None]
+    probe_count: dict[str, int]
+
+
+class UptimeResponse(BaseModel):
+    """Uptime response (documents the schema; rows are serialized directly)."""
+
+    windows: list[str]
+    machines: list[MachineUptime]
@@ -0,0 +1,84 @@
+"""
+Standalone monitor worker.
+
+Runs the ping scheduler, write-behind buffers and partition maintenance in
+their own process, so sweeps and their database writes do not share an
+event loop with API requests and API deploys do not restart monitoring.
+Machine registrations and deletions arrive from the API over LISTEN/NOTIFY,
+and status changes are published back for the API to relay to WebSocket
+clients. Run API instances with MONITOR_EMBEDDED=false.
+
+Several workers can run at once; they shard the machines between them.
+Prometheus metrics are served on MONITOR_METRICS_PORT.
+
+Usage:
+    python -m src.monitor
+"""
+import asyncio
+import logging
+import signal
+
+from .config import settings
+from .db import close_pool, get_pool
+from .runtime import render_metrics, start_services, stop_services
+
+logging.basicConfig(
+    level=getattr(logging, settings.log_level.upper()),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def _serve_metrics(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Answer one HTTP request with the metrics (any path)."""
+    try:
+        await reader.readuntil(b"\r\n\r\n")
+        body = render_metrics().encode()
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/plain; version=0.0.4\r\n"
+            b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+            b"Connection: close\r\n\r\n" + body
+        )
+        await writer.drain()
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def run() -> None:
+    """Monitor machines until SIGINT or SIGTERM."""
+    logger.info("Starting VXLAN Machine Manager monitor worker...")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    metrics_server = None
+    if settings.monitor_metrics_port:
+        metrics_server = await asyncio.start_server(
+            _serve_metrics, "0.0.0.0", settings.monitor_metrics_port
+        )
+        logger.info(f"Serving metrics on port {settings.monitor_metrics_port}")
+
+    pool = await get_pool()
+    try:
+        await start_services(pool, run_monitor=True, clustered=True)
+        logger.info("Monitor worker started")
+
+        await stop.wait()
+        logger.info("Shutting down monitor worker...")
+    finally:
+        if metrics_server is not None:
+            metrics_server.close()
+        await stop_services()
+        await close_pool()
+
+    logger.info("Monitor worker stopped")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,129 @@
+"""Startup and shutdown of the background services of the API and the monitor worker."""
+import logging
+
+from asyncpg import Pool
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+async def start_services(pool: Pool, run_monitor: bool, clustered: bool) -> None:
+    """
+    Start background services and load all machines.
+
+    Args:
+        pool: Database connection pool
+        run_monitor: Whether this process pings machines (and runs maintenance);
+            otherwise status comes from monitor workers over LISTEN/NOTIFY
+        clustered: Whether to share machine and status events with other
+            processes (cluster mode or a separate monitor worker)
+    """
+    # Start WebSocket status batching
+    from .services.broadcast_aggregator import broadcast_aggregator
+
+    broadcast_aggregator.start()
+
+    # Share events with other instances when there is more than one process
+    from .services import cluster_service, monitor_service
+
+    if clustered:
+        cluster_service.cluster = cluster_service.Cluster(pool, monitoring=run_monitor)
+
+    # Initialize machine monitoring manager
+    if run_monitor:
+        monitor_service.monitor_manager = monitor_service.MachineMonitorManager(
+            pool, owns=cluster_service.cluster.owns if cluster_service.cluster else None
+        )
+        monitor_service.monitor_manager.start()
+        logger.info("Machine monitor manager initialized")
+
+    # Join the other instances before loading machines, so only this shard is monitored
+    if cluster_service.cluster:
+        await cluster_service.cluster.start()
+
+    # Start ping_status partition maintenance (partitions, rollups, retention)
+    if run_monitor:
+        from .services import maintenance_service
+
+        maintenance_service.partition_maintenance = maintenance_service.PartitionMaintenance(pool)
+        maintenance_service.partition_maintenance.start()
+        logger.info("Partition maintenance started")
+
+    # Load all machines from database and start monitoring (first checks spread out)
+    from .services.websocket_service import ws_manager
+
+    if monitor_service.monitor_manager:
+        rows = await monitor_service.monitor_manager.bootstrap()
+    else:
+        async with pool.acquire() as conn:
+            rows = await conn.fetch("SELECT id, ip_address, hostname FROM machines")
+
+    for row in rows:
+        ws_manager.register_machine(row["id"], row["ip_address"], row["hostname"])
+
+
+async def stop_services() -> None:
+    """Stop background services, writing out buffered results."""
+    # Stop partition maintenance
+    from .services import maintenance_service
+
+    if maintenance_service.partition_maintenance:
+        await maintenance_service.partition_maintenance.stop()
+        maintenance_service.partition_maintenance = None
+
+    # Stop all monitoring tasks
+    from .services import monitor_service
+
+    if monitor_service.monitor_manager:
+        await monitor_service.monitor_manager.shutdown()
+        monitor_service.monitor_manager = None
+        logger.info("All monitoring tasks stopped")
+
+    # Send remaining status updates (to clients and, in cluster mode, other instances)
+    from .services.broadcast_aggregator import broadcast_aggregator
+
+    await broadcast_aggregator.stop()
+
+    # Leave the cluster so other instances take over this shard
+    from .services import cluster_service
+
+    if cluster_service.cluster:
+        await cluster_service.cluster.stop()
+        cluster_service.cluster = None
+
+
+def render_metrics() -> str:
+    """
+    Render Prometheus metrics, refreshing gauges from the running services.
+
+    Gauges are read here rather than updated on every change, so they cost
+    nothing outside of scrapes.
+
+    Returns:
+        Metrics in the Prometheus text format
+    """
+    from .db import pool_stats
+    from .services import monitor_service
+    from .services.websocket_service import ws_manager
+
+    manager = monitor_service.monitor_manager
+    if manager is not None:
+        stats = manager.scheduler.stats()
+        metrics.SCHEDULER_QUEUE_DEPTH.set(stats["queue_depth"])
+        metrics.SCHEDULER_OVERDUE.set(stats["overdue"])
+        metrics.MONITORED_MACHINES.set(len(manager.monitor_states))
+        metrics.WRITE_BEHIND_PENDING.labels("ping_status").set(manager.ping_status_writer.pending)
+        metrics.WRITE_BEHIND_PENDING.labels("machine_state").set(
+            manager.machine_state_writer.pending
+        )
+
+    pool = pool_stats()
+    if pool is not None:
+        metrics.DB_POOL_CONNECTIONS.labels("idle").set(pool["idle"])
+        metrics.DB_POOL_CONNECTIONS.labels("busy").set(pool["size"] - pool["idle"])
+        for site, usage in pool["sites"].items():
+            metrics.DB_POOL_IN_USE.labels(site).set(usage["in_use"])
+
+    metrics.WS_CLIENTS.set(len(ws_manager.clients))
+    return metrics.REGISTRY.render()
@@ -1,5 +1,5 @@
 """Services package."""
 from .backoff import calculate_backoff
-from .ping_utils import ping_host
+from .ping_utils import ping_host, ping_many
 
-__all__ = ["ping_host", "calculate_backoff"]
+__all__ = ["ping_host", "ping_many", "calculate_backoff"]
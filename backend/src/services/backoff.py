@@ -1,6 +1,23 @@
-"""Exponential backoff calculation for ping monitoring."""
+"""Failure detection and exponential backoff for ping monitoring."""
+import dataclasses
+import ipaddress
+import random
+from dataclasses import dataclass
+
 from ..config import settings
 
+# Cap on the backoff exponent (the interval is capped long before)
+MAX_BACKOFF_EXPONENT = 32
+
+# Shortest backoff interval a jitter strategy may produce, in seconds
+MIN_BACKOFF_INTERVAL = 1.0
+
+# Ways to randomize backoff intervals (see DetectionPolicy.next_interval)
+JITTER_STRATEGIES = ("uniform", "full", "equal", "decorrelated")
+
+# DetectionPolicy fields that are integers (DETECTION_POLICIES values are parsed as floats)
+INTEGER_FIELDS = ("failure_threshold",)
+
 
 def calculate_backoff(failure_count: int) -> int:
     """
@@ -26,3 +43,224 @@ def calculate_backoff(failure_count: int) -> int:
 
     interval = settings.min_check_interval * (2 ** (failure_count - 1))
     return min(interval, settings.max_check_interval)
+
+
+def probe_offset(machine_id: int, spread: float) -> float:
+    """
+    Deterministic delay of a machine's first check within a window.
+
+    Spreads first checks evenly so that starting many monitors at once does
+    not ping every machine in the same second. Uses Fibonacci hashing:
+    consecutive IDs land far apart, and any range of IDs covers the window
+    evenly. A machine gets the same offset on every restart.
+
+    Args:
+        machine_id: Machine ID
+        spread: Window length in seconds
+
+    Returns:
+        Delay in seconds, in [0, spread)
+    """
+    return ((machine_id * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) / 2**64 * spread
+
+
+@dataclass(frozen=True)
+class DetectionPolicy:
+    """
+    How failed checks of a machine are confirmed and backed off.
+
+    After a failed check, confirmation probes follow ``confirm_interval``
+    seconds apart until ``failure_threshold`` consecutive checks failed, so
+    a dead host is declared unreachable within seconds rather than minutes.
+    From then on checks back off exponentially from ``check_interval`` up to
+    ``max_interval``, randomized by ``jitter_strategy`` so hosts that failed
+    together drift apart instead of re-probing in the same second for hours.
+    Hosts that answer are checked every ``check_interval`` seconds, so
+    confirmation adds no steady-state load.
+
+    Jitter strategies, for an exponential interval ``d``:
+
+    - ``uniform``: ``d`` * (1 +/- ``jitter``); keeps the schedule, only de-phases
+    - ``full``: anywhere in [0, ``d``]; spreads best, retries sooner on average
+    - ``equal``: ``d`` / 2 plus up to ``d`` / 2
+    - ``decorrelated``: between ``check_interval`` and 3x the previous interval,
+      independent of the failure count
+
+    Backoff intervals never exceed ``max_interval`` nor drop below
+    ``MIN_BACKOFF_INTERVAL``. Invalid bounds raise ``ValueError``.
+
+    With ``confirm_interval`` 0 there is no burst: failures back off right
+    away, as ``calculate_backoff`` does.
+    """
+
+    failure_threshold: int
+    confirm_interval: float
+    check_interval: float
+    max_interval: float
+    jitter: float = 0.0
+    jitter_strategy: str = "uniform"
+
+    def __post_init__(self):
+        if self.jitter_strategy not in JITTER_STRATEGIES:
+            raise ValueError(
+                f"Unknown jitter strategy {self.jitter_strategy!r} "
+                f"(expected one of {', '.join(JITTER_STRATEGIES)})"
+            )
+        if self.failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        if self.confirm_interval < 0:
+            raise ValueError("confirm_interval must not be negative (0: no confirmation)")
+        if self.check_interval <= 0:
+            raise ValueError("check_interval must be positive")
+        if self.max_interval < self.check_interval:
+            raise ValueError("max_interval must not be below check_interval")
+        if not 0 <= self.jitter < 1:
+            raise ValueError("jitter must be in [0, 1)")
+
+    @classmethod
+    def from_settings(cls) -> "DetectionPolicy":
+        """Create the default policy from settings."""
+        return cls(
+            failure_threshold=settings.failure_threshold,
+            confirm_interval=settings.detection_confirm_interval,
+            check_interval=settings.min_check_interval,
+            max_interval=settings.max_check_interval,
+            jitter=settings.backoff_jitter,
+            jitter_strategy=settings.backoff_jitter_strategy,
+        )
+
+    def is_down(self, failures: int) -> bool:
+        """
+        Check whether a machine with this many consecutive failures is unreachable.
+
+        Args:
+            failures: Number of consecutive failures
+
+        Returns:
+            True once the failure threshold is reached
+        """
+        return failures >= self.failure_threshold
+
+    def next_interval(self, failures: int, previous: float = 0) -> float:
+        """
+        Calculate the delay until the next check.
+
+        Args:
+            failures: Number of consecutive failures after the last check
+            previous: Previous interval (used by the decorrelated strategy)
+
+        Returns:
+            Seconds until the next check
+        """
+        if failures == 0:
+            return self.check_interval
+
+        if self.confirm_interval > 0:
+            if failures < self.failure_threshold:
+                return self.confirm_interval
+            exponent = failures - self.failure_threshold
+        else:
+            exponent = failures - 1
+
+        if self.jitter_strategy == "decorrelated":
+            upper = max(previous, self.check_interval) * 3
+            interval = random.uniform(self.check_interval, upper)
+        else:
+            interval = min(
+                self.check_interval * 2 ** min(exponent, MAX_BACKOFF_EXPONENT), self.max_interval
+            )
+            if self.jitter_strategy == "full":
+                interval = random.uniform(0, interval)
+            elif self.jitter_strategy == "equal":
+                interval = interval / 2 + random.uniform(0, interval / 2)
+            elif self.jitter:
+                interval *= random.uniform(1 - self.jitter, 1 + self.jitter)
+
+        return max(min(interval, self.max_interval), MIN_BACKOFF_INTERVAL)
+
+
+def _as_integer(name: str, value: float | str) -> int:
+    """Convert a whole number read from settings to int."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+    return int(value)
+
+
+class DetectionPolicies:
+    """
+    Detection policies by subnet; the most specific matching subnet wins.
+
+    A /32 (or /128) subnet sets the policy of a single machine.
+    """
+
+    def __init__(
+        self,
+        default: DetectionPolicy,
+        by_network: dict[str, DetectionPolicy] | None = None,
+    ):
+        """
+        Initialize policy table.
+
+        Args:
+            default: Policy of machines outside all subnets
+            by_network: Policies by CIDR
+
+        Raises:
+            ValueError: If a CIDR is invalid
+        """
+        self.default = default
+        self._networks = []
+        for cidr, policy in (by_network or {}).items():
+            try:
+                network = ipaddress.ip_network(cidr, strict=False)
+            except ValueError as e:
+                raise ValueError(f"Invalid detection policy for {cidr}: {e}") from e
+            self._networks.append((network, policy))
+        self._networks.sort(key=lambda entry: entry[0].prefixlen, reverse=True)
+
+    @classmethod
+    def from_settings(cls) -> "DetectionPolicies":
+        """
+        Create the policy table from settings.
+
+        DETECTION_POLICIES maps CIDRs to the fields that differ from the
+        default policy, e.g. ``{"10.1.0.0/16": {"confirm_interval": 0.5}}``.
+
+        Raises:
+            ValueError: If a CIDR, field name or value is invalid
+        """
+        default = DetectionPolicy.from_settings()
+        by_network = {}
+        for cidr, overrides in settings.detection_policies.items():
+            try:
+                fields = dict(overrides)
+                for name in INTEGER_FIELDS:
+                    if name in fields:
+                        fields[name] = _as_integer(name, fields[name])
+                by_network[cidr] = dataclasses.replace(default, **fields)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Invalid detection policy for {cidr}: {e}") from e
+        return cls(default, by_network)
+
+    def resolve(self, ip_address: str) -> DetectionPolicy:
+        """
+        Get the policy of a machine.
+
+        Args:
+            ip_address: Machine IP address
+
+        Returns:
+            Policy of the most specific subnet containing the address, else the default
+        """
+        if self._networks:
+            address = ipaddress.ip_address(str(ip_address))
+            for network, policy in self._networks:
+                if address.version == network.version and address in network:
+                    return policy
+        return self.default
+
+
+# Policy of machines without a configured policy
+DEFAULT_POLICY = DetectionPolicy.from_settings()
@@ -0,0 +1,140 @@
+"""Coalesces per-ping status updates into periodic delta batches for WebSocket clients."""
+import asyncio
+import logging
+from collections.abc import Callable
+from typing import Any
+
+from ..config import settings
+from .websocket_service import ws_manager
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastAggregator:
+    """
+    Collects status updates and broadcasts them as one status_batch frame per window.
+
+    Only the newest update per machine is kept within a window, and an update
+    is sent only if it differs from what clients last received for that
+    machine: status or liveness changed, or the response time moved by at
+    least ``rtt_threshold`` ms.
+
+    In cluster mode, updates from this instance's monitors are also passed
+    to ``publisher`` after delta filtering, and updates received from other
+    instances are submitted with ``local=False`` so they are relayed to
+    clients but not published again.
+    """
+
+    def __init__(self, window: float | None = None, rtt_threshold: float | None = None):
+        """
+        Initialize aggregator.
+
+        Args:
+            window: Seconds between batches (default: from settings)
+            rtt_threshold: Minimum RTT change in ms worth sending (default: from settings)
+        """
+        self.window = window or settings.ws_batch_window_ms / 1000
+        self.rtt_threshold = (
+            rtt_threshold if rtt_threshold is not None else settings.ws_rtt_delta_threshold_ms
+        )
+        self._pending: dict[int, tuple[dict[str, Any], bool]] = {}
+        self.publisher: Callable[[list[dict[str, Any]]], None] | None = None
+        self._last_sent: dict[int, tuple[str, bool, float | None]] = {}
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start the periodic flush task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stop the flush task after sending what is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        self.flush()
+
+    def submit(self, update: dict[str, Any], local: bool = True) -> None:
+        """
+        Queue a status update for the next batch.
+
+        Args:
+            update: Status update with machine_id, status, is_alive,
+                response_time and last_seen
+            local: Whether the update comes from this instance's monitors
+        """
+        self._pending[update["machine_id"]] = (update, local)
+
+    def forget(self, machine_id: int) -> None:
+        """
+        Drop all state of a machine (e.g. after deletion).
+
+        Args:
+            machine_id: Machine ID
+        """
+        self._pending.pop(machine_id, None)
+        self._last_sent.pop(machine_id, None)
+
+    def flush(self) -> None:
+        """Broadcast the deltas collected since the previous flush."""
+        pending, self._pending = self._pending, {}
+        deltas = [
+            (update, local) for update, local in pending.values() if self._is_delta(update)
+        ]
+        updates = [update for update, _ in deltas]
+
+        # Lets status-filtered clients see machines leaving their status
+        previous_statuses = {}
+        for update in updates:
+            machine_id = update["machine_id"]
+            last = self._last_sent.get(machine_id)
+            if last is not None and last[0] != update["status"]:
+                previous_statuses[machine_id] = last[0]
+
+            self._last_sent[machine_id] = (
+                update["status"],
+                update["is_alive"],
+                update["response_time"],
+            )
+
+        # Called even without updates so clients with longer windows get flushed
+        ws_manager.broadcast_batch(updates, previous_statuses)
+
+        if self.publisher is not None:
+            local_updates = [update for update, local in deltas if local]
+            if local_updates:
+                self.publisher(local_updates)
+
+    def _is_delta(self, update: dict[str, Any]) -> bool:
+        """Check whether an update differs enough from what was last sent."""
+        last = self._last_sent.get(update["machine_id"])
+        if last is None:
+            return True
+
+        status, is_alive, response_time = last
+        if update["status"] != status or update["is_alive"] != is_alive:
+            return True
+
+        new_response_time = update["response_time"]
+        if response_time is None or new_response_time is None:
+            return response_time != new_response_time
+
+        return abs(new_response_time - response_time) >= self.rtt_threshold
+
+    async def _flush_loop(self) -> None:
+        """Flush every ``window`` seconds."""
+        while True:
+            await asyncio.sleep(self.window)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error broadcasting status batch: {e}")
+
+
+# Global broadcast aggregator instance (started in main.py)
+broadcast_aggregator = BroadcastAggregator()
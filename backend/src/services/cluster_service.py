@@ -0,0 +1,452 @@
+"""Multi-instance mode: monitor sharding and cross-instance event fan-out."""
+import asyncio
+import hashlib
+import logging
+import os
+import secrets
+import socket
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from typing import Any
+
+from asyncpg import Pool
+
+from ..config import settings
+from .broadcast_aggregator import broadcast_aggregator
+from .event_bus import EventBus
+from .state_version import state_version
+from .status_cache import status_cache
+from .websocket_service import ws_manager
+
+logger = logging.getLogger(__name__)
+
+# LISTEN/NOTIFY channels
+STATUS_CHANNEL = "vxlan_status"
+MACHINES_CHANNEL = "vxlan_machines"
+MEMBERSHIP_CHANNEL = "vxlan_membership"
+
+
+def _score(instance_id: str, machine_id: int) -> int:
+    """Rendezvous hash weight of an instance for a machine."""
+    digest = hashlib.blake2b(f"{instance_id}/{machine_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def shard_owner(members: list[str], machine_id: int) -> str:
+    """
+    Pick the instance that monitors a machine (rendezvous hashing).
+
+    When an instance joins or leaves, only the machines it gains or loses
+    change owner.
+
+    Args:
+        members: Live instance IDs (non-empty)
+        machine_id: Machine ID
+
+    Returns:
+        Owning instance ID
+    """
+    return max(members, key=lambda instance_id: _score(instance_id, machine_id))
+
+
+class ClusterMembership:
+    """
+    Live instances, tracked with leases in the monitor_instances table.
+
+    Every ``heartbeat_interval`` seconds an instance renews its lease,
+    deletes leases not renewed within ``lease_ttl`` and reads the live
+    members. ``on_change`` is awaited whenever the member list changes.
+    """
+
+    def __init__(
+        self,
+        db_pool: Pool,
+        instance_id: str,
+        on_change: Callable[[list[str]], Awaitable[None]],
+        heartbeat_interval: float | None = None,
+        lease_ttl: float | None = None,
+    ):
+        """
+        Initialize membership.
+
+        Args:
+            db_pool: Database connection pool
+            instance_id: ID of this instance
+            on_change: Coroutine function called with the new member list
+            heartbeat_interval: Seconds between lease renewals (default: from settings)
+            lease_ttl: Seconds after which a lease expires (default: from settings)
+        """
+        self.db_pool = db_pool
+        self.instance_id = instance_id
+        self.on_change = on_change
+        self.heartbeat_interval = heartbeat_interval or settings.cluster_heartbeat_interval
+        self.lease_ttl = lease_ttl or settings.cluster_lease_ttl
+        self.members: list[str] = [instance_id]
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Join (so ownership is known before monitoring starts) and keep the lease alive."""
+        await self.heartbeat()
+        if self._task is None:
+            self._task = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self) -> None:
+        """Stop renewing and give up the lease so other instances take over at once."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        async with self.db_pool.acquire() as conn:
+            await conn.execute(
+                "DELETE FROM monitor_instances WHERE instance_id = $1", self.instance_id
+            )
+
+    async def heartbeat(self) -> None:
+        """Renew the lease, expire stale ones and refresh the member list."""
+        async with self.db_pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                WITH renewed AS (
+                    INSERT INTO monitor_instances (instance_id, heartbeat_at)
+                    VALUES ($1, clock_timestamp())
+                    ON CONFLICT (instance_id) DO UPDATE SET heartbeat_at = EXCLUDED.heartbeat_at
+                ),
+                expired AS (
+                    DELETE FROM monitor_instances
+                    WHERE heartbeat_at < clock_timestamp() - make_interval(secs => $2)
+                )
+                SELECT instance_id
+                FROM monitor_instances
+                WHERE heartbeat_at >= clock_timestamp() - make_interval(secs => $2)
+                """,
+                self.instance_id,
+                self.lease_ttl,
+            )
+
+        # The statement does not see its own insert
+        members = sorted({row["instance_id"] for row in rows} | {self.instance_id})
+        if members != self.members:
+            logger.info(f"Cluster members changed: {self.members} -> {members}")
+            self.members = members
+            await self.on_change(members)
+
+    async def live_members(self) -> list[str]:
+        """Read the live members without joining (for instances that do not monitor)."""
+        async with self.db_pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT instance_id
+                FROM monitor_instances
+                WHERE heartbeat_at >= clock_timestamp() - make_interval(secs => $1)
+                """,
+                self.lease_ttl,
+            )
+        return sorted(row["instance_id"] for row in rows)
+
+    def owns(self, machine_id: int) -> bool:
+        """Check whether this instance monitors a machine."""
+        return shard_owner(self.members, machine_id) == self.instance_id
+
+    async def _heartbeat_loop(self) -> None:
+        """Heartbeat every ``heartbeat_interval`` seconds."""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                logger.error(f"Error renewing cluster lease: {e}")
+
+
+class Cluster:
+    """
+    Coordinates instances of the application sharing one database.
+
+    - Monitoring is sharded: each monitoring instance pings only the
+      machines it owns by rendezvous hashing over the live members, and
+      rebalances when an instance joins or leaves.
+    - Status deltas of each instance's batches are published over
+      LISTEN/NOTIFY; every other instance applies them to its status cache
+      and relays them to its WebSocket clients.
+    - Machine registrations and deletions are published, so every instance
+      knows all machines (for sharding and WebSocket filters).
+    - Flushes of the latest ping results are published, so every instance
+      bumps its state version and cached API responses pick up new response
+      times and last_seen (with a separate monitor worker, the API process
+      flushes nothing itself).
+
+    API instances that leave monitoring to ``python -m src.monitor`` join
+    with ``monitoring=False``: they relay events but own no machines.
+    """
+
+    def __init__(self, db_pool: Pool, instance_id: str | None = None, monitoring: bool = True):
+        """
+        Initialize cluster coordination.
+
+        Args:
+            db_pool: Database connection pool
+            instance_id: ID of this instance (default: from settings, else generated)
+            monitoring: Whether this instance monitors machines (joins the shard members)
+        """
+        self.db_pool = db_pool
+        self.instance_id = (
+            instance_id
+            or settings.cluster_instance_id
+            or f"{socket.gethostname()}-{os.getpid()}-{secrets.token_hex(3)}"
+        )
+        self.monitoring = monitoring
+        self.membership = ClusterMembership(db_pool, self.instance_id, self._rebalance)
+        self.bus = EventBus(db_pool, self.instance_id, on_reconnect=self.resync)
+        self.bus.subscribe(STATUS_CHANNEL, self._on_status)
+        self.bus.subscribe(MACHINES_CHANNEL, self._on_machines)
+        self.bus.subscribe(MEMBERSHIP_CHANNEL, self._on_membership)
+        self._tasks: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        """Join the cluster and load the status of machines owned by other instances."""
+        await self.bus.start()
+        if self.monitoring:
+            await self.membership.start()
+        await self._seed_status_cache()
+
+        if self.monitoring:
+            broadcast_aggregator.publisher = self.publish_status
+            self._set_flush_publisher(self.publish_latest_ping_flushed)
+            self.bus.publish(MEMBERSHIP_CHANNEL, {"event": "join"})
+            logger.info(
+                f"Joined cluster as {self.instance_id} ({len(self.membership.members)} members)"
+            )
+        else:
+            logger.info(f"Joined cluster as {self.instance_id} (relaying only)")
+
+    async def stop(self) -> None:
+        """Leave the cluster."""
+        if self.monitoring:
+            broadcast_aggregator.publisher = None
+            self._set_flush_publisher(None)
+            await self.membership.stop()
+            self.bus.publish(MEMBERSHIP_CHANNEL, {"event": "leave"})
+        await self.bus.stop()
+
+        for task in list(self._tasks):
+            task.cancel()
+
+    def owns(self, machine_id: int) -> bool:
+        """Check whether this instance monitors a machine."""
+        return self.monitoring and self.membership.owns(machine_id)
+
+    async def stats(self) -> dict:
+        """
+        Get cluster membership metrics.
+
+        Instances that do not monitor hold no lease, so they read the live
+        members from the lease table.
+        """
+        if self.monitoring:
+            members = self.membership.members
+        else:
+            members = await self.membership.live_members()
+        return {
+            "instance_id": self.instance_id,
+            "monitoring": self.monitoring,
+            "members": members,
+        }
+
+    def publish_status(self, updates: list[dict[str, Any]]) -> None:
+        """
+        Publish status deltas of this instance's monitors.
+
+        Args:
+            updates: Status updates as sent to WebSocket clients
+        """
+        self.bus.publish_items(STATUS_CHANNEL, "updates", updates)
+
+    def publish_machines(self, machines: list[tuple[int, str, str]]) -> None:
+        """
+        Publish registered or updated machines.
+
+        Args:
+            machines: (machine_id, ip_address, hostname) tuples
+        """
+        self.bus.publish_items(MACHINES_CHANNEL, "machines", machines, {"event": "upsert"})
+
+    def publish_latest_ping_flushed(self) -> None:
+        """Publish that this instance wrote the latest ping results of its machines."""
+        self.bus.publish(MACHINES_CHANNEL, {"event": "latest_ping"})
+
+    def publish_machine_deleted(self, machine_id: int) -> None:
+        """
+        Publish a machine deletion.
+
+        Args:
+            machine_id: Machine ID
+        """
+        self.bus.publish(MACHINES_CHANNEL, {"event": "delete", "machine_id": machine_id})
+
+    async def resync(self) -> None:
+        """Reload machines and their status after events may have been missed."""
+        async with self.db_pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT id, host(ip_address) AS ip_address, hostname FROM machines"
+            )
+
+        existing = {row["id"] for row in rows}
+        for machine_id in ws_manager.index.machine_ids():
+            if machine_id not in existing:
+                await _remove_machine(machine_id)
+
+        await _add_machines([(row["id"], row["ip_address"], row["hostname"]) for row in rows])
+
+        await self._seed_status_cache()
+        state_version.bump()
+
+    async def _seed_status_cache(self) -> None:
+        """Load the latest stored ping of machines this instance does not monitor."""
+        async with self.db_pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT id, status, last_ping_alive, last_ping_response_time, last_ping_at, last_seen
+                FROM machines
+                WHERE last_ping_at IS NOT NULL
+                """
+            )
+
+        for row in rows:
+            if self.owns(row["id"]):
+                continue
+            entry = status_cache.get(row["id"])
+            if entry is not None and entry.checked_at >= row["last_ping_at"]:
+                continue
+
+            status_cache.update(
+                row["id"],
+                row["status"],
+                row["last_ping_alive"],
+                row["last_ping_response_time"],
+                row["last_ping_at"],
+                last_seen=row["last_seen"],
+            )
+
+    async def _rebalance(self, members: list[str]) -> None:
+        """Start and stop monitors after the member list changed."""
+        from . import monitor_service
+
+        if monitor_service.monitor_manager is not None:
+            await monitor_service.monitor_manager.rebalance()
+
+    def _on_status(self, event: dict[str, Any]) -> None:
+        """Apply status deltas published by another instance."""
+        changed = False
+        for update in event["updates"]:
+            previous = status_cache.get(update["machine_id"])
+            status_cache.update(
+                update["machine_id"],
+                update["status"],
+                update["is_alive"],
+                update["response_time"],
+                datetime.fromisoformat(update["last_seen"]),
+            )
+            if (
+                previous is None
+                or previous.status != update["status"]
+                or previous.is_alive != update["is_alive"]
+            ):
+                changed = True
+
+            broadcast_aggregator.submit(update, local=False)
+
+        if changed:
+            state_version.bump()
+
+    def _on_machines(self, event: dict[str, Any]) -> None:
+        """
+        Apply machine registrations and deletions made through another instance.
+
+        Every event, including the latest ping flushes of other instances,
+        makes cached API responses stale.
+        """
+        if event["event"] == "upsert":
+            self._spawn(_add_machines(event["machines"]))
+        elif event["event"] == "delete":
+            self._spawn(_remove_machine(event["machine_id"]))
+
+        state_version.bump()
+
+    def _on_membership(self, event: dict[str, Any]) -> None:
+        """Refresh members right away when an instance joins or leaves."""
+        if self.monitoring:
+            self._spawn(self.membership.heartbeat())
+
+    def _set_flush_publisher(self, publisher: Callable[[], None] | None) -> None:
+        """Announce (or stop announcing) latest ping flushes of the local monitor."""
+        from . import monitor_service
+
+        if monitor_service.monitor_manager is not None:
+            monitor_service.monitor_manager.machine_state_writer.on_flush = publisher
+
+    def _spawn(self, coro: Awaitable[None]) -> None:
+        """Run an event handler coroutine in the background, keeping a reference."""
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+async def _add_machines(machines: list[tuple[int, str, str]]) -> None:
+    """Add machines to the WebSocket filter directory and the local monitor (if owned)."""
+    from . import monitor_service
+
+    for machine_id, ip_address, hostname in machines:
+        ws_manager.register_machine(machine_id, ip_address, hostname)
+
+    if monitor_service.monitor_manager is not None:
+        await monitor_service.monitor_manager.start_monitoring_many(
+            [(machine_id, ip_address) for machine_id, ip_address, _ in machines]
+        )
+
+
+async def _remove_machine(machine_id: int) -> None:
+    """Drop all in-process state of a deleted machine."""
+    from . import monitor_service
+
+    if monitor_service.monitor_manager is not None:
+        await monitor_service.monitor_manager.stop_monitoring(machine_id)
+    ws_manager.unregister_machine(machine_id)
+    status_cache.remove(machine_id)
+    broadcast_aggregator.forget(machine_id)
+
+
+async def machines_changed(machines: list[tuple[int, str, str]]) -> None:
+    """
+    Apply registered or updated machines here and announce them to other instances.
+
+    Keeps WebSocket CIDR/hostname filters current (the hostname may have
+    changed) and lets whichever process monitors a machine start on it:
+    the local monitor directly, monitor workers and other instances over
+    LISTEN/NOTIFY.
+
+    Args:
+        machines: (machine_id, ip_address, hostname) tuples
+    """
+    await _add_machines(machines)
+    if cluster is not None:
+        cluster.publish_machines(machines)
+
+
+async def machine_deleted(machine_id: int) -> None:
+    """
+    Drop a deleted machine here and announce the deletion to other instances.
+
+    Args:
+        machine_id: Machine ID
+    """
+    await _remove_machine(machine_id)
+    if cluster is not None:
+        cluster.publish_machine_deleted(machine_id)
+
+
+# Global cluster instance (initialized by start_services in CLUSTER_MODE or with an
+# external monitor worker)
+cluster: Cluster | None = None
@@ -0,0 +1,209 @@
+"""Cross-instance events over PostgreSQL LISTEN/NOTIFY."""
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import orjson
+from asyncpg import Connection, Pool
+
+from ..db import connect_dedicated
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY payloads must stay below 8000 bytes
+MAX_PAYLOAD_BYTES = 7500
+
+# Delay before reconnecting the listener after the connection was lost
+RECONNECT_DELAY = 2.0
+
+Handler = Callable[[dict[str, Any]], None]
+
+
+class EventBus:
+    """
+    Publishes and receives JSON events shared by all instances.
+
+    Events are sent with pg_notify through the pool, in order, by a single
+    sender task, so publishing never blocks the caller. A dedicated
+    connection LISTENs on the subscribed channels; every event carries the
+    ID of the instance that sent it, and instances ignore their own events
+    (they apply them locally before publishing). Notifications sent while
+    the listener is disconnected are lost, so ``on_reconnect`` is awaited
+    after every reconnection to let subscribers reload their state.
+    """
+
+    def __init__(
+        self,
+        db_pool: Pool,
+        instance_id: str,
+        on_reconnect: Callable[[], Awaitable[None]] | None = None,
+    ):
+        """
+        Initialize event bus.
+
+        Args:
+            db_pool: Database connection pool (used for publishing)
+            instance_id: ID of this instance
+            on_reconnect: Coroutine function called after the listener reconnected
+        """
+        self.db_pool = db_pool
+        self.instance_id = instance_id
+        self.on_reconnect = on_reconnect
+        self._handlers: dict[str, Handler] = {}
+        self._outbox: asyncio.Queue[tuple[str, dict[str, Any]]] = asyncio.Queue()
+        self._listener: Connection | None = None
+        self._disconnected = asyncio.Event()
+        self._listen_task: asyncio.Task | None = None
+        self._send_task: asyncio.Task | None = None
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        """
+        Handle events of a channel (call before ``start``).
+
+        Args:
+            channel: Channel name
+            handler: Called with each event sent by another instance
+        """
+        self._handlers[channel] = handler
+
+    async def start(self) -> None:
+        """Connect the listener and start the sender task."""
+        if self._listen_task is not None:
+            return
+
+        await self._connect()
+        self._listen_task = asyncio.create_task(self._listen_loop())
+        self._send_task = asyncio.create_task(self._send_loop())
+
+    async def stop(self) -> None:
+        """Send pending events, then stop listening."""
+        if self._send_task is not None:
+            await self._drain()
+            self._send_task.cancel()
+            try:
+                await self._send_task
+            except asyncio.CancelledError:
+                pass
+            self._send_task = None
+
+        if self._listen_task is not None:
+            self._listen_task.cancel()
+            try:
+                await self._listen_task
+            except asyncio.CancelledError:
+                pass
+            self._listen_task = None
+
+        if self._listener is not None:
+            self._listener.terminate()
+            self._listener = None
+
+    def publish(self, channel: str, event: dict[str, Any]) -> None:
+        """
+        Queue an event for all other instances.
+
+        Args:
+            channel: Channel name
+            event: JSON-serializable event (must stay below MAX_PAYLOAD_BYTES)
+        """
+        self._outbox.put_nowait((channel, {**event, "origin": self.instance_id}))
+
+    def publish_items(
+        self, channel: str, key: str, items: list[Any], event: dict[str, Any] | None = None
+    ) -> None:
+        """
+        Publish a list split across as many events as NOTIFY's size limit needs.
+
+        Args:
+            channel: Channel name
+            key: Event field holding the items
+            items: JSON-serializable items
+            event: Other event fields, repeated in every event
+        """
+        base = len(orjson.dumps({**(event or {}), key: [], "origin": self.instance_id}))
+        chunk: list[Any] = []
+        size = base
+        for item in items:
+            item_size = len(orjson.dumps(item)) + 1
+            if chunk and size + item_size > MAX_PAYLOAD_BYTES:
+                self.publish(channel, {**(event or {}), key: chunk})
+                chunk, size = [], base
+            chunk.append(item)
+            size += item_size
+
+        if chunk:
+            self.publish(channel, {**(event or {}), key: chunk})
+
+    async def _connect(self) -> None:
+        """Open the listener connection and LISTEN on all subscribed channels."""
+        self._disconnected.clear()
+        self._listener = await connect_dedicated()
+        self._listener.add_termination_listener(lambda conn: self._disconnected.set())
+        for channel in self._handlers:
+            await self._listener.add_listener(channel, self._dispatch)
+
+    async def _listen_loop(self) -> None:
+        """Reconnect the listener whenever its connection is lost."""
+        while True:
+            await self._disconnected.wait()
+            logger.warning("Event bus listener disconnected, reconnecting")
+
+            while True:
+                await asyncio.sleep(RECONNECT_DELAY)
+                try:
+                    await self._connect()
+                    break
+                except Exception as e:
+                    logger.error(f"Error reconnecting event bus listener: {e}")
+
+            logger.info("Event bus listener reconnected")
+            if self.on_reconnect is not None:
+                try:
+                    await self.on_reconnect()
+                except Exception as e:
+                    logger.error(f"Error resynchronizing after reconnect: {e}")
+
+    def _dispatch(self, connection: Connection, pid: int, channel: str, payload: str) -> None:
+        """Decode a notification and pass it to the channel's handler."""
+        try:
+            event = orjson.loads(payload)
+            if event.get("origin") == self.instance_id:
+                return
+            self._handlers[channel](event)
+        except Exception as e:
+            logger.error(f"Error handling event on {channel}: {e}")
+
+    async def _send_loop(self) -> None:
+        """Send queued events, everything queued so far in one round trip."""
+        while True:
+            events = [await self._outbox.get()]
+            while not self._outbox.empty():
+                events.append(self._outbox.get_nowait())
+
+            try:
+                await self._send(events)
+            except Exception as e:
+                logger.error(f"Error publishing {len(events)} events: {e}")
+            finally:
+                for _ in events:
+                    self._outbox.task_done()
+
+    async def _send(self, events: list[tuple[str, dict[str, Any]]]) -> None:
+        """Send events in order with one statement."""
+        channels = [channel for channel, _ in events]
+        payloads = [orjson.dumps(event).decode() for _, event in events]
+        async with self.db_pool.acquire() as conn:
+            await conn.execute(
+                """
+                SELECT pg_notify(e.channel, e.payload)
+                FROM unnest($1::text[], $2::text[]) WITH ORDINALITY AS e(channel, payload, n)
+                ORDER BY e.n
+                """,
+                channels,
+                payloads,
+            )
+
+    async def _drain(self) -> None:
+        """Wait until queued events were sent (or failed)."""
+        await self._outbox.join()
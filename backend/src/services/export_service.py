@@ -0,0 +1,195 @@
+"""Streaming exports over server-side cursors."""
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Any
+
+from asyncpg import Connection, Record
+from asyncpg.transaction import Transaction
+
+from ..config import settings
+from ..db import connect_dedicated
+
+logger = logging.getLogger(__name__)
+
+# Limits how many dedicated export connections are open at once
+_export_slots = asyncio.Semaphore(settings.export_max_concurrent)
+
+
+class ExportBusyError(RuntimeError):
+    """Raised when the maximum number of concurrent exports is running."""
+
+
+class ExportCursor:
+    """
+    Server-side cursor over a dedicated connection.
+
+    Rows are fetched ``batch_size`` at a time, and the next batch only when
+    the consumer asks for it, so memory stays constant and a slow client
+    slows the cursor down instead of buffering rows. The connection is not
+    taken from the pool and is closed as soon as the export ends.
+    """
+
+    def __init__(self, conn: Connection, transaction: Transaction, query: str, args: tuple):
+        """
+        Initialize cursor (use ``open_export``).
+
+        Args:
+            conn: Dedicated connection
+            transaction: Open read-only transaction on ``conn``
+            query: SELECT query to stream
+            args: Query arguments
+        """
+        self._conn = conn
+        self._transaction = transaction
+        self._query = query
+        self._args = args
+        self._closed = False
+
+    async def batches(self, batch_size: int | None = None) -> AsyncIterator[list[Record]]:
+        """
+        Yield query results in batches, closing the cursor afterwards.
+
+        Args:
+            batch_size: Rows per batch (default: from settings)
+        """
+        batch_size = batch_size or settings.export_batch_size
+        try:
+            cursor = await self._conn.cursor(self._query, *self._args)
+            while True:
+                rows = await cursor.fetch(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        """End the transaction, close the connection and free the export slot."""
+        if self._closed:
+            return
+
+        self._closed = True
+        try:
+            await self._transaction.rollback()  # Read-only, nothing to commit
+            await self._conn.close()
+        except Exception as e:
+            logger.warning(f"Error closing export connection: {e}")
+            self._conn.terminate()
+        finally:
+            _export_slots.release()
+
+
+async def open_export(query: str, *args: Any) -> ExportCursor:
+    """
+    Open a streaming export of a query.
+
+    Args:
+        query: SELECT query to stream
+        *args: Query arguments
+
+    Returns:
+        Export cursor; iterate ``batches()`` (or call ``close()``) to release it
+
+    Raises:
+        ExportBusyError: If the maximum number of concurrent exports is running
+    """
+    if _export_slots.locked():
+        raise ExportBusyError(
+            f"Too many exports in progress (max {settings.export_max_concurrent})"
+        )
+
+    await _export_slots.acquire()
+    try:
+        conn = await connect_dedicated()
+    except BaseException:
+        _export_slots.release()
+        raise
+
+    try:
+        transaction = conn.transaction(readonly=True)
+        await transaction.start()
+    except BaseException:
+        _export_slots.release()
+        conn.terminate()
+        raise
+
+    return ExportCursor(conn, transaction, query, args)
+
+
+# Columns of the machine export, in output order
+MACHINE_EXPORT_COLUMNS = (
+    "id",
+    "hostname",
+    "ip_address",
+    "mac_address",
+    "status",
+    "last_seen",
+    "registered_at",
+    "updated_at",
+    "last_ping_alive",
+    "last_ping_response_time",
+    "last_ping_at",
+    "extra_data",
+)
+
+# Columns of the ping history export, in output order
+PING_EXPORT_COLUMNS = (
+    "machine_id",
+    "checked_at",
+    "is_alive",
+    "response_time",
+    "consecutive_failures",
+    "next_check_interval",
+)
+
+
+async def open_machines_export(status: str | None = None) -> ExportCursor:
+    """
+    Open a streaming export of all machines ordered by ID.
+
+    Args:
+        status: Filter by status ('active' or 'unreachable'), None for all
+
+    Returns:
+        Export cursor yielding rows with MACHINE_EXPORT_COLUMNS (extra_data as JSON text)
+    """
+    return await open_export(
+        """
+        SELECT id, hostname, host(ip_address) AS ip_address, mac_address::text AS mac_address,
+               status, last_seen, registered_at, updated_at,
+               last_ping_alive, last_ping_response_time, last_ping_at,
+               extra_data
+        FROM machines
+        WHERE $1::text IS NULL OR status = $1
+        ORDER BY id
+        """,
+        status,
+    )
+
+
+async def open_pings_export(machine_id: int, start: datetime, end: datetime) -> ExportCursor:
+    """
+    Open a streaming export of a machine's ping history.
+
+    Args:
+        machine_id: Machine ID
+        start: Start of the time range (inclusive)
+        end: End of the time range (exclusive)
+
+    Returns:
+        Export cursor yielding rows with PING_EXPORT_COLUMNS, oldest first
+    """
+    return await open_export(
+        """
+        SELECT machine_id, checked_at, is_alive, response_time,
+               consecutive_failures, next_check_interval
+        FROM ping_status
+        WHERE machine_id = $1 AND checked_at >= $2 AND checked_at < $3
+        ORDER BY checked_at
+        """,
+        machine_id,
+        start,
+        end,
+    )
@@ -0,0 +1,224 @@
+"""Ping history and uptime queries over the precomputed aggregates."""
+import re
+from datetime import UTC, datetime, timedelta
+
+from asyncpg import Pool
+
+from ..config import settings
+
+# Series resolutions in seconds, finest first
+RESOLUTIONS = {"5m": 300, "1h": 3600, "1d": 86400}
+
+# Uptime windows reported when the client does not ask for specific ones
+DEFAULT_UPTIME_WINDOWS = ("24h", "7d", "30d")
+
+MAX_UPTIME_WINDOWS = 6
+MAX_UPTIME_WINDOW = timedelta(days=365)
+
+WINDOW_PATTERN = re.compile(r"^(\d+)([hd])$")
+
+# Per-bucket columns shared by all resolutions; {source} and {bucket} are
+# filled in from SERIES_SOURCES only
+SERIES_QUERY = """
+    SELECT
+        machine_id,
+        {bucket} AS bucket,
+        SUM(probe_count)::int AS probe_count,
+        round(100.0 * SUM(alive_count) / NULLIF(SUM(probe_count), 0), 2)::float8 AS uptime_pct,
+        (SUM(rtt_sum) / NULLIF(SUM(rtt_count), 0))::float8 AS rtt_avg,
+        MIN(rtt_min)::float8 AS rtt_min,
+        MAX(rtt_max)::float8 AS rtt_max
+    FROM {source}
+    WHERE bucket >= $1 AND bucket < $2
+      AND ($3::int[] IS NULL OR machine_id = ANY($3))
+    GROUP BY 1, 2
+    ORDER BY 1, 2
+"""
+
+SERIES_SOURCES = {
+    "5m": ("ping_status_5min", "bucket"),
+    "1h": ("ping_status_hourly", "bucket"),
+    "1d": (
+        "ping_status_hourly",
+        "date_trunc('day', bucket AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'",
+    ),
+}
+
+SERIES_FIELDS = ("probe_count", "uptime_pct", "rtt_avg", "rtt_min", "rtt_max")
+
+
+def parse_window(window: str) -> timedelta:
+    """
+    Parse an uptime window such as '24h' or '7d'.
+
+    Raises:
+        ValueError: If the window is malformed or out of range
+    """
+    match = WINDOW_PATTERN.match(window)
+    if match is None:
+        raise ValueError(f"Invalid window: {window} (use e.g. '24h' or '7d')")
+
+    amount, unit = int(match.group(1)), match.group(2)
+    length = timedelta(hours=amount) if unit == "h" else timedelta(days=amount)
+    if not timedelta(hours=1) <= length <= MAX_UPTIME_WINDOW:
+        raise ValueError(f"Window must be between 1h and {MAX_UPTIME_WINDOW.days}d: {window}")
+    return length
+
+
+def floor_time(value: datetime, seconds: int) -> datetime:
+    """Round a timestamp down to a multiple of ``seconds`` since the epoch (UTC)."""
+    timestamp = int(value.timestamp()) // seconds * seconds
+    return datetime.fromtimestamp(timestamp, tz=UTC)
+
+
+def select_resolution(start: datetime, end: datetime, now: datetime | None = None) -> str:
+    """
+    Pick the finest resolution that keeps a series within the point budget.
+
+    5-minute buckets are only used while the range lies within their
+    retention period.
+
+    Args:
+        start: Start of the range
+        end: End of the range
+        now: Current time (default: now)
+
+    Returns:
+        Key of RESOLUTIONS
+    """
+    now = now or datetime.now(UTC)
+    five_minute_horizon = now - timedelta(days=settings.ping_status_5min_retention_days)
+    span = (end - start).total_seconds()
+
+    for resolution, seconds in RESOLUTIONS.items():
+        if resolution == "5m" and start < five_minute_horizon:
+            continue
+        if span / seconds <= settings.history_max_points:
+            return resolution
+    return "1d"
+
+
+class HistoryService:
+    """Service for ping history and uptime queries."""
+
+    def __init__(self, db_pool: Pool):
+        """Initialize service with database pool."""
+        self.db_pool = db_pool
+
+    async def get_series(
+        self,
+        machine_ids: list[int] | None,
+        start: datetime,
+        end: datetime,
+        resolution: str,
+    ) -> list[dict]:
+        """
+        Get bucketed ping history of many machines in one query.
+
+        Each machine's series is columnar (one list per field, aligned with
+        ``buckets``) so large multi-machine responses stay compact. Buckets
+        without probes are omitted.
+
+        Args:
+            machine_ids: Machines to include (None: all machines with data)
+            start: Start of the range (rounded down to the resolution)
+            end: End of the range (exclusive)
+            resolution: Key of RESOLUTIONS
+
+        Returns:
+            One series dict per machine, ordered by machine ID
+        """
+        source, bucket = SERIES_SOURCES[resolution]
+        start = floor_time(start, RESOLUTIONS[resolution])
+
+        async with self.db_pool.acquire() as conn:
+            rows = await conn.fetch(
+                SERIES_QUERY.format(source=source, bucket=bucket), start, end, machine_ids
+            )
+
+        series: dict[int, dict] = {
+            machine_id: self._empty_series(machine_id) for machine_id in machine_ids or ()
+        }
+        for row in rows:
+            machine_series = series.get(row["machine_id"])
+            if machine_series is None:
+                machine_series = series[row["machine_id"]] = self._empty_series(row["machine_id"])
+
+            machine_series["buckets"].append(row["bucket"])
+            for field in SERIES_FIELDS:
+                machine_series[field].append(row[field])
+
+        return [series[machine_id] for machine_id in sorted(series)]
+
+    async def get_uptime(
+        self,
+        machine_ids: list[int] | None,
+        windows: dict[str, timedelta],
+        now: datetime | None = None,
+    ) -> list[dict]:
+        """
+        Get uptime percentages of many machines over several windows.
+
+        Computed from the hourly aggregates, so windows start at the
+        beginning of the hour they fall into.
+
+        Args:
+            machine_ids: Machines to include (None: all machines with data)
+            windows: Window lengths by label (e.g. {'24h': timedelta(hours=24)})
+            now: End of the windows (default: now)
+
+        Returns:
+            Per machine, uptime percentage and probe count by window label
+            (uptime is None for windows without probes), ordered by machine ID
+        """
+        now = now or datetime.now(UTC)
+        labels = list(windows)
+        since = [floor_time(now - windows[label], 3600) for label in labels]
+
+        async with self.db_pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT
+                    h.machine_id,
+                    w.idx,
+                    SUM(h.probe_count)::int AS probe_count,
+                    round(100.0 * SUM(h.alive_count) / NULLIF(SUM(h.probe_count), 0), 2)::float8
+                        AS uptime_pct
+                FROM unnest($1::timestamptz[]) WITH ORDINALITY AS w(since, idx)
+                JOIN ping_status_hourly h ON h.bucket >= w.since
+                WHERE ($2::int[] IS NULL OR h.machine_id = ANY($2))
+                GROUP BY 1, 2
+                """,
+                since,
+                machine_ids,
+            )
+
+        uptime: dict[int, dict] = {
+            machine_id: self._empty_uptime(machine_id, labels) for machine_id in machine_ids or ()
+        }
+        for row in rows:
+            machine_uptime = uptime.get(row["machine_id"])
+            if machine_uptime is None:
+                machine_uptime = uptime[row["machine_id"]] = self._empty_uptime(
+                    row["machine_id"], labels
+                )
+
+            label = labels[row["idx"] - 1]
+            machine_uptime["uptime_pct"][label] = row["uptime_pct"]
+            machine_uptime["probe_count"][label] = row["probe_count"]
+
+        return [uptime[machine_id] for machine_id in sorted(uptime)]
+
+    @staticmethod
+    def _empty_series(machine_id: int) -> dict:
+        """Create a series without buckets."""
+        return {"machine_id": machine_id, "buckets": [], **{field: [] for field in SERIES_FIELDS}}
+
+    @staticmethod
+    def _empty_uptime(machine_id: int, labels: list[str]) -> dict:
+        """Create an uptime entry without probes."""
+        return {
+            "machine_id": machine_id,
+            "uptime_pct": {label: None for label in labels},
+            "probe_count": {label: 0 for label in labels},
+        }
@@ -0,0 +1,292 @@
+"""Batched multi-host ICMP echo engine sharing one socket per address family."""
+import asyncio
+import ipaddress
+import logging
+import os
+import socket
+import struct
+from collections.abc import Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+ICMPV6_ECHO_REQUEST = 128
+ICMPV6_ECHO_REPLY = 129
+
+# Payload carried by every echo request
+PAYLOAD = b"vxlan-manager-ping"
+
+# Packets sent before yielding to the event loop so replies can be drained
+SEND_CHUNK_SIZE = 256
+
+SocketFactory = Callable[[int, bool], socket.socket]
+
+
+def icmp_checksum(data: bytes) -> int:
+    """
+    Compute the Internet checksum (RFC 1071) of an ICMP packet.
+
+    Args:
+        data: Packet bytes with the checksum field set to zero
+
+    Returns:
+        16-bit checksum
+    """
+    if len(data) % 2:
+        data += b"\x00"
+
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def build_echo_request(family: int, identifier: int, sequence: int) -> bytes:
+    """
+    Build an ICMP/ICMPv6 echo request packet.
+
+    The ICMPv6 checksum is left at zero, the kernel fills it in.
+
+    Args:
+        family: socket.AF_INET or socket.AF_INET6
+        identifier: Echo identifier
+        sequence: Echo sequence number
+
+    Returns:
+        Packet bytes
+    """
+    if family == socket.AF_INET6:
+        return struct.pack("!BBHHH", ICMPV6_ECHO_REQUEST, 0, 0, identifier, sequence) + PAYLOAD
+
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, identifier, sequence)
+    checksum = icmp_checksum(header + PAYLOAD)
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, checksum, identifier, sequence) + PAYLOAD
+
+
+def parse_echo_reply(family: int, data: bytes, privileged: bool) -> tuple[int, int] | None:
+    """
+    Parse an echo reply received on an ICMP socket.
+
+    IPv4 raw sockets deliver the IP header in front of the ICMP message;
+    datagram sockets and ICMPv6 sockets deliver the ICMP message only.
+
+    Args:
+        family: socket.AF_INET or socket.AF_INET6
+        data: Received bytes
+        privileged: True for raw sockets, False for datagram sockets
+
+    Returns:
+        Tuple of (identifier, sequence), None if not an echo reply
+    """
+    if family == socket.AF_INET and privileged:
+        if not data:
+            return None
+        data = data[(data[0] & 0x0F) * 4 :]
+
+    if len(data) < 8:
+        return None
+
+    icmp_type, code, _, identifier, sequence = struct.unpack("!BBHHH", data[:8])
+    expected = ICMPV6_ECHO_REPLY if family == socket.AF_INET6 else ICMP_ECHO_REPLY
+    if icmp_type != expected or code != 0:
+        return None
+
+    return identifier, sequence
+
+
+def default_socket_factory(family: int, privileged: bool) -> socket.socket:
+    """
+    Open a non-blocking ICMP socket.
+
+    Privileged mode uses a raw socket (requires CAP_NET_RAW); otherwise an
+    unprivileged datagram ICMP socket is used (net.ipv4.ping_group_range).
+
+    Args:
+        family: socket.AF_INET or socket.AF_INET6
+        privileged: Use a raw socket
+
+    Returns:
+        Open socket
+    """
+    proto = socket.IPPROTO_ICMPV6 if family == socket.AF_INET6 else socket.IPPROTO_ICMP
+    sock_type = socket.SOCK_RAW if privileged else socket.SOCK_DGRAM
+    sock = socket.socket(family, sock_type, proto)
+    sock.setblocking(False)
+    return sock
+
+
+class ICMPEngine:
+    """
+    Sends echo requests to many hosts over one shared socket per address family.
+
+    Requests are keyed by (address, sequence) so replies can be matched back to
+    the awaiting sweep. With raw sockets the identifier is also checked to
+    ignore echo traffic of other processes; datagram sockets have the
+    identifier rewritten by the kernel and only deliver our own replies.
+
+    Sockets are opened lazily and reused across sweeps until ``close()``.
+    """
+
+    def __init__(
+        self,
+        privileged: bool = True,
+        socket_factory: SocketFactory | None = None,
+    ):
+        """
+        Initialize engine.
+
+        Args:
+            privileged: Use raw sockets (requires CAP_NET_RAW)
+            socket_factory: Callable(family, privileged) returning a non-blocking
+                socket; used to inject fake sockets in benchmarks
+        """
+        self.privileged = privileged
+        self._socket_factory = socket_factory or default_socket_factory
+        self._sockets: dict[int, socket.socket] = {}
+        self._identifier = (os.getpid() ^ id(self)) & 0xFFFF
+        self._sequence = 0
+        self._pending: dict[tuple[str, int], tuple[float, asyncio.Future]] = {}
+
+    def _get_socket(self, family: int) -> socket.socket:
+        """Get the shared socket for an address family, opening it if needed."""
+        sock = self._sockets.get(family)
+        if sock is None:
+            sock = self._socket_factory(family, self.privileged)
+            asyncio.get_running_loop().add_reader(sock.fileno(), self._on_readable, family, sock)
+            self._sockets[family] = sock
+        return sock
+
+    def _next_sequence(self) -> int:
+        """Get the next 16-bit sequence number."""
+        self._sequence = (self._sequence + 1) & 0xFFFF
+        return self._sequence
+
+    def _on_readable(self, family: int, sock: socket.socket) -> None:
+        """Drain all queued replies from a socket and resolve matching requests."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            try:
+                data, addr = sock.recvfrom(65535)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                logger.debug(f"ICMP receive error: {e}")
+                return
+
+            received_at = loop.time()
+            parsed = parse_echo_reply(family, data, self.privileged)
+            if parsed is None:
+                continue
+
+            identifier, sequence = parsed
+            if self.privileged and identifier != self._identifier:
+                continue  # Echo reply for another process
+
+            source = addr[0].split("%", 1)[0]  # Strip IPv6 scope id
+            pending = self._pending.pop((source, sequence), None)
+            if pending is None:
+                continue  # Late or duplicate reply
+
+            sent_at, future = pending
+            if not future.done():
+                future.set_result((received_at - sent_at) * 1000)
+
+    async def ping_many(
+        self, addresses: Iterable[str], timeout: float
+    ) -> dict[str, tuple[bool, float | None]]:
+        """
+        Ping many hosts with one echo request each and wait for all replies.
+
+        Args:
+            addresses: IP addresses to ping
+            timeout: Seconds to wait for replies after the last request was sent
+
+        Returns:
+            Mapping of address (as passed in) to (is_alive, response_time_ms)
+
+        Raises:
+            OSError: If the ICMP socket cannot be opened (e.g. missing CAP_NET_RAW)
+        """
+        loop = asyncio.get_running_loop()
+        results: dict[str, tuple[bool, float | None]] = {}
+        requests: dict[str, tuple[tuple[str, int], asyncio.Future]] = {}
+
+        try:
+            for index, address in enumerate(addresses):
+                if address in requests or address in results:
+                    continue
+
+                try:
+                    ip = ipaddress.ip_address(str(address))
+                except ValueError:
+                    results[address] = (False, None)
+                    continue
+
+                family = socket.AF_INET6 if ip.version == 6 else socket.AF_INET
+                sequence = self._next_sequence()
+                key = (ip.compressed, sequence)
+                packet = build_echo_request(family, self._identifier, sequence)
+                future = loop.create_future()
+
+                sock = self._get_socket(family)  # Socket errors propagate to the caller
+
+                try:
+                    self._pending[key] = (loop.time(), future)
+                    await self._send(sock, packet, ip.compressed)
+                except OSError as e:
+                    # Network unreachable, no route, etc. - treat as down
+                    logger.debug(f"Error sending ICMP echo to {address}: {e}")
+                    self._pending.pop(key, None)
+                    results[address] = (False, None)
+                    continue
+
+                requests[address] = (key, future)
+
+                if index % SEND_CHUNK_SIZE == SEND_CHUNK_SIZE - 1:
+                    await asyncio.sleep(0)
+
+            if requests:
+                await asyncio.wait(
+                    [future for _, future in requests.values()], timeout=timeout
+                )
+
+            for address, (_, future) in requests.items():
+                if future.done() and not future.cancelled():
+                    results[address] = (True, future.result())
+                else:
+                    results[address] = (False, None)
+
+        finally:
+            for key, future in requests.values():
+                self._pending.pop(key, None)
+                if not future.done():
+                    future.cancel()
+
+        return results
+
+    async def _send(self, sock: socket.socket, packet: bytes, address: str) -> None:
+        """Send a packet, waiting briefly while the socket buffer is full."""
+        while True:
+            try:
+                sock.sendto(packet, (address, 0))
+                return
+            except (BlockingIOError, InterruptedError):
+                await asyncio.sleep(0.001)
+
+    def close(self) -> None:
+        """Close all sockets and fail outstanding requests."""
+        for sock in self._sockets.values():
+            try:
+                asyncio.get_running_loop().remove_reader(sock.fileno())
+            except RuntimeError:
+                pass
+            sock.close()
+
+        self._sockets.clear()
+
+        for _, future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
@@ -1,12 +1,92 @@
 """Machine service for database operations."""
+import ipaddress
+import json
+from datetime import datetime
 from typing import Any
 
-from asyncpg import Pool
+import orjson
+from asyncpg import Pool, Record
 
+from .. import metrics
 from ..config import settings
-from ..models import MachineCreate, MachineInDB, MachineResponse, MachineUpdate
-
-
+from ..db.statements import register_statement
+from ..models import MachineCreate, MachineInDB, MachineUpdate
+from .state_version import state_version
+from .status_cache import status_cache
+
+# Transaction advisory lock key serializing registrations for the machine limit check
+MACHINE_REGISTRATION_LOCK_KEY = 0x76786C02
+
+
+# Columns of machine list/detail rows (see _machine_row)
+MACHINE_ROW_COLUMNS = """
+    m.id, m.hostname, host(m.ip_address) AS ip_address,
+    m.mac_address::text AS mac_address, m.status,
+    m.last_seen, m.registered_at, m.updated_at, m.extra_data,
+    m.last_ping_alive AS is_alive,
+    m.last_ping_response_time AS response_time
+"""
+
+GET_MACHINE = register_statement(
+    "machines.get", f"SELECT {MACHINE_ROW_COLUMNS} FROM machines m WHERE m.id = $1"
+)
+
+COUNT_MACHINES = register_statement(
+    "machines.count",
+    """
+    SELECT COALESCE(SUM(count), 0)
+    FROM machine_status_counts
+    WHERE $1::text IS NULL OR status = $1
+    """,
+)
+
+
+def _machines_page_query(by_status: bool, after: bool) -> str:
+    """Build the machine list query for a combination of status filter and keyset cursor."""
+    conditions = []
+    params = 0
+    if by_status:
+        params += 1
+        conditions.append(f"m.status = ${params}")
+    if after:
+        params += 2
+        conditions.append(f"(m.registered_at, m.id) < (${params - 1}, ${params})")
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    return f"""
+        SELECT {MACHINE_ROW_COLUMNS}
+        FROM machines m
+        {where_clause}
+        ORDER BY m.registered_at DESC, m.id DESC
+        LIMIT ${params + 1} OFFSET ${params + 2}
+    """
+
+
+# One statement per (status filter, keyset cursor) combination
+MACHINES_PAGE = {
+    (by_status, after): register_statement(
+        f"machines.page.{'status' if by_status else 'all'}.{'after' if after else 'first'}",
+        _machines_page_query(by_status, after),
+    )
+    for by_status in (False, True)
+    for after in (False, True)
+}
+
+
+def _machine_row(row: Record) -> dict[str, Any]:
+    """
+    Convert a machine list/detail row into a JSON-ready dict.
+
+    The queries already return the address columns as text, so only the
+    cached ping status is overlaid and extra_data is decoded.
+    """
+    machine = status_cache.apply(dict(row))
+    if isinstance(machine["extra_data"], str):
+        machine["extra_data"] = orjson.loads(machine["extra_data"])
+    return machine
+
+
+@metrics.timed_methods(metrics.DB_CALL_SECONDS)
 class MachineService:
     """Service for machine-related database operations."""
 
@@ -14,22 +94,6 @@ class MachineService:
         """Initialize service with database pool."""
         self.db_pool = db_pool
 
-    async def validate_machine_limit(self) -> None:
-        """
-        Validate that machine count is below maximum limit.
-
-        Raises:
-            ValueError: If machine limit is reached
-        """
-        async with self.db_pool.acquire() as conn:
-            count = await conn.fetchval("SELECT COUNT(*) FROM machines")
-
-            if count >= settings.max_machines:
-                raise ValueError(
-                    f"Maximum machine limit ({settings.max_machines}) reached. "
-                    "Cannot register new machines."
-                )
-
     async def upsert_machine(
         self, ip_address: str, machine_data: MachineCreate
     ) -> tuple[MachineInDB, bool]:
@@ -48,105 +112,152 @@ class MachineService:
         Raises:
             ValueError: If machine limit is reached (for new machines)
         """
-        async with self.db_pool.acquire() as conn:
-            # Check if machine already exists
-            existing = await conn.fetchrow(
-                "SELECT id FROM machines WHERE ip_address = $1", ip_address
-            )
+        machine_data = machine_data.model_copy(update={"ip_address": ip_address})
+        [result] = await self.upsert_machines([machine_data])
+        return result
 
-            if existing is None:
-                # New machine - check limit
-                await self.validate_machine_limit()
+    async def upsert_machines(
+        self, machines: list[MachineCreate]
+    ) -> list[tuple[MachineInDB, bool]]:
+        """
+        Insert or update machines by IP address in a single statement.
 
-                # Insert new machine
-                row = await conn.fetchrow(
-                    """
-                    INSERT INTO machines (hostname, ip_address, mac_address, extra_data)
-                    VALUES ($1, $2, $3, $4)
-                    RETURNING id, hostname, ip_address, mac_address, status,
-                              last_seen, registered_at, updated_at, extra_data
-                    """,
-                    machine_data.hostname,
-                    ip_address,
-                    machine_data.mac_address,
-                    machine_data.extra_data,
+        The machine limit is checked in the same statement, under a
+        transaction-level advisory lock that serializes concurrent
+        registrations, so parallel requests cannot exceed it. Either all
+        machines are written or, if the new ones would exceed the limit, none.
+
+        Args:
+            machines: Machines to insert/update (the last entry wins for
+                duplicate IP addresses)
+
+        Returns:
+            List of (machine, is_new) tuples, one per distinct IP address
+
+        Raises:
+            ValueError: If the new machines would exceed the machine limit
+        """
+        # ON CONFLICT cannot touch the same row twice in one statement
+        unique: dict[ipaddress.IPv4Address | ipaddress.IPv6Address, MachineCreate] = {}
+        for machine_data in machines:
+            unique[ipaddress.ip_address(str(machine_data.ip_address))] = machine_data
+
+        if not unique:
+            return []
+
+        async with self.db_pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    "SELECT pg_advisory_xact_lock($1)", MACHINE_REGISTRATION_LOCK_KEY
                 )
-                is_new = True
-            else:
-                # Update existing machine
-                row = await conn.fetchrow(
+
+                rows = await conn.fetch(
                     """
-                    UPDATE machines
-                    SET hostname = $1,
-                        mac_address = $2,
-                        extra_data = $3,
+                    WITH input AS (
+                        SELECT *
+                        FROM unnest($1::text[], $2::inet[], $3::text[], $4::text[])
+                            AS t(hostname, ip_address, mac_address, extra_data)
+                    ),
+                    new_count AS (
+                        SELECT COUNT(*) AS n
+                        FROM input i
+                        WHERE NOT EXISTS (
+                            SELECT 1 FROM machines m WHERE m.ip_address = i.ip_address
+                        )
+                    )
+                    INSERT INTO machines (hostname, ip_address, mac_address, extra_data)
+                    SELECT i.hostname, i.ip_address, i.mac_address::macaddr, i.extra_data::jsonb
+                    FROM input i
+                    WHERE (SELECT n FROM new_count) = 0
+                       OR (SELECT COUNT(*) FROM machines) + (SELECT n FROM new_count) <= $5
+                    ON CONFLICT (ip_address) DO UPDATE
+                    SET hostname = EXCLUDED.hostname,
+                        mac_address = EXCLUDED.mac_address,
+                        extra_data = EXCLUDED.extra_data,
                         updated_at = CURRENT_TIMESTAMP
-                    WHERE ip_address = $4
                     RETURNING id, hostname, ip_address, mac_address, status,
-                              last_seen, registered_at, updated_at, extra_data
+                              last_seen, registered_at, updated_at, extra_data,
+                              (xmax = 0) AS is_new
                     """,
-                    machine_data.hostname,
-                    machine_data.mac_address,
-                    machine_data.extra_data,
-                    ip_address,
+                    [m.hostname for m in unique.values()],
+                    list(unique),
+                    [m.mac_address for m in unique.values()],
+                    [
+                        json.dumps(m.extra_data) if m.extra_data is not None else None
+                        for m in unique.values()
+                    ],
+                    settings.max_machines,
                 )
-                is_new = False
 
-            machine = MachineInDB(**dict(row))
-            return machine, is_new
+        if not rows:
+            raise ValueError(
+                f"Maximum machine limit ({settings.max_machines}) reached. "
+                "Cannot register new machines."
+            )
+
+        state_version.bump()
+
+        results = []
+        for row in rows:
+            machine = dict(row)
+            is_new = machine.pop("is_new")
+            if isinstance(machine["extra_data"], str):
+                machine["extra_data"] = json.loads(machine["extra_data"])
+            results.append((MachineInDB(**machine), is_new))
+        return results
 
     async def get_all_machines(
         self,
         status: str | None = None,
         limit: int = 100,
         offset: int = 0,
-    ) -> tuple[list[MachineResponse], int]:
+        after: tuple[datetime, int] | None = None,
+    ) -> tuple[list[dict[str, Any]], int]:
         """
         Get all machines with optional filtering and pagination.
 
+        Machines are ordered by (registered_at, id) descending. Pass the key
+        of the last machine of a page as ``after`` to get the next page with
+        an index range scan, so deep pages cost the same as the first one.
+        ``offset`` is still supported but scans the skipped rows.
+
+        The total comes from the trigger-maintained machine_status_counts
+        table instead of counting rows. The latest ping status comes from the
+        monitor's in-memory status cache, falling back to the denormalized
+        machines.last_ping_* columns.
+
+        Rows are returned as plain dicts shaped like MachineResponse, ready to
+        be serialized to JSON without building Pydantic models.
+
         Args:
             status: Filter by status ('active' or 'unreachable'), None for all
             limit: Maximum number of machines to return
             offset: Number of machines to skip
+            after: (registered_at, id) of the last machine of the previous page
 
         Returns:
-            Tuple of (machines list, total count)
+            Tuple of (machine rows, total count)
         """
-        async with self.db_pool.acquire() as conn:
-            # Build query with optional status filter
-            where_clause = "WHERE m.status = $1" if status else ""
-            params = [status] if status else []
+        # Parameters of the statement for this status filter and keyset cursor
+        params: list[Any] = []
+        if status:
+            params.append(status)
+        if after:
+            params.extend(after)
+        params.extend([limit, offset])
 
+        async with self.db_pool.acquire() as conn:
             # Get total count
-            count_query = f"SELECT COUNT(*) FROM machines m {where_clause}"
-            total = await conn.fetchval(count_query, *params)
-
-            # Get machines with latest ping status
-            query = f"""
-                SELECT
-                    m.id, m.hostname, m.ip_address, m.mac_address, m.status,
-                    m.last_seen, m.registered_at, m.updated_at, m.extra_data,
-                    ps.is_alive, ps.response_time
-                FROM machines m
-                LEFT JOIN LATERAL (
-                    SELECT is_alive, response_time
-                    FROM ping_status
-                    WHERE machine_id = m.id
-                    ORDER BY checked_at DESC
-                    LIMIT 1
-                ) ps ON true
-                {where_clause}
-                ORDER BY m.registered_at DESC
-                LIMIT ${len(params) + 1} OFFSET ${len(params) + 2}
-            """
-            params.extend([limit, offset])
-
-            rows = await conn.fetch(query, *params)
-
-            machines = [MachineResponse(**dict(row)) for row in rows]
+            total = await (await conn.prepared(COUNT_MACHINES)).fetchval(status)
+
+            # Get machines with latest ping status (denormalized, overlaid from cache below)
+            page = await conn.prepared(MACHINES_PAGE[bool(status), bool(after)])
+            rows = await page.fetch(*params)
+
+            machines = [_machine_row(row) for row in rows]
             return machines, total
 
-    async def get_machine_by_id(self, machine_id: int) -> MachineResponse | None:
+    async def get_machine_by_id(self, machine_id: int) -> dict[str, Any] | None:
         """
         Get a machine by ID with latest ping status.
 
@@ -154,32 +265,15 @@ class MachineService:
             machine_id: Machine ID
 
         Returns:
-            Machine object or None if not found
+            Machine row shaped like MachineResponse, or None if not found
         """
         async with self.db_pool.acquire() as conn:
-            row = await conn.fetchrow(
-                """
-                SELECT
-                    m.id, m.hostname, m.ip_address, m.mac_address, m.status,
-                    m.last_seen, m.registered_at, m.updated_at, m.extra_data,
-                    ps.is_alive, ps.response_time
-                FROM machines m
-                LEFT JOIN LATERAL (
-                    SELECT is_alive, response_time
-                    FROM ping_status
-                    WHERE machine_id = m.id
-                    ORDER BY checked_at DESC
-                    LIMIT 1
-                ) ps ON true
-                WHERE m.id = $1
-                """,
-                machine_id,
-            )
+            row = await (await conn.prepared(GET_MACHINE)).fetchrow(machine_id)
 
             if row is None:
                 return None
 
-            return MachineResponse(**dict(row))
+            return _machine_row(row)
 
     async def delete_machine(self, machine_id: int) -> bool:
         """
@@ -215,4 +309,5 @@ class MachineService:
 
             # Delete machine (ping_status will be cascade deleted)
             await conn.execute("DELETE FROM machines WHERE id = $1", machine_id)
+            state_version.bump()
             return True
@@ -0,0 +1,265 @@
+"""ping_status partition maintenance: pre-creation, hourly rollups and retention."""
+import asyncio
+import logging
+import re
+from datetime import UTC, date, datetime, time, timedelta
+
+import asyncpg
+from asyncpg import Connection, Pool
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Session advisory lock key so only one instance runs maintenance at a time
+MAINTENANCE_LOCK_KEY = 0x76786C01
+
+PARTITION_NAME_PATTERN = re.compile(r"^ping_status_p(\d{8})$")
+
+# Longest wait for the ping_status lock when a partition cannot be detached concurrently
+DETACH_LOCK_TIMEOUT = "2s"
+
+# Aggregates ping rows into ping_status_hourly; {source} and {where} are filled in
+# with a partition name validated against PARTITION_NAME_PATTERN and a fixed clause
+ROLLUP_QUERY = """
+    INSERT INTO ping_status_hourly
+        (machine_id, bucket, probe_count, alive_count, rtt_count,
+         rtt_sum, rtt_min, rtt_max, rtt_p95)
+    SELECT
+        machine_id,
+        date_trunc('hour', checked_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' AS bucket,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE is_alive),
+        COUNT(response_time),
+        SUM(response_time),
+        MIN(response_time),
+        MAX(response_time),
+        percentile_cont(0.95) WITHIN GROUP (ORDER BY response_time)
+    FROM {source}
+    {where}
+    GROUP BY 1, 2
+    ON CONFLICT (machine_id, bucket) DO UPDATE
+    SET probe_count = EXCLUDED.probe_count,
+        alive_count = EXCLUDED.alive_count,
+        rtt_count = EXCLUDED.rtt_count,
+        rtt_sum = EXCLUDED.rtt_sum,
+        rtt_min = EXCLUDED.rtt_min,
+        rtt_max = EXCLUDED.rtt_max,
+        rtt_p95 = EXCLUDED.rtt_p95
+"""
+
+
+def partition_name(day: date) -> str:
+    """Get the name of the ping_status partition holding a UTC day."""
+    return f"ping_status_p{day:%Y%m%d}"
+
+
+def partition_day(name: str) -> date | None:
+    """Get the UTC day of a ping_status partition, None if not a daily partition."""
+    match = PARTITION_NAME_PATTERN.match(name)
+    if match is None:
+        return None
+    return datetime.strptime(match.group(1), "%Y%m%d").date()
+
+
+class PartitionMaintenance:
+    """
+    Periodically manages the daily partitions of ping_status.
+
+    Each run:
+    - creates partitions for today and the next ``premake_days`` days
+    - detaches partitions older than ``retention_days``, then rolls them up
+      into ping_status_hourly and drops them (one transaction per partition)
+    - applies the same rollup and retention to rows that ended up in the
+      default partition
+    - deletes 5-minute aggregates older than ``aggregate_retention_days``
+    """
+
+    def __init__(
+        self,
+        db_pool: Pool,
+        retention_days: int | None = None,
+        premake_days: int | None = None,
+        interval: int | None = None,
+        aggregate_retention_days: int | None = None,
+    ):
+        """
+        Initialize partition maintenance.
+
+        Args:
+            db_pool: Database connection pool
+            retention_days: Days of raw ping rows to keep (default: from settings)
+            premake_days: Days of partitions to create ahead (default: from settings)
+            interval: Seconds between runs (default: from settings)
+            aggregate_retention_days: Days of 5-minute aggregates to keep
+                (default: from settings)
+        """
+        self.db_pool = db_pool
+        self.retention_days = retention_days or settings.ping_status_retention_days
+        self.premake_days = premake_days or settings.ping_status_premake_days
+        self.interval = interval or settings.maintenance_interval
+        self.aggregate_retention_days = (
+            aggregate_retention_days or settings.ping_status_5min_retention_days
+        )
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start the periodic maintenance task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._maintenance_loop())
+
+    async def stop(self) -> None:
+        """Stop the periodic maintenance task."""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_once(self) -> None:
+        """Run one maintenance pass unless another instance is already running one."""
+        async with self.db_pool.acquire() as conn:
+            locked = await conn.fetchval("SELECT pg_try_advisory_lock($1)", MAINTENANCE_LOCK_KEY)
+            if not locked:
+                logger.info("Partition maintenance already running elsewhere, skipping")
+                return
+
+            try:
+                today = datetime.now(UTC).date()
+                await self._create_partitions(conn, today)
+                await self._expire_partitions(conn, today - timedelta(days=self.retention_days))
+                await self._expire_aggregates(
+                    conn, datetime.now(UTC) - timedelta(days=self.aggregate_retention_days)
+                )
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock($1)", MAINTENANCE_LOCK_KEY)
+
+    async def _create_partitions(self, conn: Connection, today: date) -> None:
+        """Create daily partitions from today up to ``premake_days`` ahead."""
+        for offset in range(self.premake_days + 1):
+            day = today + timedelta(days=offset)
+            try:
+                await conn.execute("SELECT create_ping_status_partition($1)", day)
+            except Exception as e:
+                # Fails if the default partition already holds rows for that day
+                logger.error(f"Error creating partition {partition_name(day)}: {e}")
+
+    async def _expire_partitions(self, conn: Connection, cutoff: date) -> None:
+        """
+        Detach, roll up and drop partitions whose day is before ``cutoff``.
+
+        Dropping an attached partition would lock ping_status exclusively
+        (blocking the COPY writer and history reads), so partitions are
+        detached first. Daily tables left detached by an interrupted run are
+        picked up again.
+        """
+        rows = await conn.fetch(
+            """
+            SELECT
+                c.relname,
+                i.inhrelid IS NOT NULL AS attached,
+                COALESCE(i.inhdetachpending, false) AS detach_pending
+            FROM pg_class c
+            LEFT JOIN pg_inherits i
+                ON i.inhrelid = c.oid AND i.inhparent = 'ping_status'::regclass
+            WHERE c.relkind = 'r'
+              AND c.relname LIKE 'ping\\_status\\_p%'
+              AND c.relnamespace = (SELECT relnamespace FROM pg_class
+                                    WHERE oid = 'ping_status'::regclass)
+            """
+        )
+        expired = sorted(
+            (row["relname"], row["attached"], row["detach_pending"])
+            for row in rows
+            if (day := partition_day(row["relname"])) is not None and day < cutoff
+        )
+        if not expired:
+            return
+
+        has_default = await conn.fetchval(
+            """
+            SELECT partdefid <> 0
+            FROM pg_partitioned_table
+            WHERE partrelid = 'ping_status'::regclass
+            """
+        )
+
+        for name, attached, detach_pending in expired:
+            if attached:
+                try:
+                    await self._detach_partition(conn, name, has_default, detach_pending)
+                except asyncpg.LockNotAvailableError:
+                    logger.warning(f"ping_status is busy, detaching {name} in the next run")
+                    continue
+
+            # The detached table is no longer part of ping_status: only it is locked
+            async with conn.transaction():
+                await conn.execute(ROLLUP_QUERY.format(source=name, where=""))
+                await conn.execute(f"DROP TABLE {name}")
+            logger.info(f"Rolled up and dropped expired partition {name}")
+
+        # Rows that landed in the default partition follow the same retention
+        cutoff_at = datetime.combine(cutoff, time.min, tzinfo=UTC)
+        async with conn.transaction():
+            await conn.execute(
+                ROLLUP_QUERY.format(
+                    source="ping_status_default",
+                    where="WHERE checked_at < $1",
+                ),
+                cutoff_at,
+            )
+            await conn.execute("DELETE FROM ping_status_default WHERE checked_at < $1", cutoff_at)
+
+    async def _detach_partition(
+        self, conn: Connection, name: str, has_default: bool, detach_pending: bool
+    ) -> None:
+        """
+        Detach a partition from ping_status.
+
+        Runs CONCURRENTLY (outside a transaction), which does not block
+        writers and readers of ping_status. PostgreSQL does not allow that
+        while ping_status has a default partition; the plain detach then
+        holds an exclusive lock only for the catalog change, and gives up
+        after ``DETACH_LOCK_TIMEOUT`` instead of queueing other sessions
+        behind it.
+
+        Args:
+            conn: Database connection (not in a transaction)
+            name: Partition name validated against PARTITION_NAME_PATTERN
+            has_default: Whether ping_status has a default partition
+            detach_pending: Whether a concurrent detach was interrupted
+
+        Raises:
+            asyncpg.LockNotAvailableError: If the lock timeout was reached
+        """
+        if detach_pending:
+            await conn.execute(f"ALTER TABLE ping_status DETACH PARTITION {name} FINALIZE")
+        elif not has_default:
+            await conn.execute(f"ALTER TABLE ping_status DETACH PARTITION {name} CONCURRENTLY")
+        else:
+            async with conn.transaction():
+                await conn.execute(f"SET LOCAL lock_timeout = '{DETACH_LOCK_TIMEOUT}'")
+                await conn.execute(f"ALTER TABLE ping_status DETACH PARTITION {name}")
+
+    async def _expire_aggregates(self, conn: Connection, cutoff: datetime) -> None:
+        """Delete 5-minute aggregates of buckets before ``cutoff`` (hourly ones are kept)."""
+        result = await conn.execute("DELETE FROM ping_status_5min WHERE bucket < $1", cutoff)
+        logger.debug(f"Expired 5-minute aggregates: {result}")
+
+    async def _maintenance_loop(self) -> None:
+        """Run maintenance every ``interval`` seconds."""
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Error running partition maintenance: {e}")
+
+            await asyncio.sleep(self.interval)
+
+
+# Global partition maintenance instance (will be initialized in main.py)
+partition_maintenance: PartitionMaintenance | None = None
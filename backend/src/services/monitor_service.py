@@ -1,21 +1,36 @@
-"""Machine monitoring service with background tasks."""
+"""Machine monitoring service with a central ping scheduler."""
 import asyncio
+import heapq
+import itertools
 import logging
+import math
+from collections.abc import Awaitable, Callable
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Dict
+from datetime import UTC, datetime
 
-from asyncpg import Pool
+from asyncpg import Pool, Record
 
+from .. import metrics
 from ..config import settings
 from ..models import PingStatusCreate, WebSocketStatusUpdate
-from .backoff import calculate_backoff
+from .backoff import DEFAULT_POLICY, DetectionPolicies, DetectionPolicy, probe_offset
+from .broadcast_aggregator import broadcast_aggregator
 from .ping_status_service import PingStatusService
-from .ping_utils import ping_host
-from .websocket_service import ws_manager
+from .ping_utils import icmp_engine, ping_many
+from .state_version import state_version
+from .status_cache import status_cache
+from .write_behind import MachineStateWriter, PingStatusWriter
 
 logger = logging.getLogger(__name__)
 
+# Delay before re-checking a machine whose check raised an unexpected error
+ERROR_RETRY_INTERVAL = 60
+
+# Seconds' worth of probes a rate-limited scheduler may start at once
+PROBE_PACING_WINDOW = 0.1
+
+_SCHEDULE_LAG = metrics.SCHEDULE_LAG_SECONDS.labels()
+
 
 @dataclass
 class MachineMonitor:
@@ -23,21 +38,292 @@ class MachineMonitor:
 
     machine_id: int
     ip_address: str
+    policy: DetectionPolicy = DEFAULT_POLICY
     consecutive_failures: int = 0
-    next_check_interval: int = 60
+    next_check_interval: float = 60
     last_check: datetime | None = None
     is_alive: bool | None = None
+    next_due: float | None = None  # Event loop time of the next scheduled check
+
+
+class ProbeRateLimiter:
+    """
+    Token bucket pacing the start of machine checks.
+
+    The bucket holds only ``PROBE_PACING_WINDOW`` seconds' worth of probes,
+    so a backlog of due machines (a rack that failed together, workers that
+    fell behind) is released in small batches evenly over time instead of in
+    one burst. Checks are rescheduled from the time they ran, so machines
+    released apart stay apart in later intervals.
+    """
+
+    def __init__(self, rate: float):
+        """
+        Initialize rate limiter.
+
+        Args:
+            rate: Maximum probes started per second
+        """
+        self.rate = rate
+        self.burst = max(1.0, rate * PROBE_PACING_WINDOW)
+        self._tokens = self.burst
+        self._updated = 0.0
+
+    def available(self, now: float) -> int:
+        """
+        Count the probes that may start now.
+
+        Args:
+            now: Current event loop time
+
+        Returns:
+            Number of probes
+        """
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        return int(self._tokens + 1e-9)  # Refills summing to a whole probe may round below it
+
+    def take(self, count: int) -> None:
+        """Use up the allowance of started probes."""
+        self._tokens -= count
+
+    def delay(self) -> float:
+        """Seconds until the next probe may start, as of the last ``available()``."""
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+
+class PingScheduler:
+    """
+    Central scheduler that dispatches due machine checks to a bounded worker pool.
+
+    Machines are kept in a heap keyed on their next-due time. A single dispatcher
+    task sleeps until the earliest deadline, pops every due machine (up to
+    ``batch_size`` per batch) and hands the batch to one of ``workers`` worker
+    tasks through a bounded queue. When the workers fall behind, the queue fills
+    up and the dispatcher blocks, which shows up as growing lag. With a
+    ``max_rate``, check starts are paced by a ``ProbeRateLimiter``; due
+    machines beyond the rate wait in the heap and count as overdue.
+
+    Heap entries are invalidated lazily: an entry is only dispatched if its due
+    time still matches ``MachineMonitor.next_due``.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[list[MachineMonitor]], Awaitable[None]],
+        workers: int | None = None,
+        batch_size: int | None = None,
+        queue_size: int | None = None,
+        max_rate: float | None = None,
+    ):
+        """
+        Initialize scheduler.
+
+        Args:
+            handler: Coroutine called by a worker with each due batch
+            workers: Number of worker tasks (default: from settings)
+            batch_size: Maximum machines per dispatched batch (default: from settings)
+            queue_size: Maximum batches waiting for a worker (default: from settings)
+            max_rate: Maximum checks started per second, 0 for unlimited (default: from settings)
+        """
+        self._handler = handler
+        self.workers = workers or settings.monitor_workers
+        self.batch_size = batch_size or settings.monitor_batch_size
+        self._heap: list[tuple[float, int, MachineMonitor]] = []
+        self._counter = itertools.count()
+        self._queue: asyncio.Queue[list[tuple[float, MachineMonitor]]] = asyncio.Queue(
+            maxsize=queue_size or settings.monitor_queue_size
+        )
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+        if max_rate is None:
+            max_rate = settings.monitor_max_probes_per_second
+        self._rate_limiter = ProbeRateLimiter(max_rate) if max_rate > 0 else None
+
+        # Metrics
+        self._queued_machines = 0
+        self._dispatched = 0
+        self._last_lag = 0.0
+        self._max_lag = 0.0
+
+    def start(self) -> None:
+        """Start dispatcher and worker tasks."""
+        if self._tasks:
+            return
+
+        self._tasks.append(asyncio.create_task(self._dispatch_loop()))
+        for _ in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker_loop()))
+
+    async def stop(self) -> None:
+        """Cancel dispatcher and worker tasks."""
+        for task in self._tasks:
+            task.cancel()
+
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        self._tasks.clear()
+
+    def schedule(self, monitor: MachineMonitor, delay: float = 0) -> None:
+        """
+        Schedule a machine check.
+
+        Replaces any earlier schedule of the same monitor.
+
+        Args:
+            monitor: Machine monitor state
+            delay: Seconds from now until the check is due
+        """
+        due = asyncio.get_running_loop().time() + max(delay, 0)
+        monitor.next_due = due
+        heapq.heappush(self._heap, (due, next(self._counter), monitor))
+
+        # Wake the dispatcher if this is now the earliest deadline
+        if self._heap[0][2] is monitor:
+            self._wakeup.set()
+
+    def cancel(self, monitor: MachineMonitor) -> None:
+        """
+        Remove a machine from the schedule.
+
+        Args:
+            monitor: Machine monitor state
+        """
+        monitor.next_due = None
+
+    def stats(self) -> dict:
+        """
+        Get scheduler metrics.
+
+        Returns:
+            Dictionary with queue depth and lag metrics
+            - scheduled: Machines waiting in the heap (including stale entries)
+            - overdue: Machines whose due time has passed but are not yet dispatched
+            - queue_depth: Machines dispatched but not yet picked up by a worker
+            - dispatched: Total machines handed to workers
+            - lag_seconds: Lag of the most recently started check
+            - max_lag_seconds: Largest lag observed since start
+            - max_probes_per_second: Pacing rate of check starts (0: unlimited)
+        """
+        now = asyncio.get_running_loop().time()
+        overdue = sum(
+            1 for due, _, monitor in self._heap if due <= now and monitor.next_due == due
+        )
+
+        return {
+            "scheduled": len(self._heap),
+            "overdue": overdue,
+            "queue_depth": self._queued_machines,
+            "dispatched": self._dispatched,
+            "workers": self.workers,
+            "lag_seconds": round(self._last_lag, 3),
+            "max_lag_seconds": round(self._max_lag, 3),
+            "max_probes_per_second": self._rate_limiter.rate if self._rate_limiter else 0,
+        }
+
+    async def _dispatch_loop(self) -> None:
+        """Pop due machines from the heap and hand them to workers in batches."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            self._wakeup.clear()
+
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - loop.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except TimeoutError:
+                    pass
+                continue
+
+            now = loop.time()
+            limit = self.batch_size
+            if self._rate_limiter:
+                limit = min(limit, self._rate_limiter.available(now))
+                if not limit:
+                    await asyncio.sleep(self._rate_limiter.delay())
+                    continue
+
+            batch: list[tuple[float, MachineMonitor]] = []
+            while self._heap and self._heap[0][0] <= now and len(batch) < limit:
+                due, _, monitor = heapq.heappop(self._heap)
+                if monitor.next_due != due:
+                    continue  # Stale entry (rescheduled or cancelled)
+                monitor.next_due = None
+                batch.append((due, monitor))
+
+            if batch:
+                if self._rate_limiter:
+                    self._rate_limiter.take(len(batch))
+                self._queued_machines += len(batch)
+                self._dispatched += len(batch)
+                await self._queue.put(batch)
+
+    async def _worker_loop(self) -> None:
+        """Run due batches handed over by the dispatcher."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = await self._queue.get()
+            self._queued_machines -= len(batch)
+
+            try:
+                now = loop.time()
+                for due, _ in batch:
+                    self._record_lag(now - due)
+
+                await self._handler([monitor for _, monitor in batch])
+            except Exception as e:
+                logger.error(f"Error running monitor batch: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _record_lag(self, lag: float) -> None:
+        """Record scheduling lag of a started check."""
+        _SCHEDULE_LAG.observe(lag)
+        self._last_lag = lag
+        if lag > self._max_lag:
+            self._max_lag = lag
 
 
 class MachineMonitorManager:
-    """Manages all machine monitoring tasks."""
+    """
+    Manages monitoring of all machines through a shared ping scheduler.
+
+    All known machines are tracked, but only those accepted by ``owns`` are
+    monitored; in cluster mode it selects this instance's shard, and
+    ``rebalance()`` applies ownership changes.
+    """
+
+    def __init__(self, db_pool: Pool, owns: Callable[[int], bool] | None = None):
+        """
+        Initialize monitor manager.
 
-    def __init__(self, db_pool: Pool):
-        """Initialize monitor manager."""
+        Args:
+            db_pool: Database connection pool
+            owns: Whether this instance monitors a machine ID (default: all machines)
+        """
         self.db_pool = db_pool
-        self.monitors: Dict[int, asyncio.Task] = {}
-        self.monitor_states: Dict[int, MachineMonitor] = {}
+        self.owns = owns or (lambda machine_id: True)
+        self.machines: dict[int, str] = {}
+        self.monitor_states: dict[int, MachineMonitor] = {}
+        self.policies = DetectionPolicies.from_settings()
         self.ping_status_service = PingStatusService(db_pool)
+        self.ping_status_writer = PingStatusWriter(db_pool)
+        self.machine_state_writer = MachineStateWriter(db_pool)
+        self.scheduler = PingScheduler(self._run_batch)
+
+    def start(self) -> None:
+        """Start the ping scheduler and write-behind buffers."""
+        self.ping_status_writer.start()
+        self.machine_state_writer.start()
+        self.scheduler.start()
 
     async def start_monitoring(self, machine_id: int, ip_address: str) -> None:
         """
@@ -47,23 +333,107 @@ class MachineMonitorManager:
             machine_id: Machine ID
             ip_address: Machine IP address
         """
-        if machine_id in self.monitors:
+        self.machines[machine_id] = ip_address
+        if not self.owns(machine_id):
+            return
+
+        if machine_id in self.monitor_states:
             logger.info(f"Already monitoring machine {machine_id}")
             return
 
-        # Create monitor state
-        monitor_state = MachineMonitor(
-            machine_id=machine_id,
-            ip_address=ip_address,
-        )
+        # Create monitor state and schedule the first check immediately
+        monitor_state = self._new_monitor(machine_id, ip_address)
         self.monitor_states[machine_id] = monitor_state
-
-        # Create long-running task
-        task = asyncio.create_task(self._monitor_machine(monitor_state))
-        self.monitors[machine_id] = task
+        self.scheduler.schedule(monitor_state)
 
         logger.info(f"Started monitoring {ip_address} (machine {machine_id})")
 
+    async def start_monitoring_many(
+        self, machines: list[tuple[int, str]], spread: float = 0
+    ) -> None:
+        """
+        Start monitoring several machines at once.
+
+        Args:
+            machines: (machine_id, ip_address) pairs
+            spread: Seconds over which first checks are spread (0: check all now)
+        """
+        started = 0
+        for machine_id, ip_address in machines:
+            self.machines[machine_id] = ip_address
+            if machine_id in self.monitor_states or not self.owns(machine_id):
+                continue
+
+            monitor_state = self._new_monitor(machine_id, ip_address)
+            self.monitor_states[machine_id] = monitor_state
+            self.scheduler.schedule(monitor_state, probe_offset(machine_id, spread))
+            started += 1
+
+        logger.info(f"Started monitoring {started} machines")
+
+    async def bootstrap(self) -> list[Record]:
+        """
+        Load all machines at startup and resume monitoring where the last run stopped.
+
+        Machines and their latest ping_status row are read in one query.
+        Consecutive failures and the backoff interval are restored, so dead
+        hosts keep their long interval and a host that was down is recognized
+        as recovering. A machine whose next check is still ahead keeps that
+        due time; all others get their first check spread over the minimum
+        check interval instead of all at once.
+
+        Returns:
+            Machine records (id, ip_address, hostname, latest ping state)
+        """
+        rows = await self.ping_status_service.get_machines_with_latest_ping()
+
+        machines = []
+        for row in rows:
+            self.machines[row["id"]] = row["ip_address"]
+            machines.append((row["id"], row["ip_address"]))
+
+        self._resume_monitoring(machines, {row["id"]: row for row in rows})
+        return rows
+
+    def _resume_monitoring(
+        self, machines: list[tuple[int, str]], states: dict[int, Record]
+    ) -> None:
+        """
+        Start monitoring machines from the state of their latest ping.
+
+        Args:
+            machines: (machine_id, ip_address) pairs (not owned ones are skipped)
+            states: Latest ping state by machine ID (checked_at, is_alive,
+                consecutive_failures, next_check_interval); checked_at may be NULL
+        """
+        now = datetime.now(UTC)
+        spread = settings.min_check_interval
+        started = restored = 0
+        for machine_id, ip_address in machines:
+            if machine_id in self.monitor_states or not self.owns(machine_id):
+                continue
+
+            monitor_state = self._new_monitor(machine_id, ip_address)
+            delay = probe_offset(machine_id, spread)
+            state = states.get(machine_id)
+            if state is not None and state["checked_at"] is not None:
+                monitor_state.consecutive_failures = state["consecutive_failures"]
+                monitor_state.next_check_interval = state["next_check_interval"]
+                monitor_state.last_check = state["checked_at"]
+                monitor_state.is_alive = state["is_alive"]
+                remaining = (
+                    state["checked_at"] - now
+                ).total_seconds() + monitor_state.next_check_interval
+                if remaining > 0:
+                    delay = remaining
+                restored += 1
+
+            self.monitor_states[machine_id] = monitor_state
+            self.scheduler.schedule(monitor_state, delay)
+            started += 1
+
+        logger.info(f"Started monitoring {started} machines ({restored} with restored state)")
+
     async def stop_monitoring(self, machine_id: int) -> None:
         """
         Stop monitoring a machine.
@@ -71,143 +441,230 @@ class MachineMonitorManager:
         Args:
             machine_id: Machine ID
         """
-        if machine_id not in self.monitors:
+        self.machines.pop(machine_id, None)
+        monitor_state = self.monitor_states.pop(machine_id, None)
+        if monitor_state is None:
             return
 
-        # Cancel task
-        task = self.monitors[machine_id]
-        task.cancel()
+        self.scheduler.cancel(monitor_state)
+        self.machine_state_writer.discard(machine_id)
+        status_cache.remove(machine_id)
+        broadcast_aggregator.forget(machine_id)
 
-        try:
-            await task
-        except asyncio.CancelledError:
-            pass
+        logger.info(f"Stopped monitoring machine {machine_id}")
 
-        # Cleanup
-        del self.monitors[machine_id]
-        del self.monitor_states[machine_id]
+    async def rebalance(self) -> None:
+        """
+        Start monitoring newly owned machines and release machines owned elsewhere now.
 
-        logger.info(f"Stopped monitoring machine {machine_id}")
+        Taken-over machines resume from their latest ping_status row like at
+        startup, so a host the previous owner found unreachable keeps its
+        failure count and backoff instead of being reported active again.
+        """
+        released = 0
+        for machine_id in list(self.monitor_states):
+            if not self.owns(machine_id):
+                # Keep cached status and pending writes; the new owner publishes from now on
+                self.scheduler.cancel(self.monitor_states.pop(machine_id))
+                released += 1
+
+        taken = [
+            (machine_id, ip_address)
+            for machine_id, ip_address in self.machines.items()
+            if machine_id not in self.monitor_states and self.owns(machine_id)
+        ]
+        states: dict[int, Record] = {}
+        if taken:
+            try:
+                rows = await self.ping_status_service.get_latest_ping_states(
+                    [machine_id for machine_id, _ in taken]
+                )
+                states = {row["id"]: row for row in rows}
+            except Exception as e:
+                logger.error(f"Error loading ping state of {len(taken)} taken-over machines: {e}")
+
+        self._resume_monitoring(taken, states)
+        logger.info(f"Rebalanced: released {released}, monitoring {len(self.monitor_states)}")
 
     async def shutdown(self) -> None:
-        """Gracefully shutdown all monitoring tasks."""
-        logger.info(f"Shutting down {len(self.monitors)} monitor tasks...")
+        """Gracefully shutdown the scheduler and all monitors."""
+        logger.info(f"Shutting down monitoring of {len(self.monitor_states)} machines...")
 
-        # Cancel all tasks
-        for task in self.monitors.values():
-            task.cancel()
+        await self.scheduler.stop()
+        icmp_engine.close()
 
-        # Wait for all tasks to complete
-        if self.monitors:
-            await asyncio.gather(
-                *self.monitors.values(),
-                return_exceptions=True,
-            )
+        # Drain buffered results once no more checks can produce new ones
+        await self.ping_status_writer.close()
+        await self.machine_state_writer.close()
+
+        for monitor_state in self.monitor_states.values():
+            self.scheduler.cancel(monitor_state)
 
-        self.monitors.clear()
         self.monitor_states.clear()
+        self.machines.clear()
+        status_cache.clear()
         logger.info("All monitors shut down")
 
     def get_status(self, machine_id: int) -> MachineMonitor | None:
         """Get machine monitoring status."""
         return self.monitor_states.get(machine_id)
 
-    def get_all_statuses(self) -> Dict[int, MachineMonitor]:
+    def get_all_statuses(self) -> dict[int, MachineMonitor]:
         """Get all machine monitoring statuses."""
         return self.monitor_states.copy()
 
-    async def _monitor_machine(self, monitor: MachineMonitor) -> None:
+    def get_scheduler_stats(self) -> dict:
+        """Get ping scheduler queue depth and lag metrics."""
+        stats = self.scheduler.stats()
+        stats["machines"] = len(self.monitor_states)
+        stats["known_machines"] = len(self.machines)
+        stats["ping_status_pending"] = self.ping_status_writer.pending
+        stats["machine_state_pending"] = self.machine_state_writer.pending
+        return stats
+
+    def _new_monitor(self, machine_id: int, ip_address: str) -> MachineMonitor:
+        """Create the monitor state of a machine with the detection policy of its subnet."""
+        return MachineMonitor(
+            machine_id=machine_id,
+            ip_address=ip_address,
+            policy=self.policies.resolve(ip_address),
+        )
+
+    def _is_monitored(self, monitor: MachineMonitor) -> bool:
+        """Check whether a monitor is still registered (not stopped meanwhile)."""
+        return self.monitor_states.get(monitor.machine_id) is monitor
+
+    async def _run_batch(self, batch: list[MachineMonitor]) -> None:
         """
-        Long-running monitoring task for a single machine.
+        Ping a due batch in one sweep and process the results concurrently.
+
+        Args:
+            batch: Due machine monitors
+        """
+        try:
+            results = await ping_many([monitor.ip_address for monitor in batch])
+        except Exception as e:
+            logger.error(f"Error pinging batch of {len(batch)} machines: {e}")
+            results = {}
+
+        await asyncio.gather(
+            *(
+                self._check_machine(monitor, results.get(monitor.ip_address))
+                for monitor in batch
+            )
+        )
+
+    async def _check_machine(
+        self, monitor: MachineMonitor, result: tuple[bool, float | None] | None
+    ) -> None:
+        """
+        Process a single check of a machine and schedule the next one.
 
         Args:
             monitor: Machine monitor state
+            result: Ping result (is_alive, response_time_ms), None if the ping errored
         """
-        while True:
+        try:
+            if not self._is_monitored(monitor):
+                return
+
+            if result is None:
+                raise RuntimeError("no ping result")
+
+            is_alive, response_time = result
+            await self._process_result(monitor, is_alive, response_time)
+            delay = monitor.next_check_interval
+
+        except Exception as e:
+            logger.error(f"Error monitoring {monitor.ip_address}: {e}")
+            delay = ERROR_RETRY_INTERVAL  # Retry after 1 minute on error
+
+        # Schedule next check
+        if self._is_monitored(monitor):
+            self.scheduler.schedule(monitor, delay)
+
+    async def _process_result(
+        self, monitor: MachineMonitor, is_alive: bool, response_time: float | None
+    ) -> None:
+        """
+        Update monitor state and persist a ping result.
+
+        Args:
+            monitor: Machine monitor state
+            is_alive: Ping result
+            response_time: Ping response time in ms
+        """
+        # Restored if a status transition cannot be recorded
+        previous_state = (
+            monitor.last_check,
+            monitor.is_alive,
+            monitor.consecutive_failures,
+            monitor.next_check_interval,
+        )
+
+        # Update monitor state
+        monitor.last_check = datetime.now(UTC)
+        monitor.is_alive = is_alive
+        previous_failures = monitor.consecutive_failures
+        was_down = monitor.policy.is_down(previous_failures)
+
+        # Success resets the failure count; failures are confirmed quickly, then backed off
+        monitor.consecutive_failures = 0 if is_alive else previous_failures + 1
+        monitor.next_check_interval = monitor.policy.next_interval(
+            monitor.consecutive_failures, monitor.next_check_interval
+        )
+
+        is_down = monitor.policy.is_down(monitor.consecutive_failures)
+        status = "unreachable" if is_down else "active"
+        ping_data = PingStatusCreate(
+            machine_id=monitor.machine_id,
+            is_alive=is_alive,
+            response_time=response_time,
+            consecutive_failures=monitor.consecutive_failures,
+            next_check_interval=math.ceil(monitor.next_check_interval),
+        )
+
+        if is_down != was_down:
+            # Recovered or failure threshold reached: ping row, status, latest ping
+            # and failure log in one statement, before anyone is told
             try:
-                # Execute ping
-                is_alive, response_time = await ping_host(monitor.ip_address)
-
-                # Update monitor state
-                monitor.last_check = datetime.utcnow()
-                monitor.is_alive = is_alive
-
-                if is_alive:
-                    # Success - reset failure count
-                    was_down = monitor.consecutive_failures >= settings.failure_threshold
-
-                    monitor.consecutive_failures = 0
-                    monitor.next_check_interval = settings.min_check_interval
-
-                    # If machine was down and now recovered, update status
-                    if was_down:
-                        await self.ping_status_service.update_machine_status_on_recovery(
-                            monitor.machine_id
-                        )
-
-                        # Broadcast recovery via WebSocket
-                        await self._broadcast_status_update(
-                            monitor.machine_id,
-                            "active",
-                            is_alive,
-                            response_time,
-                            monitor.last_check,
-                        )
-                    else:
-                        # Machine is still active - update last_seen and broadcast
-                        await self.ping_status_service.update_machine_last_seen(
-                            monitor.machine_id
-                        )
-
-                        # Broadcast regular status update via WebSocket
-                        await self._broadcast_status_update(
-                            monitor.machine_id,
-                            "active",
-                            is_alive,
-                            response_time,
-                            monitor.last_check,
-                        )
-                else:
-                    # Failure - increment count and apply backoff
-                    monitor.consecutive_failures += 1
-                    monitor.next_check_interval = calculate_backoff(
-                        monitor.consecutive_failures
-                    )
-
-                    # If threshold reached, update status to unreachable
-                    if monitor.consecutive_failures == settings.failure_threshold:
-                        await self.ping_status_service.update_machine_status_on_failure(
-                            monitor.machine_id, monitor.consecutive_failures
-                        )
-
-                        # Broadcast failure via WebSocket
-                        await self._broadcast_status_update(
-                            monitor.machine_id,
-                            "unreachable",
-                            is_alive,
-                            response_time,
-                            monitor.last_check,
-                        )
-
-                # Record ping status
-                ping_data = PingStatusCreate(
-                    machine_id=monitor.machine_id,
-                    is_alive=is_alive,
-                    response_time=response_time,
-                    consecutive_failures=monitor.consecutive_failures,
-                    next_check_interval=monitor.next_check_interval,
+                await self.ping_status_service.record_status_change(
+                    ping_data, status, monitor.last_check
                 )
-                await self.ping_status_service.create_ping_status(ping_data)
-
-                # Sleep until next check
-                await asyncio.sleep(monitor.next_check_interval)
+            except Exception:
+                # Keep the previous state so the next check makes the transition again
+                (
+                    monitor.last_check,
+                    monitor.is_alive,
+                    monitor.consecutive_failures,
+                    monitor.next_check_interval,
+                ) = previous_state
+                raise
+        else:
+            # Record latest ping and ping status (written in bulk by write-behind buffers)
+            self.machine_state_writer.record(
+                monitor.machine_id, is_alive, response_time, monitor.last_check
+            )
+            await self.ping_status_writer.add(ping_data, monitor.last_check)
+
+        # Broadcast via WebSocket: every successful check, and the failure that
+        # made the machine unreachable
+        if is_alive or is_down != was_down:
+            await self._broadcast_status_update(
+                monitor.machine_id,
+                status,
+                is_alive,
+                response_time,
+                monitor.last_check,
+            )
 
-            except asyncio.CancelledError:
-                logger.info(f"Monitor for {monitor.ip_address} cancelled")
-                break
-            except Exception as e:
-                logger.error(f"Error monitoring {monitor.ip_address}: {e}")
-                await asyncio.sleep(60)  # Retry after 1 minute on error
+        # Publish latest status to the API read model
+        previous = status_cache.get(monitor.machine_id)
+        status_cache.update(
+            monitor.machine_id, status, is_alive, response_time, monitor.last_check
+        )
+        if previous is None or previous.status != status or previous.is_alive != is_alive:
+            state_version.bump()
 
     async def _broadcast_status_update(
         self,
@@ -218,7 +675,7 @@ class MachineMonitorManager:
         last_seen: datetime,
     ) -> None:
         """
-        Broadcast machine status update via WebSocket.
+        Queue machine status update for the next WebSocket status batch.
 
         Args:
             machine_id: Machine ID
@@ -235,7 +692,7 @@ class MachineMonitorManager:
             last_seen=last_seen,
         )
 
-        await ws_manager.broadcast(message.model_dump(mode="json"))
+        broadcast_aggregator.submit(message.model_dump(mode="json"))
 
 
 # Global monitor manager instance (will be initialized in main.py)
@@ -1,9 +1,155 @@
 """PingStatus service for database operations."""
-from asyncpg import Pool
+from datetime import datetime
 
+import asyncpg
+from asyncpg import Pool, Record
+
+from .. import metrics
+from ..db.statements import register_statement
 from ..models import PingStatusCreate
 
+# Column order of records passed to create_ping_statuses
+PING_STATUS_COLUMNS = (
+    "machine_id",
+    "is_alive",
+    "response_time",
+    "checked_at",
+    "consecutive_failures",
+    "next_check_interval",
+)
+
+
+def _with_aggregates(batch: str) -> str:
+    """
+    Build a statement that adds the rows of a ``batch`` CTE to the aggregates.
+
+    Counts and sums are added and min/max merged, so each batch must be
+    applied exactly once (in the transaction that inserts its rows).
+    rtt_p95 is left to the rollup.
+
+    Args:
+        batch: CTE definitions ending in ``batch`` with machine_id, is_alive,
+            response_time and checked_at columns
+
+    Returns:
+        SQL statement
+    """
+    return f"""
+    WITH {batch},
+    five_minutes AS (
+        INSERT INTO ping_status_5min AS a
+            (machine_id, bucket, probe_count, alive_count, rtt_count, rtt_sum, rtt_min, rtt_max)
+        SELECT
+            machine_id,
+            date_bin('5 minutes', checked_at, TIMESTAMPTZ '2000-01-01 00:00:00+00'),
+            COUNT(*),
+            COUNT(*) FILTER (WHERE is_alive),
+            COUNT(response_time),
+            SUM(response_time),
+            MIN(response_time),
+            MAX(response_time)
+        FROM batch
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        ON CONFLICT (machine_id, bucket) DO UPDATE
+        SET probe_count = a.probe_count + EXCLUDED.probe_count,
+            alive_count = a.alive_count + EXCLUDED.alive_count,
+            rtt_count = a.rtt_count + EXCLUDED.rtt_count,
+            rtt_sum = COALESCE(a.rtt_sum + EXCLUDED.rtt_sum, a.rtt_sum, EXCLUDED.rtt_sum),
+            rtt_min = LEAST(a.rtt_min, EXCLUDED.rtt_min),
+            rtt_max = GREATEST(a.rtt_max, EXCLUDED.rtt_max)
+    )
+    INSERT INTO ping_status_hourly AS a
+        (machine_id, bucket, probe_count, alive_count, rtt_count, rtt_sum, rtt_min, rtt_max)
+    SELECT
+        machine_id,
+        date_trunc('hour', checked_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+        COUNT(*),
+        COUNT(*) FILTER (WHERE is_alive),
+        COUNT(response_time),
+        SUM(response_time),
+        MIN(response_time),
+        MAX(response_time)
+    FROM batch
+    GROUP BY 1, 2
+    ORDER BY 1, 2
+    ON CONFLICT (machine_id, bucket) DO UPDATE
+    SET probe_count = a.probe_count + EXCLUDED.probe_count,
+        alive_count = a.alive_count + EXCLUDED.alive_count,
+        rtt_count = a.rtt_count + EXCLUDED.rtt_count,
+        rtt_sum = COALESCE(a.rtt_sum + EXCLUDED.rtt_sum, a.rtt_sum, EXCLUDED.rtt_sum),
+        rtt_min = LEAST(a.rtt_min, EXCLUDED.rtt_min),
+        rtt_max = GREATEST(a.rtt_max, EXCLUDED.rtt_max)
+    """
+
+
+# Adds a batch of inserted ping results ($1-$4 arrays) to the 5-minute and hourly aggregates
+UPDATE_AGGREGATES = register_statement(
+    "ping_status.update_aggregates",
+    _with_aggregates(
+        """
+        batch AS (
+            SELECT u.*
+            FROM unnest($1::int[], $2::bool[], $3::float8[], $4::timestamptz[])
+                AS u(machine_id, is_alive, response_time, checked_at)
+            WHERE EXISTS (SELECT 1 FROM machines m WHERE m.id = u.machine_id)
+        )
+        """
+    ),
+)
+
+# Persists a probe that changed a machine's status: status, latest ping and last_seen,
+# a failure log entry when it became unreachable, the ping row and its aggregates
+RECORD_STATUS_CHANGE = register_statement(
+    "ping_status.record_status_change",
+    _with_aggregates(
+        """
+        machine AS (
+            UPDATE machines
+            SET status = $2::text,
+                last_seen = GREATEST(last_seen, $5::timestamptz),
+                last_ping_alive = $3::bool,
+                last_ping_response_time = $4::float8,
+                last_ping_at = $5::timestamptz
+            WHERE id = $1::int
+            RETURNING id, hostname, ip_address, mac_address
+        ),
+        failure_log AS (
+            INSERT INTO failure_logs (machine_id, hostname, ip_address, mac_address)
+            SELECT id, hostname, ip_address, mac_address
+            FROM machine
+            WHERE $2::text = 'unreachable'
+        ),
+        batch AS (
+            INSERT INTO ping_status
+                (machine_id, is_alive, response_time, checked_at,
+                 consecutive_failures, next_check_interval)
+            SELECT id, $3::bool, $4::float8, $5::timestamptz, $6::int, $7::int
+            FROM machine
+            RETURNING machine_id, is_alive, response_time, checked_at
+        )
+        """
+    ),
+)
+
+# Stores the latest ping result of a batch of machines (see update_machines_latest_ping)
+UPDATE_LATEST_PING = register_statement("machines.update_latest_ping", """
+    UPDATE machines m
+    SET last_ping_alive = u.is_alive,
+        last_ping_response_time = u.response_time,
+        last_ping_at = u.checked_at,
+        last_seen = CASE
+            WHEN u.is_alive THEN GREATEST(m.last_seen, u.checked_at)
+            ELSE m.last_seen
+        END
+    FROM unnest($1::int[], $2::bool[], $3::float8[], $4::timestamptz[])
+        AS u(id, is_alive, response_time, checked_at)
+    WHERE m.id = u.id
+      AND (m.last_ping_at IS NULL OR m.last_ping_at < u.checked_at)
+""")
 
+
+@metrics.timed_methods(metrics.DB_CALL_SECONDS)
 class PingStatusService:
     """Service for ping status database operations."""
 
@@ -37,66 +183,76 @@ class PingStatusService:
             )
             return record_id
 
-    async def update_machine_status_on_failure(
-        self, machine_id: int, consecutive_failures: int
+    async def create_ping_statuses(
+        self, records: list[tuple[int, bool, float | None, datetime, int, int]]
     ) -> None:
         """
-        Update machine status when failure threshold is reached.
+        Bulk insert ping status records with a single COPY.
+
+        COPY is all-or-nothing, so if a machine was deleted while its results
+        were buffered the batch is retried as an INSERT that skips rows of
+        machines that no longer exist. The 5-minute and hourly aggregates are
+        updated in the same transaction, so they always match the raw rows.
 
         Args:
-            machine_id: Machine ID
-            consecutive_failures: Number of consecutive failures
+            records: Tuples in PING_STATUS_COLUMNS order
         """
+        if not records:
+            return
+
+        columns = list(zip(*records))
+
         async with self.db_pool.acquire() as conn:
-            # Check if we've reached failure threshold
-            from ..config import settings
-
-            if consecutive_failures >= settings.failure_threshold:
-                # Update machine status to unreachable
-                await conn.execute(
-                    """
-                    UPDATE machines
-                    SET status = 'unreachable',
-                        last_seen = CURRENT_TIMESTAMP
-                    WHERE id = $1
-                    """,
-                    machine_id,
-                )
-
-                # Create failure log
-                machine = await conn.fetchrow(
-                    "SELECT hostname, ip_address, mac_address FROM machines WHERE id = $1",
-                    machine_id,
-                )
-
-                if machine:
+            async with conn.transaction():
+                try:
+                    async with conn.transaction():  # Savepoint, so the fallback can run
+                        await conn.copy_records_to_table(
+                            "ping_status", records=records, columns=PING_STATUS_COLUMNS
+                        )
+                except asyncpg.ForeignKeyViolationError:
                     await conn.execute(
                         """
-                        INSERT INTO failure_logs (machine_id, hostname, ip_address, mac_address)
-                        VALUES ($1, $2, $3, $4)
+                        INSERT INTO ping_status
+                            (machine_id, is_alive, response_time, checked_at,
+                             consecutive_failures, next_check_interval)
+                        SELECT u.*
+                        FROM unnest(
+                            $1::int[], $2::bool[], $3::float8[], $4::timestamptz[],
+                            $5::int[], $6::int[]
+                        ) AS u(machine_id, is_alive, response_time, checked_at,
+                               consecutive_failures, next_check_interval)
+                        WHERE EXISTS (SELECT 1 FROM machines m WHERE m.id = u.machine_id)
                         """,
-                        machine_id,
-                        machine["hostname"],
-                        machine["ip_address"],
-                        machine["mac_address"],
+                        *columns,
                     )
 
-    async def update_machine_status_on_recovery(self, machine_id: int) -> None:
+                await (await conn.prepared(UPDATE_AGGREGATES)).fetch(*columns[:4])
+
+    async def record_status_change(
+        self, ping_data: PingStatusCreate, status: str, checked_at: datetime
+    ) -> None:
         """
-        Update machine status when it recovers from failure.
+        Persist a ping result that changed a machine's status, in one statement.
+
+        Updates the machine's status, latest ping and last_seen, logs a
+        failure when it became unreachable, and inserts the ping row and its
+        aggregates, atomically and in one round trip. Does nothing if the
+        machine was deleted.
 
         Args:
-            machine_id: Machine ID
+            ping_data: Ping result with the monitor state after the check
+            status: New status ('active' or 'unreachable')
+            checked_at: Time of the ping
         """
         async with self.db_pool.acquire() as conn:
-            await conn.execute(
-                """
-                UPDATE machines
-                SET status = 'active',
-                    last_seen = CURRENT_TIMESTAMP
-                WHERE id = $1
-                """,
-                machine_id,
+            await (await conn.prepared(RECORD_STATUS_CHANGE)).fetch(
+                ping_data.machine_id,
+                status,
+                ping_data.is_alive,
+                ping_data.response_time,
+                checked_at,
+                ping_data.consecutive_failures,
+                ping_data.next_check_interval,
             )
 
     async def update_machine_last_seen(self, machine_id: int) -> None:
@@ -115,3 +271,84 @@ class PingStatusService:
                 """,
                 machine_id,
             )
+
+    async def update_machines_latest_ping(
+        self,
+        machine_ids: list[int],
+        is_alive: list[bool],
+        response_times: list[float | None],
+        checked_at: list[datetime],
+    ) -> None:
+        """
+        Store the latest ping result of many machines in one statement.
+
+        Sets the denormalized last_ping_* columns, and last_seen for machines
+        that answered. Results older than the stored ones are ignored, so a
+        late flush never moves the values backwards.
+
+        Args:
+            machine_ids: Machine IDs
+            is_alive: Ping result for each machine ID
+            response_times: Ping response time in ms for each machine ID
+            checked_at: Time of the ping for each machine ID
+        """
+        if not machine_ids:
+            return
+
+        async with self.db_pool.acquire() as conn:
+            await (await conn.prepared(UPDATE_LATEST_PING)).fetch(
+                machine_ids, is_alive, response_times, checked_at
+            )
+
+    async def get_machines_with_latest_ping(self) -> list[Record]:
+        """
+        Get all machines with the monitoring state of their latest ping, in one query.
+
+        Returns:
+            Records with id, ip_address (text), hostname and, from the latest
+            ping_status row (NULL if the machine was never pinged), checked_at,
+            is_alive, consecutive_failures and next_check_interval
+        """
+        async with self.db_pool.acquire() as conn:
+            return await conn.fetch(
+                """
+                SELECT m.id, host(m.ip_address) AS ip_address, m.hostname,
+                       p.checked_at, p.is_alive, p.consecutive_failures, p.next_check_interval
+                FROM machines m
+                LEFT JOIN LATERAL (
+                    SELECT checked_at, is_alive, consecutive_failures, next_check_interval
+                    FROM ping_status
+                    WHERE machine_id = m.id
+                    ORDER BY checked_at DESC
+                    LIMIT 1
+                ) p ON true
+                """
+            )
+
+    async def get_latest_ping_states(self, machine_ids: list[int]) -> list[Record]:
+        """
+        Get the monitoring state of the latest ping of several machines.
+
+        Args:
+            machine_ids: Machine IDs
+
+        Returns:
+            Records with id, checked_at, is_alive, consecutive_failures and
+            next_check_interval (machines never pinged are omitted)
+        """
+        async with self.db_pool.acquire() as conn:
+            return await conn.fetch(
+                """
+                SELECT m.id, p.checked_at, p.is_alive, p.consecutive_failures,
+                       p.next_check_interval
+                FROM unnest($1::int[]) AS m(id)
+                CROSS JOIN LATERAL (
+                    SELECT checked_at, is_alive, consecutive_failures, next_check_interval
+                    FROM ping_status
+                    WHERE machine_id = m.id
+                    ORDER BY checked_at DESC
+                    LIMIT 1
+                ) p
+                """,
+                machine_ids,
+            )
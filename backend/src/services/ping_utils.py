@@ -1,17 +1,28 @@
 """Ping utility functions using icmplib."""
 import asyncio
 import logging
+import time
 
 from icmplib import async_ping
 from icmplib.models import Host
 
+from .. import metrics
 from ..config import settings
+from .icmp_engine import ICMPEngine
 
 logger = logging.getLogger(__name__)
 
 # Global semaphore for controlling concurrent ping operations
 PING_SEMAPHORE = asyncio.Semaphore(settings.max_parallel_pings)
 
+# Shared multi-host ICMP engine used by ping_many
+icmp_engine = ICMPEngine(privileged=settings.ping_privileged)
+
+# Metric children updated for every sweep
+_PING_RTT = metrics.PING_RTT_SECONDS.labels()
+_PINGS_ALIVE = metrics.PINGS.labels("alive")
+_PINGS_TIMEOUT = metrics.PINGS.labels("timeout")
+
 
 async def ping_host(address: str, timeout: int | None = None) -> tuple[bool, float | None]:
     """
@@ -35,7 +46,7 @@ async def ping_host(address: str, timeout: int | None = None) -> tuple[bool, flo
                 str(address),  # Convert to string in case IPv4Address object is passed
                 count=1,
                 timeout=timeout,
-                privileged=True,  # Requires CAP_NET_RAW capability
+                privileged=settings.ping_privileged,  # Raw sockets require CAP_NET_RAW
             )
 
             if host.is_alive:
@@ -49,3 +60,55 @@ async def ping_host(address: str, timeout: int | None = None) -> tuple[bool, flo
         # Log error and treat as down
         logger.error(f"Error pinging {address}: {e}")
         return False, None
+
+
+async def ping_many(
+    addresses: list[str], timeout: int | None = None
+) -> dict[str, tuple[bool, float | None]]:
+    """
+    Execute ICMP ping to many hosts at once over a shared socket.
+
+    Falls back to one ping_host call per address if the shared ICMP socket
+    cannot be opened.
+
+    Args:
+        addresses: IP addresses to ping
+        timeout: Timeout in seconds (default: from settings)
+
+    Returns:
+        Mapping of address to (is_alive, response_time_ms)
+    """
+    if timeout is None:
+        timeout = settings.ping_timeout
+
+    started = time.perf_counter()
+    try:
+        results = await icmp_engine.ping_many(addresses, timeout)
+    except OSError as e:
+        logger.warning(f"Shared ICMP socket unavailable ({e}), pinging hosts individually")
+        results = dict(
+            zip(
+                addresses,
+                await asyncio.gather(*(ping_host(address, timeout) for address in addresses)),
+            )
+        )
+
+    _record_sweep(results, time.perf_counter() - started)
+    return results
+
+
+def _record_sweep(results: dict[str, tuple[bool, float | None]], duration: float) -> None:
+    """Record sweep duration, round-trip times and timeouts."""
+    metrics.PING_SWEEP_SECONDS.observe(duration)
+
+    observe_rtt = _PING_RTT.observe
+    timeouts = 0
+    for is_alive, response_time in results.values():
+        if is_alive:
+            if response_time is not None:
+                observe_rtt(response_time / 1000)
+        else:
+            timeouts += 1
+
+    _PINGS_ALIVE.inc(len(results) - timeouts)
+    _PINGS_TIMEOUT.inc(timeouts)
@@ -0,0 +1,83 @@
+"""Bounded log of broadcast status updates for resuming WebSocket clients."""
+import secrets
+from collections import deque
+from typing import Any
+
+
+class ReplayBuffer:
+    """
+    Ring buffer of sequence-numbered status updates.
+
+    Every broadcast update gets the next sequence number. A reconnecting
+    client reports the last sequence number it received and gets the newest
+    update of each machine changed since then, as long as those updates are
+    still buffered. Sequence numbers are only meaningful within one
+    ``epoch``, which is generated per process, so clients resuming after a
+    server restart are detected and get a snapshot instead.
+    """
+
+    def __init__(self, size: int):
+        """
+        Initialize replay buffer.
+
+        Args:
+            size: Maximum number of buffered updates
+        """
+        self.epoch = secrets.token_hex(6)
+        self.seq = 0
+        self._events: deque[tuple[int, dict[str, Any], str | None]] = deque(maxlen=size)
+
+    def append(self, updates: list[dict], previous_statuses: dict[int, str]) -> int:
+        """
+        Record broadcast updates.
+
+        Args:
+            updates: Status updates in broadcast order
+            previous_statuses: Status last sent for machines whose status changed
+
+        Returns:
+            Sequence number of the last recorded update
+        """
+        for update in updates:
+            self.seq += 1
+            self._events.append((self.seq, update, previous_statuses.get(update["machine_id"])))
+        return self.seq
+
+    def since(
+        self, seq: int, epoch: str | None
+    ) -> dict[int, tuple[dict[str, Any], set[str]]] | None:
+        """
+        Collect what changed after a sequence number.
+
+        Args:
+            seq: Last sequence number the client received
+            epoch: Epoch the sequence number belongs to
+
+        Returns:
+            Newest update per machine together with every status the machine
+            had during the gap, or None if the gap cannot be replayed (other
+            epoch, unknown sequence number, or updates already evicted)
+        """
+        if epoch != self.epoch or seq < 0 or seq > self.seq:
+            return None
+
+        oldest = self._events[0][0] if self._events else self.seq + 1
+        if seq < oldest - 1:
+            return None
+
+        changes: dict[int, tuple[dict[str, Any], set[str]]] = {}
+        for event_seq, update, previous_status in reversed(self._events):
+            if event_seq <= seq:
+                break
+
+            machine_id = update["machine_id"]
+            if machine_id not in changes:
+                changes[machine_id] = (update, set())
+
+            statuses = changes[machine_id][1]
+            statuses.add(update["status"])
+            if previous_status is not None:
+                statuses.add(previous_status)
+
+        # Replay in the order the newest updates were originally sent
+        return dict(reversed(list(changes.items())))
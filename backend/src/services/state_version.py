@@ -0,0 +1,45 @@
+"""Global version of the machine state served by the API."""
+import secrets
+
+
+class StateVersion:
+    """
+    Monotonically increasing version of machines and their status.
+
+    Bumped whenever a change becomes visible through the API: machine
+    upserts and deletes, status or liveness changes detected by the monitor,
+    and flushes of the latest ping results. Responses built at one version
+    can be reused (and answered with 304) until it moves. The epoch makes
+    versions from before a restart distinct from the current ones.
+    """
+
+    def __init__(self):
+        """Initialize version for this process."""
+        self.epoch = secrets.token_hex(4)
+        self.value = 0
+
+    def bump(self) -> int:
+        """
+        Record a change.
+
+        Returns:
+            New version
+        """
+        self.value += 1
+        return self.value
+
+    def etag(self, version: int | None = None) -> str:
+        """
+        Get the ETag for a version.
+
+        Args:
+            version: Version (default: current)
+
+        Returns:
+            Quoted strong ETag
+        """
+        return f'"{self.epoch}-{self.value if version is None else version}"'
+
+
+# Global state version instance
+state_version = StateVersion()
@@ -0,0 +1,117 @@
+"""In-memory read model of the latest ping status of each machine."""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+
+@dataclass
+class LatestStatus:
+    """Latest known ping status of a machine."""
+
+    status: str  # 'active' or 'unreachable'
+    is_alive: bool
+    response_time: float | None
+    checked_at: datetime
+    last_seen: datetime | None = None
+
+
+class StatusCache:
+    """
+    Latest ping status per machine, kept up to date by the monitor.
+
+    API reads overlay these values on machine rows, so listing machines does
+    not need to look up the newest ping_status row of every machine. Machines
+    without an entry (monitor not running, not yet probed) fall back to the
+    denormalized machines.last_ping_* columns.
+    """
+
+    def __init__(self):
+        """Initialize empty cache."""
+        self._entries: dict[int, LatestStatus] = {}
+
+    def update(
+        self,
+        machine_id: int,
+        status: str,
+        is_alive: bool,
+        response_time: float | None,
+        checked_at: datetime,
+        last_seen: datetime | None = None,
+    ) -> LatestStatus:
+        """
+        Record the result of a ping.
+
+        Args:
+            machine_id: Machine ID
+            status: Machine status after this ping ('active' or 'unreachable')
+            is_alive: Ping result
+            response_time: Ping response time in ms
+            checked_at: Time of the ping
+            last_seen: Last successful ping, if known from elsewhere (default:
+                ``checked_at`` if alive, else the previously cached value)
+
+        Returns:
+            Updated cache entry
+        """
+        entry = self._entries.get(machine_id)
+        if last_seen is None:
+            last_seen = checked_at if is_alive else (entry.last_seen if entry else None)
+
+        entry = LatestStatus(
+            status=status,
+            is_alive=is_alive,
+            response_time=response_time,
+            checked_at=checked_at,
+            last_seen=last_seen,
+        )
+        self._entries[machine_id] = entry
+        return entry
+
+    def get(self, machine_id: int) -> LatestStatus | None:
+        """Get the latest status of a machine."""
+        return self._entries.get(machine_id)
+
+    def remove(self, machine_id: int) -> None:
+        """Forget a machine (e.g. after deletion)."""
+        self._entries.pop(machine_id, None)
+
+    def clear(self) -> None:
+        """Forget all machines."""
+        self._entries.clear()
+
+    def items(self) -> list[tuple[int, LatestStatus]]:
+        """Get a snapshot of all cached entries."""
+        return list(self._entries.items())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def apply(self, machine: dict[str, Any]) -> dict[str, Any]:
+        """
+        Overlay the cached status on a machine row.
+
+        Args:
+            machine: Machine row as a dict (must contain 'id')
+
+        Returns:
+            The same dict, with status, is_alive, response_time and last_seen
+            replaced by cached values when the machine is cached
+        """
+        entry = self._entries.get(machine["id"])
+        if entry is None:
+            return machine
+
+        machine["status"] = entry.status
+        machine["is_alive"] = entry.is_alive
+        machine["response_time"] = entry.response_time
+
+        if entry.last_seen is not None and (
+            machine.get("last_seen") is None or entry.last_seen > machine["last_seen"]
+        ):
+            machine["last_seen"] = entry.last_seen
+
+        return machine
+
+
+# Global status cache instance, written by the monitor and read by the API
+status_cache = StatusCache()
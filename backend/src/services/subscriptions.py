@@ -0,0 +1,298 @@
+"""WebSocket status subscriptions and the index routing updates to them."""
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from ipaddress import IPv4Address, IPv4Network, IPv6Address, IPv6Network, ip_address, ip_network
+from typing import Any, Generic, TypeVar
+
+STATUSES = ("active", "unreachable")
+
+Client = TypeVar("Client")
+
+
+def _as_list(value: Any) -> list:
+    """Accept a single value or a list of values."""
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    return [value]
+
+
+@dataclass(frozen=True)
+class Subscription:
+    """
+    Filter selecting which status updates a client receives.
+
+    Machine selectors (IDs, CIDRs, hostname prefixes) are OR'ed together; the
+    status filter is AND'ed with them. A subscription without selectors
+    matches every machine, and one without a status filter matches every
+    status.
+    """
+
+    statuses: frozenset[str] | None = None
+    machine_ids: frozenset[int] = frozenset()
+    networks: tuple[IPv4Network | IPv6Network, ...] = ()
+    hostname_prefixes: tuple[str, ...] = ()
+
+    @classmethod
+    def from_message(cls, message: dict[str, Any]) -> "Subscription":
+        """
+        Build a subscription from a client subscribe message.
+
+        Args:
+            message: Message with optional 'status', 'machine_ids', 'cidr' and
+                'hostname_prefix' fields (each a single value or a list)
+
+        Returns:
+            Parsed subscription
+
+        Raises:
+            ValueError: If a field is invalid
+        """
+        statuses = _as_list(message.get("status"))
+        for status in statuses:
+            if status not in STATUSES:
+                raise ValueError("status must be 'active' or 'unreachable'")
+
+        machine_ids = _as_list(message.get("machine_ids"))
+        for machine_id in machine_ids:
+            if not isinstance(machine_id, int) or isinstance(machine_id, bool):
+                raise ValueError("machine_ids must be integers")
+
+        networks = []
+        for cidr in _as_list(message.get("cidr")):
+            try:
+                networks.append(ip_network(str(cidr), strict=False))
+            except ValueError:
+                raise ValueError(f"Invalid CIDR: {cidr}")
+
+        prefixes = _as_list(message.get("hostname_prefix"))
+        for prefix in prefixes:
+            if not isinstance(prefix, str) or not prefix:
+                raise ValueError("hostname_prefix must be a non-empty string")
+
+        return cls(
+            statuses=frozenset(statuses) if statuses else None,
+            machine_ids=frozenset(machine_ids),
+            networks=tuple(sorted(set(networks), key=str)),
+            hostname_prefixes=tuple(sorted(set(prefixes))),
+        )
+
+    @property
+    def is_unfiltered(self) -> bool:
+        """Whether the subscription matches every update."""
+        return self.statuses is None and not self.has_selectors
+
+    @property
+    def has_selectors(self) -> bool:
+        """Whether the subscription is limited to selected machines."""
+        return bool(self.machine_ids or self.networks or self.hostname_prefixes)
+
+    @property
+    def has_attribute_selectors(self) -> bool:
+        """Whether matching depends on machine addresses or hostnames."""
+        return bool(self.networks or self.hostname_prefixes)
+
+    def selects(
+        self,
+        machine_id: int,
+        address: IPv4Address | IPv6Address | None,
+        hostname: str | None,
+    ) -> bool:
+        """Check whether a machine is picked by the machine selectors."""
+        if machine_id in self.machine_ids:
+            return True
+        if address is not None and any(address in network for network in self.networks):
+            return True
+        if hostname is not None and hostname.startswith(self.hostname_prefixes):
+            return True
+        return False
+
+    def to_message(self) -> dict[str, Any]:
+        """Describe the effective filter for a 'subscribed' reply."""
+        return {
+            "status": sorted(self.statuses) if self.statuses else None,
+            "machine_ids": sorted(self.machine_ids),
+            "cidr": [str(network) for network in self.networks],
+            "hostname_prefix": list(self.hostname_prefixes),
+        }
+
+
+# Subscription of clients that did not send a filter
+ALL = Subscription()
+
+
+class SubscriptionIndex(Generic[Client]):
+    """
+    Maps machines and statuses to the subscriptions interested in them.
+
+    Clients with the same filter share one subscription entry, so an update
+    is routed per distinct filter rather than per connection, and one frame
+    can be serialized for all clients of a filter. CIDR and hostname prefix
+    selectors are resolved to machine IDs against a directory of known
+    machines that is kept current through ``register_machine`` and
+    ``unregister_machine``.
+    """
+
+    def __init__(self):
+        """Initialize empty index."""
+        self._clients: dict[Subscription, set[Client]] = {}
+        self._by_machine: dict[int, set[Subscription]] = defaultdict(set)
+        self._by_status: dict[str, set[Subscription]] = {status: set() for status in STATUSES}
+        self._resolved: dict[Subscription, set[int]] = {}
+        self._machines: dict[int, tuple[IPv4Address | IPv6Address, str]] = {}
+
+    def add(self, client: Client, subscription: Subscription) -> None:
+        """
+        Subscribe a client.
+
+        Args:
+            client: Client connection (must not be subscribed already)
+            subscription: Filter of the client
+        """
+        clients = self._clients.get(subscription)
+        if clients is None:
+            clients = self._clients[subscription] = set()
+            self._index(subscription)
+        clients.add(client)
+
+    def remove(self, client: Client, subscription: Subscription) -> None:
+        """
+        Unsubscribe a client.
+
+        Args:
+            client: Client connection
+            subscription: Filter the client was added with
+        """
+        clients = self._clients.get(subscription)
+        if clients is None:
+            return
+
+        clients.discard(client)
+        if not clients:
+            del self._clients[subscription]
+            self._unindex(subscription)
+
+    def clients(self, subscription: Subscription) -> set[Client]:
+        """Get the clients subscribed with a filter."""
+        return self._clients.get(subscription, set())
+
+    def subscriptions(self) -> list[Subscription]:
+        """Get all distinct filters in use."""
+        return list(self._clients)
+
+    def match(self, machine_id: int, statuses: Iterable[str]) -> set[Subscription]:
+        """
+        Find the filtered subscriptions interested in an update.
+
+        The unfiltered subscription (``ALL``) is never returned; it receives
+        every update.
+
+        Args:
+            machine_id: Machine ID
+            statuses: Statuses the update concerns (new and previous status)
+
+        Returns:
+            Matching subscriptions
+        """
+        statuses = set(statuses)
+
+        matched: set[Subscription] = set()
+        for status in statuses:
+            matched |= self._by_status.get(status, set())
+
+        for subscription in self._by_machine.get(machine_id, ()):
+            if subscription.statuses is None or subscription.statuses & statuses:
+                matched.add(subscription)
+
+        return matched
+
+    def includes(self, subscription: Subscription, machine_id: int, *statuses: str) -> bool:
+        """Check whether a machine in any of the given statuses is visible to a subscription."""
+        if subscription.statuses is not None and subscription.statuses.isdisjoint(statuses):
+            return False
+        if not subscription.has_selectors:
+            return True
+        return machine_id in self._resolved.get(subscription, set())
+
+    def register_machine(
+        self, machine_id: int, address: str | IPv4Address | IPv6Address, hostname: str
+    ) -> None:
+        """
+        Add or update a machine in the directory used by CIDR and prefix filters.
+
+        Args:
+            machine_id: Machine ID
+            address: Machine IP address
+            hostname: Machine hostname
+        """
+        address = ip_address(str(address))
+        self._machines[machine_id] = (address, hostname)
+
+        for subscription in self._resolved:
+            if not subscription.has_attribute_selectors:
+                continue
+
+            resolved = self._resolved[subscription]
+            if subscription.selects(machine_id, address, hostname):
+                resolved.add(machine_id)
+                self._by_machine[machine_id].add(subscription)
+            elif machine_id not in subscription.machine_ids:
+                resolved.discard(machine_id)
+                self._discard_machine(machine_id, subscription)
+
+    def machine_ids(self) -> list[int]:
+        """IDs of all machines in the directory."""
+        return list(self._machines)
+
+    def unregister_machine(self, machine_id: int) -> None:
+        """
+        Remove a deleted machine from the directory and all filters.
+
+        Args:
+            machine_id: Machine ID
+        """
+        self._machines.pop(machine_id, None)
+        for subscription in self._by_machine.pop(machine_id, set()):
+            self._resolved[subscription].discard(machine_id)
+
+    def _index(self, subscription: Subscription) -> None:
+        """Insert a new filter into the lookup tables."""
+        if subscription.is_unfiltered:
+            return
+
+        if not subscription.has_selectors:
+            for status in subscription.statuses:
+                self._by_status[status].add(subscription)
+            return
+
+        resolved = set(subscription.machine_ids)
+        if subscription.has_attribute_selectors:
+            resolved.update(
+                machine_id
+                for machine_id, (address, hostname) in self._machines.items()
+                if subscription.selects(machine_id, address, hostname)
+            )
+
+        self._resolved[subscription] = resolved
+        for machine_id in resolved:
+            self._by_machine[machine_id].add(subscription)
+
+    def _unindex(self, subscription: Subscription) -> None:
+        """Remove a filter no client uses anymore from the lookup tables."""
+        for subscriptions in self._by_status.values():
+            subscriptions.discard(subscription)
+
+        for machine_id in self._resolved.pop(subscription, set()):
+            self._discard_machine(machine_id, subscription)
+
+    def _discard_machine(self, machine_id: int, subscription: Subscription) -> None:
+        """Remove one machine entry of a filter, dropping empty buckets."""
+        subscriptions = self._by_machine.get(machine_id)
+        if subscriptions is None:
+            return
+
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._by_machine[machine_id]
@@ -1,16 +1,133 @@
 """WebSocket connection manager for real-time status updates."""
+import asyncio
 import json
-from typing import Set
+import logging
+import time
+from ipaddress import IPv4Address, IPv6Address
+from typing import Any
 
 from fastapi import WebSocket
 
+from .. import metrics
+from ..config import settings
+from .replay_buffer import ReplayBuffer
+from .status_cache import status_cache
+from .subscriptions import ALL, Subscription, SubscriptionIndex
+
+logger = logging.getLogger(__name__)
+
+# Slow-consumer policies
+POLICY_DROP = "drop"  # Disconnect clients whose send queue overflows
+POLICY_RESYNC = "resync"  # Discard queued frames and send one snapshot instead
+
+# Queue marker telling a writer to send a fresh snapshot frame
+RESYNC = object()
+
+_BROADCAST_SECONDS = metrics.WS_BROADCAST_SECONDS.labels()
+
+
+class ClientConnection:
+    """A connected WebSocket client with its own bounded send queue and writer task."""
+
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        """
+        Initialize client connection.
+
+        Args:
+            websocket: Accepted WebSocket connection
+            queue_size: Maximum frames waiting to be sent
+        """
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.resync_pending = False
+        self.writer_task: asyncio.Task | None = None
+        self.subscription = ALL
+
+        # Negotiated batch window; None means the server-wide window
+        self.batch_window: float | None = None
+        self.pending_updates: dict[int, dict] = {}
+        self.next_batch_at = 0.0
+
+    def enqueue(self, frame: str, droppable: bool = True) -> bool:
+        """
+        Queue a serialized frame without waiting.
+
+        Args:
+            frame: JSON-encoded message
+            droppable: Whether a pending snapshot makes the frame redundant
+                (True for status frames, False for control replies)
+
+        Returns:
+            False if the queue is full
+        """
+        if droppable and self.resync_pending:
+            return True  # The pending snapshot will include this change
+
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def request_resync(self, reply: str | None = None) -> None:
+        """
+        Drop all queued frames and queue a snapshot instead.
+
+        Args:
+            reply: Control frame to send ahead of the snapshot
+        """
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+        self.pending_updates.clear()
+        self.resync_pending = True
+        if reply is not None:
+            self.queue.put_nowait(reply)
+        self.queue.put_nowait(RESYNC)
+
 
 class WebSocketManager:
-    """Manages WebSocket connections and broadcasts messages."""
+    """
+    Manages WebSocket connections and broadcasts messages.
+
+    Every connection gets a bounded send queue drained by its own writer task,
+    so broadcasting only serializes the message once and enqueues it; a slow
+    client never delays other clients or the caller. Clients whose queue
+    overflows are handled by ``slow_client_policy``.
+
+    Status batches are routed through a ``SubscriptionIndex``: each update is
+    looked up by machine ID and status to find the filters interested in it,
+    and one frame is serialized per filter, so the work per batch grows with
+    the number of matching filters rather than the number of connections.
+
+    Broadcast updates are also recorded in a ``ReplayBuffer``. status_batch
+    frames carry the sequence number of the newest recorded update, so a
+    reconnecting client can ``resume`` from the last one it received and get
+    only the updates it missed.
+    """
+
+    def __init__(self, queue_size: int | None = None, slow_client_policy: str | None = None):
+        """
+        Initialize connection manager.
+
+        Args:
+            queue_size: Per-client send queue size (default: from settings)
+            slow_client_policy: 'drop' or 'resync' (default: from settings)
+        """
+        self.queue_size = queue_size or settings.ws_send_queue_size
+        self.slow_client_policy = slow_client_policy or settings.ws_slow_client_policy
+        self.clients: dict[WebSocket, ClientConnection] = {}
+        self.index: SubscriptionIndex[ClientConnection] = SubscriptionIndex()
+        self._windowed_clients: set[ClientConnection] = set()
+        self._close_tasks: set[asyncio.Task] = set()
+        self.replay = ReplayBuffer(settings.ws_replay_buffer_size)
+        self.dropped_clients = 0
+        self.resyncs = 0
 
-    def __init__(self):
-        """Initialize connection manager."""
-        self.active_connections: Set[WebSocket] = set()
+    @property
+    def active_connections(self) -> set[WebSocket]:
+        """Currently connected WebSockets."""
+        return set(self.clients)
 
     async def connect(self, websocket: WebSocket) -> None:
         """
@@ -20,42 +137,347 @@ class WebSocketManager:
             websocket: WebSocket connection to register
         """
         await websocket.accept()
-        self.active_connections.add(websocket)
-        print(f"WebSocket connected. Total connections: {len(self.active_connections)}")
+
+        client = ClientConnection(websocket, self.queue_size)
+        client.writer_task = asyncio.create_task(self._writer(client))
+        self.clients[websocket] = client
+        self.index.add(client, client.subscription)
+        logger.info(f"WebSocket connected. Total connections: {len(self.clients)}")
 
     def disconnect(self, websocket: WebSocket) -> None:
         """
-        Remove a WebSocket connection.
+        Remove a WebSocket connection and stop its writer task.
 
         Args:
             websocket: WebSocket connection to remove
         """
-        self.active_connections.discard(websocket)
-        print(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
+        client = self.clients.pop(websocket, None)
+        if client is None:
+            return
+
+        self.index.remove(client, client.subscription)
+        self._windowed_clients.discard(client)
+
+        if client.writer_task is not None and client.writer_task is not asyncio.current_task():
+            client.writer_task.cancel()
+
+        logger.info(f"WebSocket disconnected. Total connections: {len(self.clients)}")
+
+    def send(self, websocket: WebSocket, message: dict) -> None:
+        """
+        Queue a message for a single client.
+
+        Args:
+            websocket: Target WebSocket connection
+            message: Dictionary message (will be JSON-encoded)
+        """
+        client = self.clients.get(websocket)
+        if client is not None and not client.enqueue(json.dumps(message), droppable=False):
+            self._handle_slow_client(client)
+
+    def subscribe(
+        self,
+        websocket: WebSocket,
+        subscription: Subscription,
+        since: int | None = None,
+        epoch: str | None = None,
+        reply: dict | None = None,
+    ) -> None:
+        """
+        Replace the filter of a client.
+
+        Frames still queued for the old filter are discarded and the client
+        gets a snapshot of the machines matching the new one. A reconnecting
+        client that passes ``since`` gets the missed updates matching the
+        filter instead, if they can still be replayed.
+
+        Args:
+            websocket: Client WebSocket connection
+            subscription: New filter (``ALL`` to receive every update)
+            since: Last sequence number the client received
+            epoch: Epoch of ``since``
+            reply: Message to send ahead of the snapshot or missed updates
+        """
+        client = self.clients.get(websocket)
+        if client is None:
+            return
+
+        self.index.remove(client, client.subscription)
+        client.subscription = subscription
+        self.index.add(client, subscription)
+
+        reply_frame = json.dumps(reply) if reply is not None else None
+        changes = self.replay.since(since, epoch) if since is not None else None
+        if changes is None:
+            client.request_resync(reply_frame)
+            return
+
+        if reply_frame is not None and not client.enqueue(reply_frame, droppable=False):
+            self._handle_slow_client(client)
+            return
+        self._replay(client, changes)
+
+    def resume(self, websocket: WebSocket, since: int, epoch: str | None) -> bool:
+        """
+        Send a reconnecting client the updates it missed.
+
+        Falls back to a snapshot if the gap is no longer in the replay buffer
+        or belongs to another epoch (server restart).
+
+        Args:
+            websocket: Client WebSocket connection
+            since: Last sequence number the client received
+            epoch: Epoch of ``since``
+
+        Returns:
+            True if the gap was replayed, False if a snapshot was queued
+        """
+        client = self.clients.get(websocket)
+        if client is None:
+            return False
+
+        changes = self.replay.since(since, epoch)
+        if changes is None:
+            client.request_resync()
+            return False
+
+        self._replay(client, changes)
+        return True
+
+    def _replay(
+        self, client: ClientConnection, changes: dict[int, tuple[dict[str, Any], set[str]]]
+    ) -> None:
+        """Queue the changes from ``ReplayBuffer.since`` that match the client's filter."""
+        updates = [
+            update
+            for machine_id, (update, statuses) in changes.items()
+            if self.index.includes(client.subscription, machine_id, *statuses)
+        ]
+        self._send_batch(client, updates)
+
+    def register_machine(
+        self, machine_id: int, ip_address: str | IPv4Address | IPv6Address, hostname: str
+    ) -> None:
+        """
+        Make a new or updated machine known to CIDR and hostname prefix filters.
+
+        Args:
+            machine_id: Machine ID
+            ip_address: Machine IP address
+            hostname: Machine hostname
+        """
+        self.index.register_machine(machine_id, ip_address, hostname)
+
+    def unregister_machine(self, machine_id: int) -> None:
+        """
+        Remove a deleted machine from all filters.
+
+        Args:
+            machine_id: Machine ID
+        """
+        self.index.unregister_machine(machine_id)
+
+    def set_batch_window(self, websocket: WebSocket, batch_ms: int) -> int:
+        """
+        Negotiate the status batch window of a client.
+
+        Windows are clamped between the server-wide window and
+        WS_BATCH_WINDOW_MAX_MS.
+
+        Args:
+            websocket: Client WebSocket connection
+            batch_ms: Requested window in milliseconds
+
+        Returns:
+            Effective window in milliseconds
+        """
+        batch_ms = max(settings.ws_batch_window_ms, min(batch_ms, settings.ws_batch_window_max_ms))
+
+        client = self.clients.get(websocket)
+        if client is not None:
+            if batch_ms == settings.ws_batch_window_ms:
+                client.batch_window = None
+                self._windowed_clients.discard(client)
+                self._send_batch(client, list(client.pending_updates.values()))
+                client.pending_updates.clear()
+            else:
+                client.batch_window = batch_ms / 1000
+                self._windowed_clients.add(client)
+
+        return batch_ms
+
+    def broadcast_batch(
+        self, updates: list[dict], previous_statuses: dict[int, str] | None = None
+    ) -> None:
+        """
+        Send a batch of status updates as status_batch frames.
+
+        Each update goes to the clients whose filter matches it. A client
+        filtering on status also gets the update that moves a machine out of
+        that status, so it can drop the machine from its view.
+
+        Clients on the server-wide window share one frame per filter.
+        Clients with a longer negotiated window accumulate their updates
+        (newest per machine) and get their own frame once their window has
+        elapsed.
+
+        Args:
+            updates: Status updates collected during the last server-wide window
+            previous_statuses: Status last sent for machines whose status changed
+        """
+        previous_statuses = previous_statuses or {}
+
+        # Recorded even without clients so reconnecting clients can resume
+        if updates:
+            self.replay.append(updates, previous_statuses)
+
+        if not self.clients:
+            return
+
+        started = time.perf_counter()
+        routed: dict[Subscription, list[dict]] = {}
+        if updates:
+            if self.index.clients(ALL):
+                routed[ALL] = updates
+
+            for update in updates:
+                machine_id = update["machine_id"]
+                statuses = {update["status"]}
+                if machine_id in previous_statuses:
+                    statuses.add(previous_statuses[machine_id])
+
+                for subscription in self.index.match(machine_id, statuses):
+                    routed.setdefault(subscription, []).append(update)
+
+        for subscription, subscription_updates in routed.items():
+            frame = None
+            for client in list(self.index.clients(subscription)):
+                if client.batch_window is not None:
+                    for update in subscription_updates:
+                        client.pending_updates[update["machine_id"]] = update
+                    continue
+
+                if frame is None:
+                    frame = json.dumps(
+                        {
+                            "type": "status_batch",
+                            "seq": self.replay.seq,
+                            "updates": subscription_updates,
+                        }
+                    )
+                if not client.enqueue(frame):
+                    self._handle_slow_client(client)
+
+        if self._windowed_clients:
+            now = asyncio.get_running_loop().time()
+            for client in list(self._windowed_clients):
+                if now >= client.next_batch_at:
+                    client.next_batch_at = now + client.batch_window
+                    if client.pending_updates:
+                        self._send_batch(client, list(client.pending_updates.values()))
+                        client.pending_updates.clear()
+
+        _BROADCAST_SECONDS.observe(time.perf_counter() - started)
+
+    def _send_batch(self, client: ClientConnection, updates: list[dict]) -> None:
+        """Queue a status_batch frame for a single client."""
+        if not updates:
+            return
+
+        frame = json.dumps({"type": "status_batch", "seq": self.replay.seq, "updates": updates})
+        if not client.enqueue(frame):
+            self._handle_slow_client(client)
 
     async def broadcast(self, message: dict) -> None:
         """
         Broadcast a message to all connected clients.
 
+        Serializes once and enqueues the frame for every client without
+        waiting for any send to complete.
+
         Args:
             message: Dictionary message to broadcast (will be JSON-encoded)
         """
-        if not self.active_connections:
+        if not self.clients:
             return
 
-        message_json = json.dumps(message)
-        disconnected = set()
+        frame = json.dumps(message)
+
+        for client in list(self.clients.values()):
+            if not client.enqueue(frame):
+                self._handle_slow_client(client)
+
+    def build_snapshot(self, subscription: Subscription = ALL) -> dict:
+        """
+        Build a snapshot message with the latest status of every machine.
+
+        Args:
+            subscription: Only include machines matching this filter
+
+        Returns:
+            Snapshot message
+        """
+        machines = []
+        for machine_id, entry in status_cache.items():
+            if not self.index.includes(subscription, machine_id, entry.status):
+                continue
+
+            machine = {
+                "machine_id": machine_id,
+                "status": entry.status,
+                "is_alive": entry.is_alive,
+                "response_time": entry.response_time,
+            }
+            # Omitted for machines not seen alive since the monitor started
+            if entry.last_seen is not None:
+                machine["last_seen"] = entry.last_seen.isoformat()
+            machines.append(machine)
+
+        return {
+            "type": "snapshot",
+            "epoch": self.replay.epoch,
+            "seq": self.replay.seq,
+            "machines": machines,
+        }
+
+    def _handle_slow_client(self, client: ClientConnection) -> None:
+        """Apply the slow-consumer policy to a client whose queue is full."""
+        if self.slow_client_policy == POLICY_RESYNC:
+            self.resyncs += 1
+            client.request_resync()
+            logger.warning("WebSocket client too slow, switching it to snapshot resync")
+            return
+
+        self.dropped_clients += 1
+        logger.warning("WebSocket client too slow, dropping connection")
+        self.disconnect(client.websocket)
+        task = asyncio.create_task(self._close(client.websocket))
+        self._close_tasks.add(task)
+        task.add_done_callback(self._close_tasks.discard)
+
+    async def _close(self, websocket: WebSocket) -> None:
+        """Close a dropped connection without waiting on a stalled client forever."""
+        try:
+            await asyncio.wait_for(websocket.close(code=1013), timeout=5)
+        except Exception:
+            pass
+
+    async def _writer(self, client: ClientConnection) -> None:
+        """Send queued frames of a single client in order."""
+        try:
+            while True:
+                frame = await client.queue.get()
 
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message_json)
-            except Exception as e:
-                print(f"Error sending to WebSocket: {e}")
-                disconnected.add(connection)
+                if frame is RESYNC:
+                    client.resync_pending = False
+                    frame = json.dumps(self.build_snapshot(client.subscription))
 
-        # Remove failed connections
-        for conn in disconnected:
-            self.disconnect(conn)
+                await client.websocket.send_text(frame)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning(f"Error sending to WebSocket: {e}")
+            self.disconnect(client.websocket)
 
 
 # Global WebSocket manager instance
@@ -0,0 +1,254 @@
+"""Write-behind buffers that batch monitor results into bulk database writes."""
+import asyncio
+import logging
+from collections.abc import Callable
+from datetime import UTC, datetime
+
+from asyncpg import Pool
+
+from ..config import settings
+from ..models import PingStatusCreate
+from .ping_status_service import PingStatusService
+from .state_version import state_version
+
+logger = logging.getLogger(__name__)
+
+
+class PingStatusWriter:
+    """
+    Buffers ping status records and flushes them with one COPY per batch.
+
+    A flush is triggered when ``batch_size`` records are buffered or every
+    ``flush_interval`` seconds, whichever comes first. ``add()`` blocks once
+    ``max_pending`` records are waiting, so a slow database slows the monitor
+    down instead of growing memory without bound.
+    """
+
+    def __init__(
+        self,
+        db_pool: Pool,
+        batch_size: int | None = None,
+        flush_interval: float | None = None,
+        max_pending: int | None = None,
+    ):
+        """
+        Initialize writer.
+
+        Args:
+            db_pool: Database connection pool
+            batch_size: Buffered records that trigger a flush (default: from settings)
+            flush_interval: Maximum seconds between flushes (default: from settings)
+            max_pending: Buffered records at which add() blocks (default: from settings)
+        """
+        self.ping_status_service = PingStatusService(db_pool)
+        self.batch_size = batch_size or settings.ping_status_batch_size
+        self.flush_interval = flush_interval or settings.ping_status_flush_interval
+        self.max_pending = max(max_pending or settings.ping_status_max_pending, self.batch_size)
+        self._buffer: list[tuple] = []
+        self._in_flight = 0
+        self._wakeup = asyncio.Event()
+        self._space_available = asyncio.Condition()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start the background flush task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        """Stop the flush task and write out everything still buffered."""
+        if self._task is not None:
+            # Cancel outside of a flush so an in-flight batch is not lost
+            async with self._flush_lock:
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush()
+
+        if self._buffer:
+            logger.error(f"Dropped {len(self._buffer)} unwritten ping status records")
+            self._buffer.clear()
+
+    async def add(self, ping_data: PingStatusCreate, checked_at: datetime | None = None) -> None:
+        """
+        Buffer a ping status record.
+
+        Args:
+            ping_data: Ping status data
+            checked_at: Time of the check (default: now)
+        """
+        if self.pending >= self.max_pending:
+            self._wakeup.set()
+            async with self._space_available:
+                await self._space_available.wait_for(lambda: self.pending < self.max_pending)
+
+        self._buffer.append(
+            (
+                ping_data.machine_id,
+                ping_data.is_alive,
+                ping_data.response_time,
+                checked_at or datetime.now(UTC),
+                ping_data.consecutive_failures,
+                ping_data.next_check_interval,
+            )
+        )
+
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    @property
+    def pending(self) -> int:
+        """Number of buffered or in-flight records not yet written."""
+        return len(self._buffer) + self._in_flight
+
+    async def flush(self) -> None:
+        """Write all buffered records in batches of at most ``batch_size``."""
+        async with self._flush_lock:
+            while self._buffer:
+                batch = self._buffer[: self.batch_size]
+                del self._buffer[: self.batch_size]
+                self._in_flight = len(batch)
+
+                try:
+                    await self.ping_status_service.create_ping_statuses(batch)
+                except Exception as e:
+                    # In-flight records count towards max_pending, so the batch
+                    # always fits back into the buffer for the next flush
+                    logger.error(f"Error writing {len(batch)} ping status records: {e}")
+                    self._buffer[:0] = batch
+                    break
+                finally:
+                    self._in_flight = 0
+                    async with self._space_available:
+                        self._space_available.notify_all()
+
+    async def _flush_loop(self) -> None:
+        """Flush on size or time threshold."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            await self.flush()
+
+
+class MachineStateWriter:
+    """
+    Coalesces per-probe machine updates and writes them as one UPDATE every interval.
+
+    Only the newest probe result per machine is kept, so a machine that was
+    pinged several times between flushes costs a single row update. The
+    update sets last_seen (for successful pings) and the denormalized
+    machines.last_ping_* columns read by the API when the status cache is empty.
+    Each successful flush bumps the state version, which bounds how stale
+    response times in cached API responses can get, and calls ``on_flush``
+    (in cluster mode: tells the other instances to bump theirs).
+    """
+
+    def __init__(self, db_pool: Pool, flush_interval: float | None = None):
+        """
+        Initialize writer.
+
+        Args:
+            db_pool: Database connection pool
+            flush_interval: Seconds between flushes (default: from settings)
+        """
+        self.ping_status_service = PingStatusService(db_pool)
+        self.flush_interval = flush_interval or settings.last_seen_flush_interval
+        self._pending: dict[int, tuple[bool, float | None, datetime]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self.on_flush: Callable[[], None] | None = None
+
+    def start(self) -> None:
+        """Start the periodic flush task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        """Stop the flush task and write out all pending updates."""
+        if self._task is not None:
+            # Cancel outside of a flush so in-flight updates are not lost
+            async with self._flush_lock:
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush()
+
+    def record(
+        self,
+        machine_id: int,
+        is_alive: bool,
+        response_time: float | None,
+        checked_at: datetime | None = None,
+    ) -> None:
+        """
+        Record the result of a ping.
+
+        Args:
+            machine_id: Machine ID
+            is_alive: Ping result
+            response_time: Ping response time in ms
+            checked_at: Time of the ping (default: now)
+        """
+        self._pending[machine_id] = (
+            is_alive,
+            response_time,
+            checked_at or datetime.now(UTC),
+        )
+
+    def discard(self, machine_id: int) -> None:
+        """
+        Drop a pending update (e.g. for a machine that is no longer monitored).
+
+        Args:
+            machine_id: Machine ID
+        """
+        self._pending.pop(machine_id, None)
+
+    @property
+    def pending(self) -> int:
+        """Number of machines with an unwritten update."""
+        return len(self._pending)
+
+    async def flush(self) -> None:
+        """Write all pending updates in one statement."""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+
+            pending, self._pending = self._pending, {}
+            is_alive, response_times, checked_at = zip(*pending.values())
+
+            try:
+                await self.ping_status_service.update_machines_latest_ping(
+                    list(pending.keys()), list(is_alive), list(response_times), list(checked_at)
+                )
+            except Exception as e:
+                logger.error(f"Error updating latest ping of {len(pending)} machines: {e}")
+                # Re-queue unless a newer result was recorded meanwhile
+                for machine_id, result in pending.items():
+                    self._pending.setdefault(machine_id, result)
+                return
+
+            # Response times and last_seen changed: cached API responses are stale
+            state_version.bump()
+            if self.on_flush is not None:
+                self.on_flush()
+
+    async def _flush_loop(self) -> None:
+        """Flush every ``flush_interval`` seconds."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
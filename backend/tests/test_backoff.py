@@ -0,0 +1,169 @@
+"""Tests for failure detection policies and backoff intervals."""
+import pytest
+
+from src.config import settings
+from src.services.backoff import (
+    MIN_BACKOFF_INTERVAL,
+    DetectionPolicies,
+    DetectionPolicy,
+    calculate_backoff,
+)
+
+
+def make_policy(**overrides) -> DetectionPolicy:
+    fields = {
+        "failure_threshold": 3,
+        "confirm_interval": 1.0,
+        "check_interval": 60,
+        "max_interval": 3600,
+        "jitter": 0.0,
+    }
+    return DetectionPolicy(**{**fields, **overrides})
+
+
+def test_confirms_failures_before_backing_off():
+    policy = make_policy()
+
+    schedule = [policy.next_interval(failures) for failures in range(10)]
+    assert schedule == [60, 1.0, 1.0, 60, 120, 240, 480, 960, 1920, 3600]
+    assert [policy.is_down(failures) for failures in range(5)] == [
+        False,
+        False,
+        False,
+        True,
+        True,
+    ]
+
+
+def test_backoff_is_capped_for_long_outages():
+    policy = make_policy()
+    assert policy.next_interval(10_000) == 3600
+
+
+def test_without_confirmation_matches_calculate_backoff():
+    policy = make_policy(
+        confirm_interval=0,
+        check_interval=settings.min_check_interval,
+        max_interval=settings.max_check_interval,
+    )
+
+    for failures in range(20):
+        assert policy.next_interval(failures) == calculate_backoff(failures)
+
+
+def test_uniform_jitter_stays_within_fraction():
+    policy = make_policy(jitter=0.1)
+
+    for _ in range(1000):
+        assert 0.9 * 240 <= policy.next_interval(5) <= 1.1 * 240
+        assert policy.next_interval(20) <= 3600
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"jitter_strategy": "random"},
+        {"failure_threshold": 0},
+        {"confirm_interval": -1},
+        {"check_interval": 0},
+        {"max_interval": 30},
+        {"jitter": 1.0},
+        {"jitter": -0.1},
+    ],
+)
+def test_rejects_invalid_policy(overrides):
+    with pytest.raises(ValueError):
+        make_policy(**overrides)
+
+
+def test_policies_resolve_most_specific_subnet(monkeypatch):
+    monkeypatch.setattr(
+        settings,
+        "detection_policies",
+        {
+            "10.0.0.0/8": {"confirm_interval": 0.5},
+            "10.1.0.0/16": {"failure_threshold": 5},
+            "10.1.2.3/32": {"failure_threshold": 1},
+        },
+    )
+    policies = DetectionPolicies.from_settings()
+
+    assert policies.resolve("10.9.9.9").confirm_interval == 0.5
+    assert policies.resolve("10.1.9.9").failure_threshold == 5
+    assert policies.resolve("10.1.9.9").confirm_interval == policies.default.confirm_interval
+    assert policies.resolve("10.1.2.3").failure_threshold == 1
+    assert policies.resolve("192.168.0.1") is policies.default
+    assert policies.resolve("fd00::1") is policies.default
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"10.0.0.0/8": {"unknown": 1}},
+        {"10.0.0.0/8": {"jitter": 1.5}},
+        {"10.0.0.0/8": {"failure_threshold": 2.5}},
+        {"10.0.0.0/8": {"failure_threshold": "many"}},
+        {"10.0.0.0/33": {"failure_threshold": 5}},
+    ],
+)
+def test_policies_reject_invalid_overrides(monkeypatch, overrides):
+    monkeypatch.setattr(settings, "detection_policies", overrides)
+    [cidr] = overrides
+    with pytest.raises(ValueError, match=f"Invalid detection policy for {cidr}"):
+        DetectionPolicies.from_settings()
+
+
+def test_policies_coerce_integer_fields(monkeypatch):
+    monkeypatch.setattr(settings, "detection_policies", {"10.0.0.0/8": {"failure_threshold": 5.0}})
+    policy = DetectionPolicies.from_settings().resolve("10.0.0.1")
+
+    assert policy.failure_threshold == 5
+    assert isinstance(policy.failure_threshold, int)
+
+
+def test_intervals_never_drop_below_minimum():
+    policy = make_policy(jitter=0.99)
+
+    for failures in range(3, 12):
+        for _ in range(200):
+            assert policy.next_interval(failures) >= MIN_BACKOFF_INTERVAL
+
+
+@pytest.mark.parametrize(
+    ("strategy", "low", "high"),
+    [
+        ("full", MIN_BACKOFF_INTERVAL, 240),
+        ("equal", 120, 240),
+        ("uniform", 240, 240),
+    ],
+)
+def test_jitter_strategy_bounds(strategy, low, high):
+    policy = make_policy(jitter_strategy=strategy)
+
+    intervals = [policy.next_interval(5) for _ in range(2000)]
+    assert min(intervals) >= low
+    assert max(intervals) <= high
+
+
+def test_full_jitter_spreads_retries():
+    policy = make_policy(jitter_strategy="full")
+
+    intervals = [policy.next_interval(7) for _ in range(2000)]
+    assert min(intervals) < 100
+    assert max(intervals) > 860
+
+
+def test_decorrelated_jitter_grows_from_previous_interval():
+    policy = make_policy(jitter_strategy="decorrelated")
+
+    for previous in (1.0, 60, 200, 3000):
+        for _ in range(500):
+            interval = policy.next_interval(5, previous)
+            assert 60 <= interval <= min(max(previous, 60) * 3, 3600)
+
+
+def test_jitter_does_not_affect_confirmation_or_healthy_checks():
+    for strategy in ("uniform", "full", "equal", "decorrelated"):
+        policy = make_policy(jitter=0.5, jitter_strategy=strategy)
+        assert policy.next_interval(0) == 60
+        assert policy.next_interval(1) == 1.0
@@ -0,0 +1,179 @@
+"""Tests for conditional GET handling and the shared response cache."""
+import asyncio
+
+import orjson
+import pytest
+from starlette.requests import Request
+
+from src.api import caching
+from src.api.caching import ResponseCache, _etag_matches, cached_json_response
+from src.services.state_version import state_version
+
+KEY = ("/api/machines", ())
+
+
+class FakeBuilder:
+    """Build function counting calls; waits for ``release`` when gated."""
+
+    def __init__(self, content=None, error: Exception | None = None, gated: bool = False):
+        self.content = content if content is not None else {"machines": []}
+        self.error = error
+        self.calls = 0
+        self.release = asyncio.Event()
+        if not gated:
+            self.release.set()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.content
+
+
+def make_request(path: str = "/api/machines", query: str = "", etag: str | None = None):
+    headers = [(b"if-none-match", etag.encode())] if etag is not None else []
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": path,
+            "query_string": query.encode(),
+            "headers": headers,
+        }
+    )
+
+
+@pytest.fixture
+def cache(monkeypatch) -> ResponseCache:
+    cache = ResponseCache(max_entries=2)
+    monkeypatch.setattr(caching, "response_cache", cache)
+    return cache
+
+
+@pytest.mark.parametrize(
+    ("header", "matches"),
+    [
+        (None, False),
+        ("", False),
+        ('"e-1"', True),
+        ('W/"e-1"', True),
+        (' "e-0" , W/"e-1" ', True),
+        ('"e-0", "e-2"', False),
+        ("*", True),
+        (" * ", True),
+        ("e-1", False),
+    ],
+)
+def test_etag_matching(header, matches):
+    assert _etag_matches(header, '"e-1"') is matches
+
+
+async def test_cache_reuses_body_until_version_moves():
+    cache = ResponseCache(max_entries=4)
+    builder = FakeBuilder({"value": 1})
+
+    assert await cache.get_or_build(KEY, 1, builder) == b'{"value":1}'
+    assert await cache.get_or_build(KEY, 1, builder) == b'{"value":1}'
+    assert builder.calls == 1
+
+    await cache.get_or_build(KEY, 2, builder)
+    assert builder.calls == 2
+
+
+async def test_cache_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    builder = FakeBuilder()
+    for path in ("/a", "/b", "/a", "/c"):
+        await cache.get_or_build((path, ()), 1, builder)
+    assert builder.calls == 3
+
+    await cache.get_or_build(("/a", ()), 1, builder)
+    assert builder.calls == 3
+    await cache.get_or_build(("/b", ()), 1, builder)
+    assert builder.calls == 4
+
+
+async def test_stale_build_does_not_replace_newer_entry():
+    cache = ResponseCache(max_entries=4)
+    slow = FakeBuilder({"version": 1}, gated=True)
+    stale = asyncio.create_task(cache.get_or_build(KEY, 1, slow))
+    await asyncio.sleep(0)
+
+    await cache.get_or_build(KEY, 2, FakeBuilder({"version": 2}))
+    slow.release.set()
+    assert orjson.loads(await stale) == {"version": 1}
+
+    builder = FakeBuilder()
+    assert await cache.get_or_build(KEY, 2, builder) == b'{"version":2}'
+    assert builder.calls == 0
+
+
+async def test_concurrent_misses_share_one_build():
+    cache = ResponseCache(max_entries=4)
+    builder = FakeBuilder({"value": 1}, gated=True)
+
+    tasks = [asyncio.create_task(cache.get_or_build(KEY, 1, builder)) for _ in range(5)]
+    await asyncio.sleep(0)
+    builder.release.set()
+
+    assert await asyncio.gather(*tasks) == [b'{"value":1}'] * 5
+    assert builder.calls == 1
+
+
+async def test_failed_build_is_raised_to_all_waiters_and_not_cached():
+    cache = ResponseCache(max_entries=4)
+    failing = FakeBuilder(error=RuntimeError("database down"), gated=True)
+
+    tasks = [asyncio.create_task(cache.get_or_build(KEY, 1, failing)) for _ in range(3)]
+    await asyncio.sleep(0)
+    failing.release.set()
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert failing.calls == 1
+
+    builder = FakeBuilder()
+    await cache.get_or_build(KEY, 1, builder)
+    assert builder.calls == 1
+
+
+async def test_response_carries_etag_of_current_version(cache):
+    builder = FakeBuilder({"machines": [1]})
+
+    response = await cached_json_response(make_request(query="status=active"), builder)
+    assert response.status_code == 200
+    assert response.body == b'{"machines":[1]}'
+    assert response.headers["etag"] == state_version.etag()
+    assert response.headers["cache-control"] == "no-cache"
+
+
+async def test_matching_etag_returns_304_without_building(cache):
+    builder = FakeBuilder()
+    etag = state_version.etag()
+
+    response = await cached_json_response(make_request(etag=f"W/{etag}"), builder)
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert builder.calls == 0
+
+
+async def test_bumped_version_rebuilds(cache):
+    builder = FakeBuilder()
+    first = await cached_json_response(make_request(), builder)
+
+    state_version.bump()
+    response = await cached_json_response(make_request(etag=first.headers["etag"]), builder)
+    assert response.status_code == 200
+    assert response.headers["etag"] != first.headers["etag"]
+    assert builder.calls == 2
+
+
+async def test_query_is_part_of_cache_key(cache):
+    builder = FakeBuilder()
+    await cached_json_response(make_request(query="a=1&b=2"), builder)
+    await cached_json_response(make_request(query="b=2&a=1"), builder)
+    assert builder.calls == 1
+
+    await cached_json_response(make_request(query="a=2"), builder)
+    assert builder.calls == 2
@@ -0,0 +1,105 @@
+"""Tests for rendezvous-hash sharding and cluster membership."""
+from collections import Counter
+
+from src.services.cluster_service import Cluster, ClusterMembership, shard_owner
+
+MACHINE_IDS = range(1, 5001)
+
+
+class FakeConnection:
+    """Connection whose fetch returns preset rows."""
+
+    def __init__(self, rows: list[dict]):
+        self.rows = rows
+        self.calls: list[tuple] = []
+
+    async def fetch(self, query: str, *args):
+        self.calls.append(args)
+        return self.rows
+
+
+class FakePool:
+    """Pool handing out one fake connection."""
+
+    def __init__(self, conn: FakeConnection):
+        self.conn = conn
+
+    def acquire(self):
+        return self
+
+    async def __aenter__(self):
+        return self.conn
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def owners(members: list[str]) -> dict[int, str]:
+    return {machine_id: shard_owner(members, machine_id) for machine_id in MACHINE_IDS}
+
+
+def test_shard_owner_is_independent_of_member_order():
+    members = ["a", "b", "c"]
+    assert owners(members) == owners(list(reversed(members)))
+
+
+def test_shards_are_balanced():
+    counts = Counter(owners(["a", "b", "c", "d"]).values())
+    assert set(counts) == {"a", "b", "c", "d"}
+    assert max(counts.values()) < 1.2 * len(MACHINE_IDS) / 4
+
+
+def test_leave_moves_only_machines_of_leaving_instance():
+    before = owners(["a", "b", "c", "d"])
+    after = owners(["a", "b", "d"])
+
+    moved = {machine_id for machine_id in MACHINE_IDS if before[machine_id] != after[machine_id]}
+    assert moved == {machine_id for machine_id, owner in before.items() if owner == "c"}
+    assert all(after[machine_id] != "c" for machine_id in MACHINE_IDS)
+
+
+def test_join_moves_machines_only_to_joining_instance():
+    before = owners(["a", "b", "c"])
+    after = owners(["a", "b", "c", "d"])
+
+    for machine_id in MACHINE_IDS:
+        if before[machine_id] != after[machine_id]:
+            assert after[machine_id] == "d"
+    assert "d" in after.values()
+
+
+async def test_heartbeat_reports_member_changes():
+    changes: list[list[str]] = []
+
+    async def on_change(members: list[str]) -> None:
+        changes.append(members)
+
+    conn = FakeConnection([{"instance_id": "b"}, {"instance_id": "c"}])
+    membership = ClusterMembership(
+        FakePool(conn), "a", on_change, heartbeat_interval=5, lease_ttl=15
+    )
+
+    # The statement does not see its own insert: this instance is always a member
+    await membership.heartbeat()
+    assert membership.members == ["a", "b", "c"]
+    assert changes == [["a", "b", "c"]]
+    assert conn.calls == [("a", 15)]
+
+    await membership.heartbeat()
+    assert changes == [["a", "b", "c"]]
+
+    conn.rows = [{"instance_id": "a"}, {"instance_id": "c"}]
+    await membership.heartbeat()
+    assert changes[-1] == ["a", "c"]
+    assert membership.owns(1) == (shard_owner(["a", "c"], 1) == "a")
+
+
+async def test_relay_instance_reports_live_members_without_joining():
+    conn = FakeConnection([{"instance_id": "worker-b"}, {"instance_id": "worker-a"}])
+    cluster = Cluster(FakePool(conn), "api", monitoring=False)
+
+    stats = await cluster.stats()
+    assert stats["members"] == ["worker-a", "worker-b"]
+    assert not stats["monitoring"]
+    assert cluster.membership.members == ["api"]
+    assert conn.calls == [(cluster.membership.lease_ttl,)]
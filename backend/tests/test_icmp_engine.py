@@ -0,0 +1,177 @@
+"""Tests for ICMP packet handling and reply matching."""
+import asyncio
+import socket
+import struct
+
+import pytest
+
+from src.services.icmp_engine import (
+    ICMP_ECHO_REPLY,
+    ICMP_ECHO_REQUEST,
+    ICMPV6_ECHO_REPLY,
+    ICMPV6_ECHO_REQUEST,
+    PAYLOAD,
+    ICMPEngine,
+    build_echo_request,
+    icmp_checksum,
+    parse_echo_reply,
+)
+
+
+def echo(icmp_type: int, identifier: int, sequence: int, code: int = 0) -> bytes:
+    """ICMP echo message with a valid checksum."""
+    header = struct.pack("!BBHHH", icmp_type, code, 0, identifier, sequence)
+    checksum = icmp_checksum(header + PAYLOAD)
+    return struct.pack("!BBHHH", icmp_type, code, checksum, identifier, sequence) + PAYLOAD
+
+
+def ipv4(message: bytes, options: bytes = b"") -> bytes:
+    """Prepend an IPv4 header, as raw sockets deliver it."""
+    ihl = 5 + len(options) // 4
+    header = struct.pack(
+        "!BBHHHBBH4s4s",
+        0x40 | ihl,
+        0,
+        ihl * 4 + len(message),
+        0,
+        0,
+        64,
+        socket.IPPROTO_ICMP,
+        0,
+        socket.inet_aton("192.0.2.1"),
+        socket.inet_aton("192.0.2.2"),
+    )
+    return header + options + message
+
+
+class FakeSocket:
+    """Socket returning queued datagrams, then reporting that none are left."""
+
+    def __init__(self, datagrams: list[tuple[bytes, tuple]]):
+        self.datagrams = list(datagrams)
+
+    def recvfrom(self, bufsize: int):
+        if not self.datagrams:
+            raise BlockingIOError
+        return self.datagrams.pop(0)
+
+
+def test_checksum_known_vector():
+    # Example from RFC 1071 section 3
+    assert icmp_checksum(bytes.fromhex("0001f203f4f5f6f7")) == 0x220D
+
+
+def test_checksum_pads_odd_length():
+    assert icmp_checksum(b"\x01") == icmp_checksum(b"\x01\x00")
+
+
+def test_ipv4_request_checksum_verifies():
+    packet = build_echo_request(socket.AF_INET, 0x1234, 7)
+
+    assert packet[0] == ICMP_ECHO_REQUEST
+    assert struct.unpack("!HH", packet[4:8]) == (0x1234, 7)
+    assert packet.endswith(PAYLOAD)
+    # Summing a packet including its checksum gives zero
+    assert icmp_checksum(packet) == 0
+
+
+def test_ipv6_request_leaves_checksum_to_kernel():
+    packet = build_echo_request(socket.AF_INET6, 0x1234, 7)
+
+    assert packet[0] == ICMPV6_ECHO_REQUEST
+    assert packet[2:4] == b"\x00\x00"
+    assert struct.unpack("!HH", packet[4:8]) == (0x1234, 7)
+
+
+@pytest.mark.parametrize(
+    ("family", "data", "privileged"),
+    [
+        (socket.AF_INET, ipv4(echo(ICMP_ECHO_REPLY, 0xBEEF, 42)), True),
+        (socket.AF_INET, ipv4(echo(ICMP_ECHO_REPLY, 0xBEEF, 42), b"\x01" * 8), True),
+        (socket.AF_INET, echo(ICMP_ECHO_REPLY, 0xBEEF, 42), False),
+        (socket.AF_INET6, echo(ICMPV6_ECHO_REPLY, 0xBEEF, 42), True),
+        (socket.AF_INET6, echo(ICMPV6_ECHO_REPLY, 0xBEEF, 42), False),
+    ],
+    ids=["ipv4-raw", "ipv4-raw-options", "ipv4-dgram", "ipv6-raw", "ipv6-dgram"],
+)
+def test_parse_echo_reply(family, data, privileged):
+    assert parse_echo_reply(family, data, privileged) == (0xBEEF, 42)
+
+
+@pytest.mark.parametrize(
+    ("family", "data", "privileged"),
+    [
+        (socket.AF_INET, b"", True),
+        (socket.AF_INET, ipv4(b"\x00" * 4), True),
+        (socket.AF_INET, ipv4(echo(ICMP_ECHO_REQUEST, 1, 1)), True),
+        (socket.AF_INET, echo(ICMP_ECHO_REPLY, 1, 1, code=1), False),
+        # Destination unreachable
+        (socket.AF_INET, echo(3, 1, 1), False),
+        # An IPv4 reply on an ICMPv6 socket
+        (socket.AF_INET6, echo(ICMP_ECHO_REPLY, 1, 1), False),
+        (socket.AF_INET6, echo(ICMPV6_ECHO_REQUEST, 1, 1), False),
+    ],
+)
+def test_parse_ignores_other_messages(family, data, privileged):
+    assert parse_echo_reply(family, data, privileged) is None
+
+
+async def pending(engine: ICMPEngine, address: str, sequence: int) -> asyncio.Future:
+    future = asyncio.get_running_loop().create_future()
+    engine._pending[(address, sequence)] = (asyncio.get_running_loop().time(), future)
+    return future
+
+
+async def test_raw_socket_matches_address_sequence_and_identifier():
+    engine = ICMPEngine(privileged=True)
+    identifier = engine._identifier
+    matched = await pending(engine, "192.0.2.1", 5)
+    other_sequence = await pending(engine, "192.0.2.2", 6)
+
+    engine._on_readable(
+        socket.AF_INET,
+        FakeSocket(
+            [
+                # Another process's reply to the same host and sequence
+                (ipv4(echo(ICMP_ECHO_REPLY, identifier ^ 1, 5)), ("192.0.2.1", 0)),
+                # Right identifier, wrong sequence for this host
+                (ipv4(echo(ICMP_ECHO_REPLY, identifier, 5)), ("192.0.2.2", 0)),
+            ]
+        ),
+    )
+    assert not matched.done()
+    assert not other_sequence.done()
+
+    engine._on_readable(
+        socket.AF_INET,
+        FakeSocket([(ipv4(echo(ICMP_ECHO_REPLY, identifier, 5)), ("192.0.2.1", 0))]),
+    )
+    assert matched.result() >= 0
+    assert ("192.0.2.1", 5) not in engine._pending
+    assert not other_sequence.done()
+
+
+async def test_datagram_socket_ignores_rewritten_identifier():
+    engine = ICMPEngine(privileged=False)
+    future = await pending(engine, "192.0.2.1", 5)
+
+    # The kernel replaces the identifier with the socket's port
+    engine._on_readable(
+        socket.AF_INET,
+        FakeSocket([(echo(ICMP_ECHO_REPLY, 0x4321, 5), ("192.0.2.1", 0))]),
+    )
+    assert future.done()
+
+
+async def test_ipv6_reply_matches_without_scope_id():
+    engine = ICMPEngine(privileged=True)
+    identifier = engine._identifier
+    future = await pending(engine, "fe80::1", 9)
+    duplicate = echo(ICMPV6_ECHO_REPLY, identifier, 9)
+
+    engine._on_readable(
+        socket.AF_INET6,
+        FakeSocket([(duplicate, ("fe80::1%eth0", 0, 0, 2)), (duplicate, ("fe80::1", 0, 0, 0))]),
+    )
+    assert future.done()
+    assert not engine._pending
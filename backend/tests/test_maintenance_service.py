@@ -0,0 +1,115 @@
+"""Tests for ping_status partition retention."""
+from datetime import date
+
+import asyncpg
+
+from src.services.maintenance_service import PartitionMaintenance
+
+CUTOFF = date(2026, 1, 10)
+
+
+class FakeTransaction:
+    """Transaction marking the statements run inside it."""
+
+    def __init__(self, conn: "FakeConnection"):
+        self.conn = conn
+
+    async def __aenter__(self):
+        self.conn.in_transaction = True
+
+    async def __aexit__(self, *exc):
+        self.conn.in_transaction = False
+        return False
+
+
+class FakeConnection:
+    """Connection listing preset partitions and recording statements."""
+
+    def __init__(self, partitions: list[tuple[str, bool, bool]], has_default: bool = True):
+        self.partitions = partitions
+        self.has_default = has_default
+        self.in_transaction = False
+        self.statements: list[tuple[str, bool]] = []
+        self.busy = False
+
+    async def fetch(self, query: str, *args):
+        return [
+            {"relname": name, "attached": attached, "detach_pending": pending}
+            for name, attached, pending in self.partitions
+        ]
+
+    async def fetchval(self, query: str, *args):
+        return self.has_default
+
+    async def execute(self, query: str, *args):
+        statement = " ".join(query.split())
+        if self.busy and statement.startswith("ALTER TABLE"):
+            raise asyncpg.LockNotAvailableError("canceling statement due to lock timeout")
+        self.statements.append((statement, self.in_transaction))
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+
+def executed(conn: FakeConnection) -> list[str]:
+    return [
+        statement
+        for statement, _ in conn.statements
+        if not statement.startswith(("INSERT INTO ping_status_hourly", "DELETE", "SET"))
+    ]
+
+
+async def expire(conn: FakeConnection) -> None:
+    await PartitionMaintenance(None, retention_days=7)._expire_partitions(conn, CUTOFF)
+
+
+async def test_detaches_before_dropping():
+    conn = FakeConnection(
+        [
+            ("ping_status_p20260108", True, False),
+            ("ping_status_p20260110", True, False),
+            ("ping_status_default", True, False),
+        ]
+    )
+    await expire(conn)
+
+    assert executed(conn) == [
+        "ALTER TABLE ping_status DETACH PARTITION ping_status_p20260108",
+        "DROP TABLE ping_status_p20260108",
+    ]
+    assert ("SET LOCAL lock_timeout = '2s'", True) in conn.statements
+
+
+async def test_detaches_concurrently_outside_transaction_without_default():
+    conn = FakeConnection([("ping_status_p20260108", True, False)], has_default=False)
+    await expire(conn)
+
+    assert conn.statements[0] == (
+        "ALTER TABLE ping_status DETACH PARTITION ping_status_p20260108 CONCURRENTLY",
+        False,
+    )
+    assert ("DROP TABLE ping_status_p20260108", True) in conn.statements
+
+
+async def test_resumes_interrupted_runs():
+    conn = FakeConnection(
+        [
+            ("ping_status_p20260107", True, True),
+            ("ping_status_p20260108", False, False),
+        ]
+    )
+    await expire(conn)
+
+    assert executed(conn) == [
+        "ALTER TABLE ping_status DETACH PARTITION ping_status_p20260107 FINALIZE",
+        "DROP TABLE ping_status_p20260107",
+        "DROP TABLE ping_status_p20260108",
+    ]
+
+
+async def test_busy_table_is_left_for_next_run():
+    conn = FakeConnection([("ping_status_p20260108", True, False)])
+    conn.busy = True
+    await expire(conn)
+
+    assert executed(conn) == []
@@ -0,0 +1,75 @@
+"""Tests for processing ping results in the monitor manager."""
+from datetime import UTC, datetime
+
+import pytest
+
+from src.services.backoff import DetectionPolicy
+from src.services.broadcast_aggregator import broadcast_aggregator
+from src.services.monitor_service import MachineMonitor, MachineMonitorManager
+from src.services.status_cache import status_cache
+
+POLICY = DetectionPolicy(
+    failure_threshold=3, confirm_interval=1.0, check_interval=60, max_interval=3600, jitter=0.0
+)
+LAST_CHECK = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+class StubPingStatusService:
+    """Records status transitions; fails while ``failing`` is set."""
+
+    def __init__(self):
+        self.changes: list[tuple] = []
+        self.failing = True
+
+    async def record_status_change(self, ping_data, status, checked_at) -> None:
+        if self.failing:
+            raise OSError("connection lost")
+        self.changes.append((ping_data.consecutive_failures, status))
+
+
+@pytest.fixture
+def manager():
+    manager = MachineMonitorManager(None)
+    manager.ping_status_service = StubPingStatusService()
+    yield manager
+    broadcast_aggregator.forget(1)
+    status_cache.remove(1)
+
+
+def confirming_monitor() -> MachineMonitor:
+    """Monitor one failure short of the unreachable threshold."""
+    return MachineMonitor(
+        machine_id=1,
+        ip_address="192.0.2.1",
+        policy=POLICY,
+        consecutive_failures=2,
+        next_check_interval=1.0,
+        last_check=LAST_CHECK,
+        is_alive=False,
+    )
+
+
+async def test_failed_transition_restores_monitor_state(manager):
+    monitor = confirming_monitor()
+
+    with pytest.raises(OSError):
+        await manager._process_result(monitor, False, None)
+
+    assert monitor.consecutive_failures == 2
+    assert monitor.next_check_interval == 1.0
+    assert monitor.last_check == LAST_CHECK
+    assert monitor.is_alive is False
+
+
+async def test_transition_is_detected_again_after_failure(manager):
+    monitor = confirming_monitor()
+    with pytest.raises(OSError):
+        await manager._process_result(monitor, False, None)
+
+    manager.ping_status_service.failing = False
+    await manager._process_result(monitor, False, None)
+
+    assert manager.ping_status_service.changes == [(3, "unreachable")]
+    assert monitor.consecutive_failures == 3
+    assert monitor.next_check_interval == 60
+    assert monitor.last_check > LAST_CHECK
@@ -0,0 +1,80 @@
+"""Tests for probe pacing in the ping scheduler."""
+import asyncio
+
+import pytest
+
+from src.services.monitor_service import (
+    PROBE_PACING_WINDOW,
+    MachineMonitor,
+    PingScheduler,
+    ProbeRateLimiter,
+)
+
+
+def test_limiter_allows_burst_then_paces():
+    limiter = ProbeRateLimiter(100)
+    assert limiter.burst == 100 * PROBE_PACING_WINDOW
+
+    assert limiter.available(1000.0) == 10
+    limiter.take(10)
+    assert limiter.available(1000.0) == 0
+    assert limiter.delay() == pytest.approx(0.01)
+
+    # One probe per 10 ms
+    assert limiter.available(1000.05) == 5
+    limiter.take(5)
+    assert limiter.available(1000.05) == 0
+
+
+def test_limiter_refill_is_capped_at_burst():
+    limiter = ProbeRateLimiter(100)
+    limiter.available(0.0)
+    limiter.take(10)
+
+    assert limiter.available(3600.0) == 10
+
+
+def test_limiter_delay_reaches_next_whole_probe():
+    limiter = ProbeRateLimiter(3)
+    limiter.available(0.0)
+    limiter.take(1)
+
+    now = 0.0
+    for _ in range(100):
+        assert limiter.available(now) == 0
+        now += limiter.delay()
+        assert limiter.available(now) == 1
+        limiter.take(1)
+
+
+def test_limiter_burst_is_at_least_one_probe():
+    limiter = ProbeRateLimiter(0.5)
+    assert limiter.available(0.0) == 1
+    limiter.take(1)
+    assert limiter.delay() == pytest.approx(2.0)
+
+
+async def test_scheduler_paces_due_machines():
+    batches: list[int] = []
+
+    async def handler(batch: list[MachineMonitor]) -> None:
+        batches.append(len(batch))
+
+    scheduler = PingScheduler(handler, workers=2, batch_size=100, queue_size=4, max_rate=1000)
+    scheduler.start()
+    try:
+        for machine_id in range(300):
+            scheduler.schedule(MachineMonitor(machine_id=machine_id, ip_address="192.0.2.1"))
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        while sum(batches) < 300:
+            await asyncio.sleep(0.01)
+            assert loop.time() - started < 5
+        elapsed = loop.time() - started
+    finally:
+        await scheduler.stop()
+
+    assert max(batches) <= 100  # Burst of 0.1 s at 1000 probes/s
+    assert elapsed >= 0.15  # 300 probes less the initial burst, at 1000/s
+    assert scheduler.stats()["max_probes_per_second"] == 1000
@@ -0,0 +1,169 @@
+"""Tests for GCRA rate limiting stores."""
+import pytest
+
+from src.api import rate_limit
+from src.api.rate_limit import (
+    MemoryRateLimitStore,
+    PostgresRateLimitStore,
+    RateLimit,
+    route_budget,
+)
+
+LIMIT = RateLimit("test", 60)  # Burst of 60, one request per second sustained
+
+
+class FakeConnection:
+    """Connection recording statements; fetchval answers whether the request is allowed."""
+
+    def __init__(self, allowed: bool = True):
+        self.allowed = allowed
+        self.fetchval_args: list[tuple] = []
+        self.executed: list[str] = []
+
+    async def fetchval(self, query: str, *args):
+        self.fetchval_args.append(args)
+        return True if self.allowed else None
+
+    async def execute(self, query: str, *args):
+        self.executed.append(query)
+
+
+class FakePool:
+    """Pool handing out one fake connection."""
+
+    def __init__(self, conn: FakeConnection):
+        self.conn = conn
+
+    def acquire(self):
+        return self
+
+    async def __aenter__(self):
+        return self.conn
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def use_pool(monkeypatch, conn: FakeConnection | None) -> None:
+    async def get_pool():
+        if conn is None:
+            raise OSError("connection refused")
+        return FakePool(conn)
+
+    monkeypatch.setattr(rate_limit, "get_pool", get_pool)
+
+
+def test_budget_intervals():
+    assert LIMIT.emission_interval == 1.0
+    assert RateLimit("write", 120).emission_interval == 0.5
+    assert LIMIT.burst_window == 60.0
+
+
+def test_route_budget():
+    assert route_budget("POST", "/api/machines") is rate_limit.WRITE_LIMIT
+    assert route_budget("DELETE", "/api/machines/1") is rate_limit.WRITE_LIMIT
+    assert route_budget("GET", "/api/machines") is rate_limit.READ_LIMIT
+    assert route_budget("POST", "/docs") is rate_limit.READ_LIMIT
+
+
+def test_memory_allows_full_burst_then_rejects():
+    store = MemoryRateLimitStore(max_keys=10)
+
+    for _ in range(60):
+        assert store.check_at("client", LIMIT, 100.0) is None
+    assert store.check_at("client", LIMIT, 100.0) == pytest.approx(1.0)
+
+
+def test_memory_retry_after_counts_down():
+    store = MemoryRateLimitStore(max_keys=10)
+    for _ in range(60):
+        store.check_at("client", LIMIT, 100.0)
+
+    assert store.check_at("client", LIMIT, 100.25) == pytest.approx(0.75)
+    assert store.check_at("client", LIMIT, 100.75) == pytest.approx(0.25)
+
+
+def test_memory_refills_at_sustained_rate():
+    store = MemoryRateLimitStore(max_keys=10)
+    for _ in range(60):
+        store.check_at("client", LIMIT, 100.0)
+
+    # One request per emission interval
+    assert store.check_at("client", LIMIT, 101.0) is None
+    assert store.check_at("client", LIMIT, 101.0) is not None
+
+    # A full refill after the burst window
+    for _ in range(60):
+        assert store.check_at("client", LIMIT, 200.0) is None
+    assert store.check_at("client", LIMIT, 200.0) is not None
+
+
+def test_memory_rejected_requests_are_not_charged():
+    store = MemoryRateLimitStore(max_keys=10)
+    for _ in range(60):
+        store.check_at("client", LIMIT, 100.0)
+    for _ in range(100):
+        store.check_at("client", LIMIT, 100.0)
+
+    assert store.check_at("client", LIMIT, 101.0) is None
+
+
+def test_memory_keys_are_independent():
+    store = MemoryRateLimitStore(max_keys=10)
+    for _ in range(60):
+        store.check_at("a", LIMIT, 100.0)
+
+    assert store.check_at("a", LIMIT, 100.0) is not None
+    assert store.check_at("b", LIMIT, 100.0) is None
+
+
+def test_memory_drops_expired_and_excess_keys():
+    store = MemoryRateLimitStore(max_keys=3)
+    for key in ("a", "b", "c", "d"):
+        store.check_at(key, LIMIT, 100.0)
+    assert len(store) == 3
+
+    # Every TAT has passed: expired keys are dropped as they reach the front
+    store.check_at("e", LIMIT, 200.0)
+    assert len(store) == 1
+
+
+async def test_postgres_passes_budget_to_statement(monkeypatch):
+    conn = FakeConnection(allowed=True)
+    use_pool(monkeypatch, conn)
+    store = PostgresRateLimitStore()
+
+    assert await store.check("read:192.0.2.1", RateLimit("read", 120)) is None
+    assert conn.fetchval_args == [("read:192.0.2.1", 0.5, 60.0)]
+
+
+async def test_postgres_rejection_retries_after_emission_interval(monkeypatch):
+    use_pool(monkeypatch, FakeConnection(allowed=False))
+    store = PostgresRateLimitStore()
+
+    assert await store.check("client", RateLimit("write", 30)) == pytest.approx(2.0)
+
+
+async def test_postgres_purges_expired_rows_once_per_interval(monkeypatch):
+    conn = FakeConnection()
+    use_pool(monkeypatch, conn)
+    store = PostgresRateLimitStore(purge_interval=3600)
+
+    for _ in range(5):
+        await store.check("client", LIMIT)
+    assert len(conn.executed) == 1
+    assert conn.executed[0].startswith("DELETE FROM rate_limits")
+
+
+async def test_postgres_falls_back_to_memory_store(monkeypatch):
+    use_pool(monkeypatch, None)
+    store = PostgresRateLimitStore()
+
+    for _ in range(60):
+        assert await store.check("client", LIMIT) is None
+    assert await store.check("client", LIMIT) is not None
+    assert store._degraded
+
+    use_pool(monkeypatch, FakeConnection())
+    assert await store.check("client", LIMIT) is None
+    assert not store._degraded
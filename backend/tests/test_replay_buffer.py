@@ -0,0 +1,107 @@
+"""Tests for the replay buffer and resuming WebSocket clients."""
+import json
+
+from src.services.replay_buffer import ReplayBuffer
+from src.services.subscriptions import Subscription
+from src.services.websocket_service import RESYNC, ClientConnection, WebSocketManager
+
+
+def update(machine_id: int, status: str = "active", seq: int = 0) -> dict:
+    return {"machine_id": machine_id, "status": status, "response_time": float(seq)}
+
+
+def connect(manager: WebSocketManager, subscription: Subscription | None = None):
+    """Register a client without a socket; its frames stay in the queue."""
+    websocket = object()
+    client = ClientConnection(websocket, 16)
+    if subscription is not None:
+        client.subscription = subscription
+    manager.clients[websocket] = client
+    manager.index.add(client, client.subscription)
+    return websocket, client
+
+
+def queued(client: ClientConnection) -> list:
+    frames = []
+    while not client.queue.empty():
+        frame = client.queue.get_nowait()
+        frames.append(frame if frame is RESYNC else json.loads(frame))
+    return frames
+
+
+def test_since_replays_gap_without_loss():
+    buffer = ReplayBuffer(100)
+    buffer.append([update(1), update(2)], {})
+    seq = buffer.append([update(3)], {})
+    buffer.append([update(4), update(5)], {})
+
+    changes = buffer.since(seq, buffer.epoch)
+    assert list(changes) == [4, 5]
+    assert buffer.since(buffer.seq, buffer.epoch) == {}
+    assert list(buffer.since(0, buffer.epoch)) == [1, 2, 3, 4, 5]
+
+
+def test_since_keeps_newest_update_and_every_status_per_machine():
+    buffer = ReplayBuffer(100)
+    buffer.append([update(1, seq=1), update(2, seq=2)], {})
+    buffer.append([update(1, "unreachable", seq=3)], {1: "active"})
+    buffer.append([update(1, "active", seq=4)], {1: "unreachable"})
+
+    changes = buffer.since(0, buffer.epoch)
+    # Ordered by when the newest update of each machine was sent
+    assert list(changes) == [2, 1]
+    newest, statuses = changes[1]
+    assert newest["response_time"] == 4
+    assert statuses == {"active", "unreachable"}
+
+
+def test_since_resyncs_when_gap_is_evicted():
+    buffer = ReplayBuffer(3)
+    for machine_id in range(1, 6):
+        buffer.append([update(machine_id)], {})
+
+    # Updates 3..5 are buffered: resuming from 2 is still complete
+    assert list(buffer.since(2, buffer.epoch)) == [3, 4, 5]
+    assert buffer.since(1, buffer.epoch) is None
+    assert buffer.since(0, buffer.epoch) is None
+
+
+def test_since_resyncs_on_unknown_position_or_epoch():
+    buffer = ReplayBuffer(10)
+    buffer.append([update(1)], {})
+
+    assert buffer.since(2, buffer.epoch) is None
+    assert buffer.since(-1, buffer.epoch) is None
+    assert buffer.since(0, None) is None
+    # Another process (a restarted server) has another epoch
+    assert buffer.since(0, ReplayBuffer(10).epoch) is None
+
+
+def test_resume_sends_missed_updates_matching_filter():
+    manager = WebSocketManager(queue_size=16)
+    manager.broadcast_batch([update(1), update(2)])
+    seq = manager.replay.seq
+    manager.broadcast_batch([update(1, "unreachable"), update(2, "unreachable")], {1: "active"})
+
+    websocket, client = connect(manager, Subscription.from_message({"status": "active"}))
+    queued(client)
+    assert manager.resume(websocket, seq, manager.replay.epoch)
+
+    # Machine 1 left the filter during the gap; machine 2 was never in it
+    [frame] = queued(client)
+    assert frame["type"] == "status_batch"
+    assert frame["seq"] == manager.replay.seq
+    assert [item["machine_id"] for item in frame["updates"]] == [1]
+
+
+def test_resume_after_restart_queues_snapshot():
+    before = WebSocketManager(queue_size=16)
+    before.broadcast_batch([update(1)])
+
+    manager = WebSocketManager(queue_size=16)
+    manager.broadcast_batch([update(1)])
+    websocket, client = connect(manager)
+
+    assert not manager.resume(websocket, before.replay.seq, before.replay.epoch)
+    assert queued(client) == [RESYNC]
+    assert client.resync_pending
@@ -0,0 +1,165 @@
+"""Tests for subscription parsing and the subscription index."""
+from ipaddress import ip_network
+
+import pytest
+
+from src.services.subscriptions import ALL, Subscription, SubscriptionIndex
+
+ACTIVE = Subscription.from_message({"status": "active"})
+UNREACHABLE = Subscription.from_message({"status": "unreachable"})
+
+
+def make_index() -> SubscriptionIndex[str]:
+    index: SubscriptionIndex[str] = SubscriptionIndex()
+    index.register_machine(1, "10.0.0.1", "web-1")
+    index.register_machine(2, "10.0.1.1", "db-1")
+    index.register_machine(3, "fd00::3", "web-2")
+    return index
+
+
+def test_from_message_normalizes_fields():
+    subscription = Subscription.from_message(
+        {
+            "status": ["unreachable", "active"],
+            "machine_ids": 7,
+            "cidr": ["10.0.0.5/24", "10.0.0.0/24"],
+            "hostname_prefix": ["web-", "db-", "web-"],
+        }
+    )
+
+    assert subscription.statuses == {"active", "unreachable"}
+    assert subscription.machine_ids == {7}
+    assert subscription.networks == (ip_network("10.0.0.0/24"),)
+    assert subscription.hostname_prefixes == ("db-", "web-")
+    assert subscription.to_message() == {
+        "status": ["active", "unreachable"],
+        "machine_ids": [7],
+        "cidr": ["10.0.0.0/24"],
+        "hostname_prefix": ["db-", "web-"],
+    }
+
+
+def test_empty_message_is_unfiltered():
+    subscription = Subscription.from_message({"type": "subscribe"})
+    assert subscription == ALL
+    assert subscription.is_unfiltered
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        {"status": "down"},
+        {"machine_ids": ["1"]},
+        {"machine_ids": [True]},
+        {"cidr": "10.0.0.0/33"},
+        {"cidr": "not-a-network"},
+        {"hostname_prefix": ""},
+        {"hostname_prefix": [1]},
+    ],
+)
+def test_from_message_rejects_malformed_fields(message):
+    with pytest.raises(ValueError):
+        Subscription.from_message(message)
+
+
+def test_selectors_are_ored_and_status_is_anded():
+    index = make_index()
+    subscription = Subscription.from_message(
+        {"status": "unreachable", "machine_ids": [2], "hostname_prefix": "web-"}
+    )
+    index.add("client", subscription)
+
+    assert index.match(1, ["unreachable"]) == {subscription}
+    assert index.match(2, ["unreachable"]) == {subscription}
+    assert index.match(1, ["active"]) == set()
+    assert index.includes(subscription, 3, "unreachable")
+    assert not index.includes(subscription, 4, "unreachable")
+
+
+def test_clients_with_same_filter_share_an_entry():
+    index = make_index()
+    index.add("a", Subscription.from_message({"cidr": "10.0.0.0/24"}))
+    index.add("b", Subscription.from_message({"cidr": "10.0.0.1/24"}))
+
+    [subscription] = index.subscriptions()
+    assert index.clients(subscription) == {"a", "b"}
+    assert index.match(1, ["active"]) == {subscription}
+    assert index.match(2, ["active"]) == set()
+
+
+def test_overlapping_subscriptions_match_independently():
+    index = make_index()
+    web = Subscription.from_message({"hostname_prefix": "web-"})
+    network = Subscription.from_message({"cidr": "10.0.0.0/16"})
+    index.add("a", web)
+    index.add("b", network)
+    index.add("c", UNREACHABLE)
+
+    assert index.match(1, ["unreachable"]) == {web, network, UNREACHABLE}
+    assert index.match(2, ["active"]) == {network}
+    assert index.match(3, ["active"]) == {web}
+
+
+def test_unsubscribe_removes_entry_after_last_client():
+    index = make_index()
+    web = Subscription.from_message({"hostname_prefix": "web-"})
+    index.add("a", web)
+    index.add("b", web)
+    index.add("c", ACTIVE)
+
+    index.remove("a", web)
+    assert index.match(1, ["active"]) == {web, ACTIVE}
+
+    index.remove("b", web)
+    index.remove("c", ACTIVE)
+    index.remove("c", ACTIVE)
+    assert index.subscriptions() == []
+    assert index.match(1, ["active"]) == set()
+    assert not index._by_machine
+    assert not index._resolved
+    assert all(not subscriptions for subscriptions in index._by_status.values())
+
+
+def test_status_change_moves_machine_between_status_filters():
+    index = make_index()
+    index.add("a", ACTIVE)
+    index.add("b", UNREACHABLE)
+
+    # An update is routed by its new and previous status
+    assert index.match(1, ["active"]) == {ACTIVE}
+    assert index.match(1, ["unreachable", "active"]) == {ACTIVE, UNREACHABLE}
+    assert index.match(1, ["unreachable"]) == {UNREACHABLE}
+    assert index.includes(UNREACHABLE, 1, "unreachable")
+    assert not index.includes(UNREACHABLE, 1, "active")
+
+
+def test_updated_machine_moves_between_attribute_filters():
+    index = make_index()
+    web = Subscription.from_message({"hostname_prefix": "web-"})
+    db = Subscription.from_message({"hostname_prefix": "db-"})
+    index.add("a", web)
+    index.add("b", db)
+
+    index.register_machine(1, "10.0.0.1", "db-2")
+    assert index.match(1, ["active"]) == {db}
+    assert not index.includes(web, 1, "active")
+
+    # Machines selected by ID stay selected whatever their hostname
+    by_id = Subscription.from_message({"machine_ids": [1], "hostname_prefix": "web-"})
+    index.add("c", by_id)
+    index.register_machine(1, "10.0.0.1", "app-1")
+    assert index.match(1, ["active"]) == {by_id}
+
+
+def test_new_and_deleted_machines_update_filters():
+    index = make_index()
+    web = Subscription.from_message({"hostname_prefix": "web-"})
+    index.add("a", web)
+
+    index.register_machine(4, "10.0.2.1", "web-3")
+    assert index.match(4, ["active"]) == {web}
+
+    index.unregister_machine(4)
+    assert index.match(4, ["active"]) == set()
+    assert not index.includes(web, 4, "active")
+    assert 4 not in index.machine_ids()
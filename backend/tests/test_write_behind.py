@@ -0,0 +1,197 @@
+"""Tests for the write-behind buffers of ping results."""
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+from src.models import PingStatusCreate
+from src.services.state_version import state_version
+from src.services.write_behind import MachineStateWriter, PingStatusWriter
+
+CHECKED_AT = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+class StubPingStatusService:
+    """Records written batches; fails while ``failing`` is set, blocks until ``release``."""
+
+    def __init__(self):
+        self.batches: list[list] = []
+        self.failing = False
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def create_ping_statuses(self, records: list[tuple]) -> None:
+        await self.release.wait()
+        if self.failing:
+            raise OSError("connection lost")
+        self.batches.append(records)
+
+    async def update_machines_latest_ping(self, machine_ids, is_alive, response_times, checked_at):
+        await self.release.wait()
+        if self.failing:
+            raise OSError("connection lost")
+        self.batches.append(list(zip(machine_ids, is_alive, response_times, checked_at)))
+
+
+def ping(machine_id: int) -> PingStatusCreate:
+    return PingStatusCreate(machine_id=machine_id, is_alive=True, response_time=1.0)
+
+
+def make_ping_writer(**kwargs) -> tuple[PingStatusWriter, StubPingStatusService]:
+    writer = PingStatusWriter(None, flush_interval=3600, **kwargs)
+    service = writer.ping_status_service = StubPingStatusService()
+    return writer, service
+
+
+def written_ids(service: StubPingStatusService) -> list[int]:
+    return [record[0] for batch in service.batches for record in batch]
+
+
+async def test_flush_writes_in_batches():
+    writer, service = make_ping_writer(batch_size=2, max_pending=10)
+    for machine_id in range(5):
+        await writer.add(ping(machine_id), CHECKED_AT)
+
+    await writer.flush()
+    assert [len(batch) for batch in service.batches] == [2, 2, 1]
+    assert written_ids(service) == [0, 1, 2, 3, 4]
+    assert service.batches[0][0] == (0, True, 1.0, CHECKED_AT, 0, 60)
+    assert writer.pending == 0
+
+
+async def test_failed_batch_is_requeued_in_order():
+    writer, service = make_ping_writer(batch_size=2, max_pending=10)
+    for machine_id in range(3):
+        await writer.add(ping(machine_id), CHECKED_AT)
+
+    service.failing = True
+    await writer.flush()
+    assert writer.pending == 3
+
+    await writer.add(ping(3), CHECKED_AT)
+    service.failing = False
+    await writer.flush()
+    assert written_ids(service) == [0, 1, 2, 3]
+
+
+async def test_add_blocks_at_max_pending():
+    writer, service = make_ping_writer(batch_size=2, max_pending=3)
+    for machine_id in range(3):
+        await writer.add(ping(machine_id), CHECKED_AT)
+
+    blocked = asyncio.create_task(writer.add(ping(3), CHECKED_AT))
+    await asyncio.sleep(0)
+    assert not blocked.done()
+
+    # In-flight records still count: space opens only once a batch is written
+    service.release.clear()
+    flush = asyncio.create_task(writer.flush())
+    await asyncio.sleep(0)
+    assert writer.pending == 3
+    assert not blocked.done()
+
+    service.release.set()
+    await asyncio.wait_for(blocked, timeout=1)
+    await flush
+    await writer.flush()
+    assert written_ids(service) == [0, 1, 2, 3]
+
+
+async def test_batch_size_wakes_flush_loop():
+    writer, service = make_ping_writer(batch_size=2, max_pending=10)
+    writer.start()
+    try:
+        await writer.add(ping(1), CHECKED_AT)
+        await writer.add(ping(2), CHECKED_AT)
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert written_ids(service) == [1, 2]
+    finally:
+        await writer.close()
+
+
+async def test_close_drains_buffer():
+    writer, service = make_ping_writer(batch_size=100, max_pending=100)
+    writer.start()
+    for machine_id in range(3):
+        await writer.add(ping(machine_id), CHECKED_AT)
+
+    await writer.close()
+    assert written_ids(service) == [0, 1, 2]
+    assert writer.pending == 0
+
+
+async def test_close_drops_records_it_cannot_write():
+    writer, service = make_ping_writer(batch_size=100, max_pending=100)
+    await writer.add(ping(1), CHECKED_AT)
+
+    service.failing = True
+    await writer.close()
+    assert writer.pending == 0
+    assert service.batches == []
+
+
+def make_state_writer() -> tuple[MachineStateWriter, StubPingStatusService]:
+    writer = MachineStateWriter(None, flush_interval=3600)
+    service = writer.ping_status_service = StubPingStatusService()
+    return writer, service
+
+
+async def test_newest_result_per_machine_wins():
+    writer, service = make_state_writer()
+    later = CHECKED_AT + timedelta(seconds=1)
+    writer.record(1, True, 1.0, CHECKED_AT)
+    writer.record(2, True, 2.0, CHECKED_AT)
+    writer.record(1, False, None, later)
+    assert writer.pending == 2
+
+    await writer.flush()
+    assert service.batches == [[(1, False, None, later), (2, True, 2.0, CHECKED_AT)]]
+    assert writer.pending == 0
+
+
+async def test_flush_bumps_state_version_and_notifies():
+    writer, _ = make_state_writer()
+    flushes = []
+    writer.on_flush = lambda: flushes.append(True)
+    version = state_version.value
+
+    await writer.flush()
+    assert state_version.value == version
+    assert flushes == []
+
+    writer.record(1, True, 1.0, CHECKED_AT)
+    await writer.flush()
+    assert state_version.value == version + 1
+    assert flushes == [True]
+
+
+async def test_failed_flush_keeps_newer_results():
+    writer, service = make_state_writer()
+    flushes = []
+    writer.on_flush = lambda: flushes.append(True)
+    later = CHECKED_AT + timedelta(seconds=1)
+    writer.record(1, True, 1.0, CHECKED_AT)
+    writer.record(2, True, 2.0, CHECKED_AT)
+
+    service.failing = True
+    service.release.clear()
+    flush = asyncio.create_task(writer.flush())
+    await asyncio.sleep(0)
+    writer.record(1, False, None, later)
+    service.release.set()
+    await flush
+    assert flushes == []
+
+    service.failing = False
+    await writer.flush()
+    assert sorted(service.batches[0]) == [(1, False, None, later), (2, True, 2.0, CHECKED_AT)]
+
+
+async def test_discard_and_close_drain():
+    writer, service = make_state_writer()
+    writer.start()
+    writer.record(1, True, 1.0, CHECKED_AT)
+    writer.record(2, True, 2.0, CHECKED_AT)
+    writer.discard(2)
+
+    await writer.close()
+    assert service.batches == [[(1, True, 1.0, CHECKED_AT)]]
@@ -11,25 +11,180 @@ CREATE TABLE IF NOT EXISTS machines (
     last_seen TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     registered_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    extra_data JSONB
+    extra_data JSONB,
+    -- 最新ping結果 (モニターが定期的にまとめて更新する非正規化カラム)
+    last_ping_alive BOOLEAN,
+    last_ping_response_time FLOAT,
+    last_ping_at TIMESTAMP WITH TIME ZONE
 );
 
-CREATE INDEX IF NOT EXISTS idx_machines_status ON machines(status);
+-- 一覧取得のキーセットページネーション用 (ORDER BY registered_at DESC, id DESC)
+CREATE INDEX IF NOT EXISTS idx_machines_registered_at_id ON machines(registered_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_machines_status_registered_at_id
+    ON machines(status, registered_at DESC, id DESC);
 CREATE INDEX IF NOT EXISTS idx_machines_last_seen ON machines(last_seen);
 
--- PingStatusテーブル
+-- ステータス別マシン数 (一覧取得の total 用、machines のトリガーで維持)
+CREATE TABLE IF NOT EXISTS machine_status_counts (
+    status VARCHAR(20) PRIMARY KEY,
+    count BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO machine_status_counts (status, count)
+SELECT s.status, COUNT(m.id)
+FROM (VALUES ('active'), ('unreachable')) AS s(status)
+LEFT JOIN machines m ON m.status = s.status
+GROUP BY s.status
+ON CONFLICT (status) DO UPDATE SET count = EXCLUDED.count;
+
+-- カウンタ行は常にステータス名の順にロックする (同時更新時のデッドロック防止)
+-- INSERT/DELETE は文単位で集計して反映 (一括登録でも1文あたりステータスごとに1回の更新)
+CREATE OR REPLACE FUNCTION machine_status_counts_insert()
+RETURNS TRIGGER AS $$
+DECLARE
+    r RECORD;
+BEGIN
+    FOR r IN SELECT status, COUNT(*) AS n FROM new_rows GROUP BY status ORDER BY status LOOP
+        UPDATE machine_status_counts SET count = count + r.n WHERE status = r.status;
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION machine_status_counts_delete()
+RETURNS TRIGGER AS $$
+DECLARE
+    r RECORD;
+BEGIN
+    FOR r IN SELECT status, COUNT(*) AS n FROM old_rows GROUP BY status ORDER BY status LOOP
+        UPDATE machine_status_counts SET count = count - r.n WHERE status = r.status;
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- UPDATE はステータスが変わった行だけ行単位で反映 (定期的なlast_ping_*更新では発火しない)
+CREATE OR REPLACE FUNCTION machine_status_counts_update()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE machine_status_counts
+    SET count = count + CASE WHEN status = NEW.status THEN 1 ELSE -1 END
+    WHERE status = LEAST(OLD.status, NEW.status);
+
+    UPDATE machine_status_counts
+    SET count = count + CASE WHEN status = NEW.status THEN 1 ELSE -1 END
+    WHERE status = GREATEST(OLD.status, NEW.status);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER machines_status_counts_insert
+    AFTER INSERT ON machines
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION machine_status_counts_insert();
+
+CREATE TRIGGER machines_status_counts_delete
+    AFTER DELETE ON machines
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION machine_status_counts_delete();
+
+CREATE TRIGGER machines_status_counts_update
+    AFTER UPDATE OF status ON machines
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status)
+    EXECUTE FUNCTION machine_status_counts_update();
+
+-- PingStatusテーブル (checked_at による日次パーティション)
 CREATE TABLE IF NOT EXISTS ping_status (
-    id SERIAL PRIMARY KEY,
+    id BIGSERIAL,
     machine_id INTEGER NOT NULL REFERENCES machines(id) ON DELETE CASCADE,
     is_alive BOOLEAN NOT NULL,
     response_time FLOAT CHECK (response_time IS NULL OR response_time >= 0),
-    checked_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    checked_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
     consecutive_failures INTEGER DEFAULT 0 CHECK (consecutive_failures >= 0),
-    next_check_interval INTEGER DEFAULT 60 CHECK (next_check_interval BETWEEN 60 AND 3600)
-);
+    next_check_interval INTEGER DEFAULT 60 CHECK (next_check_interval >= 1),
+    PRIMARY KEY (id, checked_at)
+) PARTITION BY RANGE (checked_at);
+
+-- 日次パーティションが未作成の期間の行を受け止めるデフォルトパーティション
+CREATE TABLE IF NOT EXISTS ping_status_default PARTITION OF ping_status DEFAULT;
 
 CREATE INDEX IF NOT EXISTS idx_ping_status_machine_checked ON ping_status(machine_id, checked_at DESC);
 
+-- 日次パーティション作成 (UTC日単位, 名前: ping_status_pYYYYMMDD)
+CREATE OR REPLACE FUNCTION create_ping_status_partition(day DATE)
+RETURNS TEXT AS $$
+DECLARE
+    partition_name TEXT := 'ping_status_p' || to_char(day, 'YYYYMMDD');
+    range_start TIMESTAMPTZ := day::timestamp AT TIME ZONE 'UTC';
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF ping_status FOR VALUES FROM (%L) TO (%L)',
+        partition_name,
+        range_start,
+        range_start + INTERVAL '1 day'
+    );
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 初期パーティション (以降はバックエンドのメンテナンスタスクが作成)
+SELECT create_ping_status_partition((CURRENT_TIMESTAMP AT TIME ZONE 'UTC')::date + offset_days)
+FROM generate_series(0, 3) AS offset_days;
+
+-- PingStatus時間別集計テーブル
+-- 書き込みバッチごとに加算で更新し、保持期間を過ぎたパーティションの削除前に生データから再集計 (rtt_p95 はこの時に設定)
+CREATE TABLE IF NOT EXISTS ping_status_hourly (
+    machine_id INTEGER NOT NULL REFERENCES machines(id) ON DELETE CASCADE,
+    bucket TIMESTAMP WITH TIME ZONE NOT NULL,
+    probe_count INTEGER NOT NULL CHECK (probe_count >= 0),
+    alive_count INTEGER NOT NULL CHECK (alive_count >= 0),
+    rtt_count INTEGER NOT NULL DEFAULT 0 CHECK (rtt_count >= 0),
+    rtt_sum DOUBLE PRECISION,
+    rtt_min FLOAT,
+    rtt_max FLOAT,
+    rtt_p95 FLOAT,
+    uptime_pct NUMERIC(5, 2) GENERATED ALWAYS AS (
+        CASE WHEN probe_count > 0 THEN round(100.0 * alive_count / probe_count, 2) END
+    ) STORED,
+    rtt_avg FLOAT GENERATED ALWAYS AS (
+        CASE WHEN rtt_count > 0 THEN rtt_sum / rtt_count END
+    ) STORED,
+    PRIMARY KEY (machine_id, bucket)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ping_status_hourly_bucket ON ping_status_hourly(bucket);
+
+-- PingStatus 5分別集計テーブル (書き込みバッチごとに加算で更新, PING_STATUS_5MIN_RETENTION_DAYS 日保持)
+CREATE TABLE IF NOT EXISTS ping_status_5min (
+    machine_id INTEGER NOT NULL REFERENCES machines(id) ON DELETE CASCADE,
+    bucket TIMESTAMP WITH TIME ZONE NOT NULL,
+    probe_count INTEGER NOT NULL CHECK (probe_count >= 0),
+    alive_count INTEGER NOT NULL CHECK (alive_count >= 0),
+    rtt_count INTEGER NOT NULL DEFAULT 0 CHECK (rtt_count >= 0),
+    rtt_sum DOUBLE PRECISION,
+    rtt_min FLOAT,
+    rtt_max FLOAT,
+    PRIMARY KEY (machine_id, bucket)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ping_status_5min_bucket ON ping_status_5min(bucket);
+
+-- レート制限の状態 (RATE_LIMIT_BACKEND=postgres で全APIワーカーが共有, GCRAの理論到着時刻をepoch秒で保持)
+-- 失われても制限が一時的に緩むだけなので UNLOGGED
+CREATE UNLOGGED TABLE IF NOT EXISTS rate_limits (
+    key TEXT PRIMARY KEY,
+    tat DOUBLE PRECISION NOT NULL
+);
+
+-- 監視インスタンスのリース (CLUSTER_MODE=true, ハートビートで更新し期限切れの行は他のインスタンスが削除)
+CREATE UNLOGGED TABLE IF NOT EXISTS monitor_instances (
+    instance_id TEXT PRIMARY KEY,
+    heartbeat_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
 -- FailureLogsテーブル
 CREATE TABLE IF NOT EXISTS failure_logs (
     id SERIAL PRIMARY KEY,
@@ -16,6 +16,9 @@ class WebSocketClient {
         this.reconnectAttempts = 0;
         this.eventHandlers = {};
         this.isIntentionallyClosed = false;
+        this.subscription = null;
+        this.epoch = null;
+        this.lastSeq = null;
     }
 
     /**
@@ -31,12 +34,15 @@ class WebSocketClient {
         this.isIntentionallyClosed = false;
 
         try {
-            this.ws = new WebSocket(this.url);
+            this.ws = new WebSocket(this.resumeUrl());
 
             this.ws.onopen = () => {
                 console.log('WebSocket connected');
                 this.currentReconnectDelay = this.reconnectDelay;
                 this.reconnectAttempts = 0;
+                if (this.subscription) {
+                    this.sendSubscription(true);
+                }
                 this.emit('open');
             };
 
@@ -49,6 +55,17 @@ class WebSocketClient {
                     if (data.type) {
                         this.emit(data.type, data);
                     }
+
+                    this.trackPosition(data);
+
+                    // Batches and snapshots are delivered to handlers as individual status updates
+                    if (data.type === 'status_batch') {
+                        data.updates.forEach(update => this.emit('status_update', update));
+                    } else if (data.type === 'snapshot') {
+                        data.machines.forEach(machine => {
+                            this.emit('status_update', { type: 'status_update', ...machine });
+                        });
+                    }
                 } catch (error) {
                     console.error('Error parsing WebSocket message:', error);
                 }
@@ -73,6 +90,37 @@ class WebSocketClient {
         }
     }
 
+    /**
+     * URL to connect to, resuming after the last received update if possible.
+     * With a subscription, the position is sent in the subscribe message instead.
+     */
+    resumeUrl() {
+        if (this.lastSeq === null || this.epoch === null || this.subscription) {
+            return this.url;
+        }
+        return `${this.url}?since=${this.lastSeq}&epoch=${encodeURIComponent(this.epoch)}`;
+    }
+
+    /**
+     * Remember the position in the update stream for resuming after a reconnect
+     * @param {Object} data - Received message
+     */
+    trackPosition(data) {
+        if (data.type === 'connection') {
+            // Only a fresh client starts from the current position; a resuming
+            // client advances when the replayed updates or snapshot arrive
+            if (this.lastSeq === null) {
+                this.epoch = data.epoch;
+                this.lastSeq = data.seq;
+            }
+        } else if (data.type === 'snapshot') {
+            this.epoch = data.epoch;
+            this.lastSeq = data.seq;
+        } else if (data.type === 'status_batch') {
+            this.lastSeq = data.seq;
+        }
+    }
+
     /**
      * Reconnect to WebSocket with exponential backoff
      */
@@ -106,6 +154,34 @@ class WebSocketClient {
         }
     }
 
+    /**
+     * Only receive updates of machines matching the filter (null for all machines).
+     * The filter is re-sent after reconnecting.
+     * @param {Object|null} filter - { status, machine_ids, cidr, hostname_prefix }
+     */
+    subscribe(filter) {
+        this.subscription = filter;
+        this.sendSubscription();
+    }
+
+    /**
+     * Send the current subscription filter if connected
+     * @param {boolean} resume - Include the last received position (after reconnecting)
+     */
+    sendSubscription(resume = false) {
+        if (!this.ws || this.ws.readyState !== WebSocket.OPEN) {
+            return;
+        }
+
+        const position = resume && this.lastSeq !== null
+            ? { since: this.lastSeq, epoch: this.epoch }
+            : {};
+        const message = this.subscription
+            ? { type: 'subscribe', ...this.subscription, ...position }
+            : { type: 'unsubscribe' };
+        this.ws.send(JSON.stringify(message));
+    }
+
     /**
      * Register event handler
      * @param {string} event - Event name
@@ -75,7 +75,7 @@ export function useMachines(options: UseMachinesOptions = {}) {
         status: data.status,
         is_alive: data.is_alive,
         response_time: data.response_time,
-        last_seen: data.last_seen,
+        ...(data.last_seen ? { last_seen: data.last_seen } : {}),
       });
     },
     [updateMachine]
@@ -1,4 +1,8 @@
-import type { WebSocketMessage, WebSocketMessageType } from '@/types/machine';
+import type {
+  WebSocketMessage,
+  WebSocketMessageType,
+  WebSocketSubscriptionFilter,
+} from '@/types/machine';
 
 /**
  * WebSocket URL from environment variable or default to localhost
@@ -42,6 +46,9 @@ export class WebSocketClient {
   private onOpenCallback?: () => void;
   private onCloseCallback?: () => void;
   private onErrorCallback?: (error: Event) => void;
+  private subscription: WebSocketSubscriptionFilter | null = null;
+  private epoch: string | null = null;
+  private lastSeq: number | null = null;
 
   constructor(url: string, options: WebSocketClientOptions = {}) {
     this.url = url;
@@ -74,12 +81,15 @@ export class WebSocketClient {
     this.isIntentionallyClosed = false;
 
     try {
-      this.ws = new WebSocket(this.url);
+      this.ws = new WebSocket(this.resumeURL());
 
       this.ws.onopen = () => {
         console.log('WebSocket connected');
         this.currentReconnectDelay = this.reconnectDelay;
         this.reconnectAttempts = 0;
+        if (this.subscription) {
+          this.sendSubscription(true);
+        }
         this.emit('open', undefined);
         this.onOpenCallback?.();
       };
@@ -93,6 +103,17 @@ export class WebSocketClient {
           if (data.type) {
             this.emit(data.type, data);
           }
+
+          this.trackPosition(data);
+
+          // Batches and snapshots are delivered to handlers as individual status updates
+          if (data.type === 'status_batch') {
+            data.updates.forEach((update) => this.emit('status_update', update));
+          } else if (data.type === 'snapshot') {
+            data.machines.forEach((machine) => {
+              this.emit('status_update', { type: 'status_update', ...machine });
+            });
+          }
         } catch (error) {
           console.error('Error parsing WebSocket message:', error);
         }
@@ -119,6 +140,36 @@ export class WebSocketClient {
     }
   }
 
+  /**
+   * URL to connect to, resuming after the last received update if possible.
+   * With a subscription, the position is sent in the subscribe message instead.
+   */
+  private resumeURL(): string {
+    if (this.lastSeq === null || this.epoch === null || this.subscription) {
+      return this.url;
+    }
+    return `${this.url}?since=${this.lastSeq}&epoch=${encodeURIComponent(this.epoch)}`;
+  }
+
+  /**
+   * Remember the position in the update stream for resuming after a reconnect
+   */
+  private trackPosition(data: WebSocketMessage): void {
+    if (data.type === 'connection') {
+      // Only a fresh client starts from the current position; a resuming
+      // client advances when the replayed updates or snapshot arrive
+      if (this.lastSeq === null) {
+        this.epoch = data.epoch;
+        this.lastSeq = data.seq;
+      }
+    } else if (data.type === 'snapshot') {
+      this.epoch = data.epoch;
+      this.lastSeq = data.seq;
+    } else if (data.type === 'status_batch') {
+      this.lastSeq = data.seq;
+    }
+  }
+
   /**
    * Reconnect to WebSocket with exponential backoff
    */
@@ -160,6 +211,31 @@ export class WebSocketClient {
     }
   }
 
+  /**
+   * Only receive updates of machines matching the filter (null for all machines).
+   * The filter is re-sent after reconnecting.
+   */
+  subscribe(filter: WebSocketSubscriptionFilter | null): void {
+    this.subscription = filter;
+    this.sendSubscription();
+  }
+
+  /**
+   * Send the current subscription filter if connected
+   */
+  private sendSubscription(resume = false): void {
+    if (this.ws?.readyState !== WebSocket.OPEN) {
+      return;
+    }
+
+    const position =
+      resume && this.lastSeq !== null ? { since: this.lastSeq, epoch: this.epoch } : {};
+    const message = this.subscription
+      ? { type: 'subscribe', ...this.subscription, ...position }
+      : { type: 'unsubscribe' };
+    this.ws.send(JSON.stringify(message));
+  }
+
   /**
    * Register event handler
    */
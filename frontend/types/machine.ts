@@ -52,6 +52,48 @@ export interface GetMachinesResponse {
   machines: Machine[];
   total: number;
   status_filter?: MachineStatus;
+  next_cursor?: string | null;
+}
+
+/**
+ * Ping history resolution
+ */
+export type HistoryResolution = '5m' | '1h' | '1d';
+
+/**
+ * Bucketed ping history of one machine (arrays are aligned with buckets)
+ */
+export interface MachineHistory {
+  machine_id: number;
+  buckets: string[];
+  probe_count: number[];
+  uptime_pct: (number | null)[];
+  rtt_avg: (number | null)[];
+  rtt_min: (number | null)[];
+  rtt_max: (number | null)[];
+}
+
+/**
+ * API response for machine ping history
+ */
+export interface GetMachinesHistoryResponse {
+  from: string;
+  to: string;
+  resolution: HistoryResolution;
+  interval: number;
+  machines: MachineHistory[];
+}
+
+/**
+ * API response for machine uptime (keyed by window label, e.g. '24h')
+ */
+export interface GetMachinesUptimeResponse {
+  windows: string[];
+  machines: {
+    machine_id: number;
+    uptime_pct: Record<string, number | null>;
+    probe_count: Record<string, number>;
+  }[];
 }
 
 /**
@@ -66,7 +108,24 @@ export interface UpsertMachineRequest {
 /**
  * WebSocket message types
  */
-export type WebSocketMessageType = 'status_update' | 'machine_registered' | 'machine_deleted';
+export type WebSocketMessageType =
+  | 'connection'
+  | 'status_update'
+  | 'status_batch'
+  | 'snapshot'
+  | 'subscribed'
+  | 'machine_registered'
+  | 'machine_deleted';
+
+/**
+ * WebSocket connection message (epoch and seq identify the position in the update stream)
+ */
+export interface WebSocketConnection {
+  type: 'connection';
+  message: string;
+  epoch: string;
+  seq: number;
+}
 
 /**
  * WebSocket status update message
@@ -77,7 +136,36 @@ export interface WebSocketStatusUpdate {
   status: MachineStatus;
   is_alive: boolean;
   response_time: number | null;
-  last_seen: string;
+  last_seen?: string;
+}
+
+/**
+ * WebSocket status batch message (status changes coalesced over the batch window)
+ */
+export interface WebSocketStatusBatch {
+  type: 'status_batch';
+  seq: number;
+  updates: WebSocketStatusUpdate[];
+}
+
+/**
+ * WebSocket snapshot message (latest status of every machine, sent on resync)
+ */
+export interface WebSocketSnapshot {
+  type: 'snapshot';
+  epoch: string;
+  seq: number;
+  machines: (Omit<WebSocketStatusUpdate, 'type' | 'last_seen'> & { last_seen?: string })[];
+}
+
+/**
+ * WebSocket subscription filter (machine selectors are OR'ed, status is AND'ed)
+ */
+export interface WebSocketSubscriptionFilter {
+  status?: MachineStatus | MachineStatus[];
+  machine_ids?: number[];
+  cidr?: string | string[];
+  hostname_prefix?: string | string[];
 }
 
 /**
@@ -100,6 +188,9 @@ export interface WebSocketMachineDeleted {
  * Union type for all WebSocket messages
  */
 export type WebSocketMessage =
+  | WebSocketConnection
   | WebSocketStatusUpdate
+  | WebSocketStatusBatch
+  | WebSocketSnapshot
   | WebSocketMachineRegistered
   | WebSocketMachineDeleted;